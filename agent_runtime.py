@@ -0,0 +1,344 @@
+"""asyncio runtime for the agents: non-blocking LLM calls with timeouts, plus sync wrappers."""
+
+import asyncio
+import concurrent.futures
+import json
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from llm_cache import get_default_cache
+from llm_gateway import get_gateway
+
+DEFAULT_LLM_TIMEOUT = 60.0
+
+# ========== Shared event loop ==========
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Process-wide event loop running on a daemon thread.
+
+    Every Streamlit session and CLI agent submits its coroutines here, so many
+    agent sessions share one loop instead of each blocking a thread on I/O.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-runtime", daemon=True).start()
+        return _loop
+
+
+def submit(coro: Awaitable) -> concurrent.futures.Future:
+    """Schedule ``coro`` on the shared loop. Call ``.cancel()`` on the result to abort it."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_sync(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run ``coro`` on the shared loop and wait for its result from synchronous code."""
+    loop = get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync() called from the agent runtime loop; await the coroutine instead")
+
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise asyncio.TimeoutError(f"Agent call did not finish within {timeout}s") from None
+
+
+_DONE = object()
+
+
+async def _anext(agen):
+    try:
+        return await agen.__anext__()
+    except StopAsyncIteration:
+        return _DONE
+
+
+def iterate_sync(agen: AsyncIterator, timeout: Optional[float] = None) -> Iterator:
+    """Consume an async iterator running on the shared loop from synchronous code, item by item."""
+    while True:
+        item = run_sync(_anext(agen), timeout)
+        if item is _DONE:
+            return
+        yield item
+
+
+# ========== LLM calls ==========
+
+async def acompletion_with_timeout(timeout: Optional[float] = DEFAULT_LLM_TIMEOUT, **kwargs):
+    """
+    ``litellm.acompletion`` through the process-wide gateway, cancelled if it
+    takes longer than ``timeout`` seconds (including queueing and retries).
+    """
+    return await asyncio.wait_for(get_gateway().acomplete(**kwargs), timeout)
+
+
+def complete(timeout: Optional[float] = DEFAULT_LLM_TIMEOUT, **kwargs):
+    """Blocking counterpart of ``acompletion_with_timeout`` for synchronous callers."""
+    return run_sync(acompletion_with_timeout(timeout, **kwargs))
+
+
+async def astream_completion(timeout: Optional[float] = DEFAULT_LLM_TIMEOUT, **kwargs) -> AsyncIterator:
+    """
+    ``litellm.acompletion(stream=True)`` through the gateway, as an async iterator of chunks.
+
+    ``timeout`` bounds the wait for the first chunk and for each following one,
+    so a stalled stream is cancelled rather than hanging the session.
+    """
+    iterator = get_gateway().astream(**kwargs)
+    while True:
+        chunk = await asyncio.wait_for(_anext(iterator), timeout)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+class StreamAssembler:
+    """
+    Rebuilds text and tool calls from streamed deltas.
+
+    A tool call is reported as complete as soon as the stream moves on to the
+    next one, so its action can start while the model is still writing the rest.
+    """
+
+    def __init__(self):
+        self.text_parts: List[str] = []
+        self.tool_calls: Dict[int, Dict[str, str]] = {}
+        self._open: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+    def _close(self, index: int) -> Dict:
+        call = self.tool_calls[index]
+        return {"tool": call["name"], "args": json.loads(call["arguments"] or "{}")}
+
+    def feed(self, chunk) -> Tuple[str, List[Dict]]:
+        """Apply one chunk; returns its text delta and any tool calls it completed."""
+        delta = chunk.choices[0].delta
+        text = getattr(delta, "content", None) or ""
+        if text:
+            self.text_parts.append(text)
+
+        completed = []
+        for tool_delta in getattr(delta, "tool_calls", None) or []:
+            index = tool_delta.index if tool_delta.index is not None else len(self.tool_calls)
+            if self._open is not None and index != self._open:
+                completed.append(self._close(self._open))
+            call = self.tool_calls.setdefault(index, {"name": "", "arguments": ""})
+            function = tool_delta.function
+            if function is not None:
+                if function.name:
+                    call["name"] = function.name
+                if function.arguments:
+                    call["arguments"] += function.arguments
+            self._open = index
+        return text, completed
+
+    def finish(self) -> List[Dict]:
+        """Tool calls still open when the stream ended."""
+        if self._open is None:
+            return []
+        index, self._open = self._open, None
+        return [self._close(index)]
+
+
+# ========== Tool call ordering ==========
+
+def call_waves(calls: Sequence, read_only: Callable[[Any], bool]) -> List[List[int]]:
+    """
+    Indexes of ``calls`` grouped into waves that must run one after another.
+
+    Consecutive read-only calls share a wave and may run concurrently; any other
+    call gets a wave to itself, so writes apply in the order the model made them
+    and a read never overlaps a write.
+    """
+    waves: List[List[int]] = []
+    shared = False
+    for index, call in enumerate(calls):
+        reads = read_only(call)
+        if reads and shared:
+            waves[-1].append(index)
+        else:
+            waves.append([index])
+        shared = reads
+    return waves
+
+
+class CallScheduler:
+    """
+    Starts tool calls as they arrive (e.g. while a response still streams) with
+    the same rule as ``call_waves``: reads run alongside other reads, a write
+    waits for everything started before it and everything after waits for it.
+    Must be used from the event loop.
+    """
+
+    def __init__(self, execute: Callable[..., Awaitable], read_only: Callable[..., bool]):
+        self.execute = execute
+        self.read_only = read_only
+        self._tasks: List[asyncio.Task] = []
+        self._reads: List[asyncio.Task] = []
+        self._write: Optional[asyncio.Task] = None
+
+    async def _after(self, blockers: List[asyncio.Task], args: tuple):
+        if blockers:
+            # wait() does not raise, so a failed earlier call does not cancel this one
+            await asyncio.wait(blockers)
+        return await self.execute(*args)
+
+    def start(self, *args) -> asyncio.Task:
+        if self.read_only(*args):
+            blockers = [self._write] if self._write else []
+            task = asyncio.ensure_future(self._after(blockers, args))
+            self._reads.append(task)
+        else:
+            blockers = ([self._write] if self._write else []) + self._reads
+            task = asyncio.ensure_future(self._after(blockers, args))
+            self._reads = []
+            self._write = task
+        self._tasks.append(task)
+        return task
+
+    async def results(self) -> List[Any]:
+        """Results of every started call, in the order they were started."""
+        return list(await asyncio.gather(*self._tasks))
+
+
+
+async def generate_response_async(prompt, model: str = "gemini/gemini-1.5-flash",
+                                  timeout: Optional[float] = DEFAULT_LLM_TIMEOUT) -> str:
+    """Async counterpart of the template ``generate_response(prompt)``."""
+    cache = get_default_cache()
+    cache_key = cache.make_key(model, prompt.messages, prompt.tools)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    kwargs = {"model": model, "messages": prompt.messages, "max_tokens": 1024}
+    if prompt.tools:
+        kwargs["tools"] = prompt.tools
+    response = await acompletion_with_timeout(timeout=timeout, **kwargs)
+
+    message = response.choices[0].message
+    if prompt.tools and message.tool_calls:
+        calls = [
+            {"tool": tool.function.name, "args": json.loads(tool.function.arguments)}
+            for tool in message.tool_calls
+        ]
+        result = json.dumps(calls[0] if len(calls) == 1 else {"tool_calls": calls})
+    else:
+        result = message.content
+    cache.set(cache_key, result)
+    return result
+
+
+# ========== Agent ==========
+
+class AsyncAgent:
+    """
+    asyncio version of the GAME ``Agent`` loop.
+
+    Takes the same goals, agent language, action registry and environment as
+    ``Agent``, but ``generate_response`` is a coroutine function taking the
+    prompt. Each LLM call is cancelled after ``llm_timeout`` seconds and tools
+    run in worker threads, so a slow model or tool does not stall the other
+    sessions sharing the loop. ``start`` returns a future whose ``cancel()``
+    stops the whole run at its next await.
+    """
+
+    def __init__(self,
+                 goals: List,
+                 agent_language,
+                 action_registry,
+                 generate_response: Callable[..., Awaitable[str]],
+                 environment,
+                 memory_factory: Callable[[], Any],
+                 llm_timeout: Optional[float] = DEFAULT_LLM_TIMEOUT):
+        self.goals = goals
+        self.agent_language = agent_language
+        self.actions = action_registry
+        self.generate_response = generate_response
+        self.environment = environment
+        self.memory_factory = memory_factory
+        self.llm_timeout = llm_timeout
+
+    def construct_prompt(self, memory):
+        return self.agent_language.construct_prompt(
+            actions=self.actions.get_actions(),
+            environment=self.environment,
+            goals=self.goals,
+            memory=memory
+        )
+
+    def get_actions(self, response: str) -> List[tuple]:
+        """All (action, invocation) pairs the model asked for in one turn."""
+        return [
+            (self.actions.get_action(invocation["tool"]), invocation)
+            for invocation in self.agent_language.parse_invocations(response)
+        ]
+
+    async def prompt_llm_for_action(self, prompt) -> str:
+        return await asyncio.wait_for(self.generate_response(prompt), self.llm_timeout)
+
+    async def execute_action(self, action, invocation: dict) -> dict:
+        if action is None:
+            return {"tool_executed": False, "error": f"Unknown tool: {invocation['tool']}"}
+        return await asyncio.to_thread(self.environment.execute_action, action, invocation.get("args", {}))
+
+    async def execute_calls(self, calls: List[tuple]) -> List[dict]:
+        """Run read-only calls concurrently and the rest in order, terminal ones last; results keep call order."""
+        results = [None] * len(calls)
+        regular = [i for i, (action, _) in enumerate(calls) if not (action and action.terminal)]
+        terminal = [i for i in range(len(calls)) if i not in regular]
+        waves = [[regular[j] for j in wave]
+                 for wave in call_waves([calls[i] for i in regular], lambda call: bool(call[0] and call[0].read_only))]
+        for indexes in waves + [terminal]:
+            batch = await asyncio.gather(*(self.execute_action(*calls[i]) for i in indexes))
+            for i, result in zip(indexes, batch):
+                results[i] = result
+        return results
+
+    def update_memory(self, memory, response: str, results: List[dict]):
+        memory.add_memory({"type": "assistant", "content": response})
+        for result in results:
+            memory.add_memory({"type": "environment", "content": json.dumps(result)})
+
+    async def run(self, user_input: str, memory=None, max_iterations: int = 50):
+        memory = memory or self.memory_factory()
+        memory.add_memory({"type": "user", "content": user_input})
+
+        for _ in range(max_iterations):
+            prompt = self.construct_prompt(memory)
+            response = await self.prompt_llm_for_action(prompt)
+            if not response or not response.strip():
+                break
+
+            calls = self.get_actions(response)
+            results = await self.execute_calls(calls)
+            self.update_memory(memory, response, results)
+
+            if any(action and action.terminal for action, _ in calls):
+                break
+
+        return memory
+
+    def start(self, user_input: str, memory=None, max_iterations: int = 50) -> concurrent.futures.Future:
+        """Begin a run on the shared loop without waiting for it."""
+        return submit(self.run(user_input, memory, max_iterations))
+
+    def run_sync(self, user_input: str, memory=None, max_iterations: int = 50,
+                 timeout: Optional[float] = None):
+        """Blocking wrapper for the existing synchronous entry points; the run is cancelled after ``timeout``."""
+        return run_sync(self.run(user_input, memory, max_iterations), timeout)
@@ -1,83 +1,147 @@
 
-import streamlit as st
-import requests
-import json
-import pandas as pd
-import uuid
-import litellm
+import asyncio
 import os
-import io
+
+import streamlit as st
+
+# Heavy modules are imported where they are first needed: litellm loads with the LLM
+# gateway (Agent page only) and pandas with the View tab, bulk import or diagnostics.
+# benchmark.py --startup checks what this import block costs.
+from agent_runtime import astream_completion, iterate_sync
+from inventory_context import ContextBuilder
+from inventory_export import EXPORT_FORMATS, columnar_format, export_to_file
+from inventory_orders import OrderError
+from inventory_service import get_inventory_service
+from llm_cache import get_default_cache
+from tracing import serve_metrics, span, tracer
+from user_store import get_user_store
+
+# ---------- SHARED RESOURCES ----------
+# Created once per process and reused by every session and rerun
+
+@st.cache_resource
+def load_user_store():
+    return get_user_store()
+
+@st.cache_resource
+def load_inventory_service():
+    return get_inventory_service()
+
+@st.cache_resource
+def load_response_cache():
+    return get_default_cache(disk_path="llm_cache.db")
+
+@st.cache_resource
+def start_metrics_server(port):
+    return serve_metrics(port)
 
 # ---------- FUNCTION DEFINITIONS ----------
 
 def delete_item(item_id):
-    st.session_state.inventory = [item for item in st.session_state.inventory if item["id"] != item_id]
+    inventory_handle().store.delete(item_id)
 
 def save_inventory():
-    df = pd.DataFrame(st.session_state.inventory)
-    df.to_csv("inventory.csv", index=False)
-    df.to_json("inventory.json", orient="records", indent=2)
-    st.success("Inventory saved as CSV and JSON.")
-import pandas as pd
-import streamlit as st
-import io
-
-def save_inventory_and_download(inventory):
+    # Rows are written to inventory.db as they change; this only pushes anything still buffered
+    inventory_handle().store.flush()
+    st.success("Inventory saved.")
+
+def save_inventory_and_download(inventory, fmt="csv"):
+    # Rows are encoded chunk by chunk into a temp file instead of a DataFrame plus a CSV string.
+    # The file is then read whole: st.download_button copies any data it is given into its
+    # in-memory media store, file objects included, and it rejects the temp file's
+    # BufferedRandom type. One bytes copy is the least the button can hold; the file is
+    # closed (and deleted) before the button is drawn.
     if not inventory:
         st.warning("No items to save.")
         return
 
-    df = pd.DataFrame(inventory)
-
-    # Convert DataFrame to CSV in memory
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_data = csv_buffer.getvalue()
+    with export_to_file(inventory, fmt) as export_file:
+        data = export_file.read()
+    export_format = EXPORT_FORMATS[fmt]
 
     # Show download button
     st.download_button(
-        label="📥 Download Inventory CSV",
-        data=csv_data,
-        file_name="inventory.csv",
-        mime="text/csv"
+        label=f"📥 Download Inventory {export_format['label']}",
+        data=data,
+        file_name=export_format["file_name"],
+        mime=export_format["mime"]
     )
 
 
 
 
 def restock_item(item_id, quantity):
-    for item in st.session_state.inventory:
-        if item["id"] == item_id:
-            item["quantity"] += quantity
-            break
-
-def place_order(order_items):
-    invoice = []
-    for oid in order_items:
-        for item in st.session_state.inventory:
-            if item["id"] == oid and item["quantity"] > 0:
-                item["quantity"] -= 1
-                invoice.append(item)
-    df = pd.DataFrame(invoice)
-    df.to_csv("invoice.csv", index=False)
-    st.success("Invoice generated and saved.")
-    st.session_state.orders.append(invoice)
-
-def ask_assistant(prompt):
+    if item_id in inventory_handle().store:
+        inventory_handle().store.adjust_quantity(item_id, quantity)
+
+def place_order(lines):
+    # {item_id: quantity}; applied all-or-nothing and recorded in the order ledger.
+    # Raises OrderError naming every line that cannot be filled.
+    return inventory_handle().orders.place(lines)
+
+def item_label(item):
+    label = " ".join(v for v in (item.color, item.name) if v)
+    details = ", ".join(str(v) for v in (item.brand, item.size) if v)
+    return f"#{item.id} {label}" + (f" ({details})" if details else "")
+
+ASSISTANT_TIMEOUT = 60
+# Most rows a View-tab search can return; the table pages through them
+SEARCH_LIMIT = 1000
+# How often the View tab's table checks the inventory version and redraws itself
+VIEW_POLL_SECONDS = 2
+# Inventories untouched this long are flushed and closed (they reopen on next use); checked every sweep
+TENANT_IDLE_SECONDS = 3600
+TENANT_SWEEP_SECONDS = 300
+# Tokens of inventory facts sent with each assistant question, whatever the catalog size
+ASSISTANT_CONTEXT_TOKENS = int(os.environ.get("ASSISTANT_CONTEXT_TOKENS", 600))
+ASSISTANT_MODEL = "groq/llama-3.1-8b-instant"
+response_cache = load_response_cache()
+
+def assistant_context(prompt):
+    # Relevant rows and totals for this question, looked up in the indexes the store already keeps
+    handle = inventory_handle()
+    with span("assistant.context"):
+        return ContextBuilder(handle.store, handle.search, token_budget=ASSISTANT_CONTEXT_TOKENS).build(prompt)
+
+def assistant_messages(prompt, context=""):
+    system = "You are a helpful inventory assistant."
+    if context:
+        system += (" Answer from the inventory data below; the totals cover every matching item, "
+                   "the item lists may be truncated.\n\n" + context)
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt}
+    ]
+
+async def stream_assistant_async(prompt, inventory_version=None, context=""):
+    # Yields the reply piece by piece; a cached reply comes back as a single piece
+    messages = assistant_messages(prompt, context)
+    cache_key = response_cache.make_key(ASSISTANT_MODEL, messages, version=inventory_version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
     try:
-        result = litellm.completion(
-            model="groq/llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a helpful inventory assistant."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        if "choices" in result and result["choices"]:
-            return result["choices"][0]["message"]["content"]
-        else:
-            return "❌ Assistant returned an unexpected response."
+        async for chunk in astream_completion(timeout=ASSISTANT_TIMEOUT, model=ASSISTANT_MODEL, messages=messages):
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                parts.append(text)
+                yield text
+    except asyncio.TimeoutError:
+        yield "\n⚠️ The assistant took too long to answer. Please try again."
+        return
     except Exception as e:
-        return f"⚠️ Error in assistant: {str(e)}"
+        yield f"\n⚠️ Error in assistant: {str(e)}"
+        return
+    if parts:
+        response_cache.set(cache_key, "".join(parts))
+    else:
+        yield "❌ Assistant returned an unexpected response."
+
+def ask_assistant_stream(prompt):
+    # Synchronous generator for st.write_stream; the first token shows as soon as it arrives
+    return iterate_sync(stream_assistant_async(prompt, inventory_handle().store.version, assistant_context(prompt)))
 
 
 # ---------- SESSION INITIALIZATION ----------
@@ -85,25 +149,21 @@ if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "current_user" not in st.session_state:
     st.session_state.current_user = None
-if "inventory" not in st.session_state:
-    st.session_state.inventory = []
-if "orders" not in st.session_state:
-    st.session_state.orders = []
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
-# ---------- USER ACCOUNT MANAGEMENT ----------
-USER_FILE = "user_data.json"
-if not os.path.exists(USER_FILE):
-    with open(USER_FILE, "w") as f:
-        json.dump({}, f)
-
-with open(USER_FILE, "r") as f:
-    users = json.load(f)
+def inventory_handle():
+    # Sessions keep only a handle; every session of the same user shares one store.
+    # Only reached after login, so there is no shared anonymous inventory.
+    tenant = st.session_state.current_user
+    handle = st.session_state.get("inventory_handle")
+    if handle is None or handle.tenant != tenant:
+        handle = st.session_state.inventory_handle = load_inventory_service().handle(tenant)
+    return handle
 
-def save_users():
-    with open(USER_FILE, "w") as f:
-        json.dump(users, f)
+# ---------- USER ACCOUNT MANAGEMENT ----------
+# Accounts live in users.db (imported once from user_data.json); lookups are by primary key
+users = load_user_store()
 
 # ---------- LOGIN OR SIGNUP ----------
 st.title("🧠 Inventory Agent App")
@@ -117,18 +177,11 @@ if menu == "Create Account":
     phone = st.text_input("Phone")
     password = st.text_input("Password", type="password")
     if st.button("Create Account"):
-        if username in users:
-            st.error("Username already exists.")
-        elif not all([name, username, email, phone, password]):
+        if not all([name, username, email, phone, password]):
             st.warning("Please fill all fields.")
+        elif not users.create_user(username, name, email, phone, password):
+            st.error("Username already exists.")
         else:
-            users[username] = {
-                "name": name,
-                "email": email,
-                "phone": phone,
-                "password": password
-            }
-            save_users()
             st.success("Account created successfully!")
 
 elif menu == "Login":
@@ -136,122 +189,334 @@ elif menu == "Login":
     login_user = st.text_input("Username")
     login_pass = st.text_input("Password", type="password")
     if st.button("Login"):
-        if login_user in users and users[login_user]["password"] == login_pass:
-            st.success(f"Welcome back, {users[login_user]['name']}!")
+        user = users.authenticate(login_user, login_pass)
+        if user is not None:
+            st.success(f"Welcome back, {user['name']}!")
             st.session_state.logged_in = True
             st.session_state.current_user = login_user
         else:
             st.error("Invalid credentials.")
 
-# ---------- MAIN APP AFTER LOGIN ----------
-page = st.sidebar.selectbox("Choose a page:", ["Inventory", "Agent"])
-
-if page == "Inventory":
-    st.title("📦 Inventory Management System")
-
-    # Sample inventory and order lists
-    if "inventory" not in st.session_state:
-        st.session_state.inventory = []
-    if "orders" not in st.session_state:
-        st.session_state.orders = []
+# ---------- INVENTORY TABS ----------
+# Each tab is a fragment: a widget inside one reruns only that tab, not the whole script.
+# Inputs sit in forms so typing does nothing until the form is submitted.
+
+def show_notice(key):
+    # Messages set before a fragment rerun, shown once on the next run
+    notice = st.session_state.pop(key, None)
+    if notice is not None:
+        getattr(st, notice[0])(notice[1])
+
+@st.fragment
+def add_tab(handle):
+    inventory = handle.store
+    st.header("➕ Add Item")
+    with st.form("add_item_form", clear_on_submit=True):
+        name = st.text_input("Item Name").strip()
+        quantity = st.number_input("Quantity", min_value=1, step=1)
+        category = st.text_input("Category").strip()
+        price = st.number_input("Price", min_value=0.0, step=0.1)
+        size = st.text_input("Size (optional)").strip()
+        st.caption("e.g., Small (for clothes) or 200ml (for shampoo/oil)")
+        brand = st.text_input("Brand Name").strip()
+        color = st.text_input("Color").strip()
+        submitted = st.form_submit_button("Add Item")
+    if submitted:
+        inventory.add(
+            name=name,
+            quantity=quantity,
+            category=category,
+            price=price,
+            size=size if size else "N/A",
+            brand=brand,
+            color=color
+        )
+        st.success(f"✅ Added {quantity} of {name} ({size if size else 'N/A'}, {color}, {brand}) to inventory.")
+
+    with st.expander("📥 Bulk import from file"):
+        with st.form("bulk_import_form", clear_on_submit=True):
+            upload = st.file_uploader("CSV, JSON or JSON-lines file", type=["csv", "json", "jsonl", "ndjson"])
+            submitted = st.form_submit_button("Import File")
+        if submitted and upload is not None:
+            from inventory_import import bulk_import
+            stats = bulk_import(inventory, upload, file_name=upload.name)
+            st.success(
+                f"Imported {stats['rows_read']} rows: {stats['added']} new items, "
+                f"{stats['restocked']} restocked, {stats['rejected']} rejected."
+            )
+
+# What the table shows before the controls have been drawn (e.g. the inventory was empty then)
+VIEW_DEFAULT_CONTROLS = {"category": None, "brand": None, "color": None, "search": "",
+                         "sort_by": "id", "ascending": True, "page_size": 50, "page": 1}
+
+def view_controls(view):
+    any_value = "All"
+    filter_cols = st.columns(3)
+    category_filter = filter_cols[0].selectbox("Category", [any_value] + view.options("category"), key="view_category")
+    brand_filter = filter_cols[1].selectbox("Brand", [any_value] + view.options("brand"), key="view_brand")
+    color_filter = filter_cols[2].selectbox("Color", [any_value] + view.options("color"), key="view_color")
+    search_text = st.text_input("Search", placeholder="e.g. blu nike sneakers", key="view_search").strip()
+
+    # Search results come back best match first; "relevance" keeps that order
+    sort_options = ["id", "name", "quantity", "price", "category", "brand", "color"]
+    sort_cols = st.columns(4)
+    sort_by = sort_cols[0].selectbox("Sort by", (["relevance"] if search_text else []) + sort_options)
+    ascending = sort_cols[1].checkbox("Ascending", value=True)
+    page_size = sort_cols[2].selectbox("Rows per page", [25, 50, 100, 500], index=1)
+    page = sort_cols[3].number_input("Page", min_value=1, step=1)
+    return {
+        "category": None if category_filter == any_value else category_filter,
+        "brand": None if brand_filter == any_value else brand_filter,
+        "color": None if color_filter == any_value else color_filter,
+        "search": search_text,
+        "sort_by": None if sort_by == "relevance" else sort_by,
+        "ascending": ascending,
+        "page_size": page_size,
+        "page": page,
+    }
+
+@st.fragment(run_every=VIEW_POLL_SECONDS)
+def view_table(handle, controls):
+    # Timed runs redraw only this table, so changes from other tabs and sessions show up without
+    # rerunning the app. The page is queried again only when the store version or the controls
+    # changed; otherwise the cached page is drawn again (a fragment run replaces its output)
+    inventory = handle.store
+    version = inventory.version
+    if not inventory:
+        st.info("Inventory is empty.")
+        return
+    controls = controls or VIEW_DEFAULT_CONTROLS
+
+    query_key = (handle.tenant, version) + tuple(controls.values())
+    cached = st.session_state.get("view_page")
+    if cached is not None and cached[0] == query_key:
+        page_df, total = cached[1]
+    else:
+        search_text = controls["search"]
+        ids = [item.id for item in handle.search.search(search_text, SEARCH_LIMIT)] if search_text else None
+        # Only the requested page is sent to the browser
+        with span("view.query"):
+            page_df, total = handle.view.query(
+                category=controls["category"],
+                brand=controls["brand"],
+                color=controls["color"],
+                sort_by=controls["sort_by"],
+                ascending=controls["ascending"],
+                page=controls["page"] - 1,
+                page_size=controls["page_size"],
+                ids=ids,
+            )
+        st.session_state.view_page = (query_key, (page_df, total))
+    page_size = controls["page_size"]
+    page_count = max((total + page_size - 1) // page_size, 1)
+    st.dataframe(page_df)
+    st.caption(f"{total} matching items · page {controls['page']} of {page_count}")
+
+@st.fragment
+def view_tab(handle):
+    # A control change reruns this tab; the table below also refreshes on its own timer
+    inventory = handle.store
+    st.header("📄 View Inventory")
+    controls = view_controls(handle.view) if inventory else None
+    view_table(handle, controls)
+
+@st.fragment
+def delete_tab(handle):
+    inventory = handle.store
+    st.header("Delete Item")
+    with st.form("delete_item_form"):
+        delete_index = st.number_input("Enter index to delete", min_value=1, step=1)
+        submitted = st.form_submit_button("Delete")
+    if submitted:
+        target = inventory.at(delete_index - 1)
+        if target is not None:
+            removed = inventory.delete(target.id)
+            st.success(f"Removed {removed.get('name', 'Unknown item')}")
+        else:
+            st.error("Invalid index.")
+
+@st.fragment
+def order_tab(handle):
+    inventory = handle.store
+    orders = handle.orders
+    st.header("Order Items")
+    show_notice("order_notice")
+    # Lines collect here until the whole order is placed or reserved
+    cart = st.session_state.setdefault("order_cart", {})
+    with st.form("order_line_form", clear_on_submit=True):
+        line_cols = st.columns([3, 1])
+        order_item = line_cols[0].text_input("Order item", placeholder="e.g. red nike shirt")
+        order_qty = line_cols[1].number_input("Order quantity", min_value=1, step=1)
+        add_line = st.form_submit_button("Add line")
+    if add_line:
+        target = handle.search.resolve(order_item)
+        if target is not None:
+            cart[target.id] = cart.get(target.id, 0) + order_qty
+        else:
+            candidates = handle.search.search(order_item, limit=5)
+            if candidates:
+                st.warning("Which item? " + "; ".join(item_label(c) for c in candidates))
+            else:
+                st.warning("Item not found in inventory.")
 
-    tabs = st.tabs(["Add", "View", "Delete", "Order", "Restock", "Save", "Stop"])
+    for item_id, quantity in list(cart.items()):
+        item = inventory.get(item_id)
+        if item is None:
+            del cart[item_id]
+            continue
+        st.markdown(f"- {quantity} x {item_label(item)} · {orders.available(item_id)} available")
 
-    # ---- ADD TAB ----
-    with tabs[0]:
-       st.header("➕ Add Item")
-    
-       name = st.text_input("Item Name").strip()
-       quantity = st.number_input("Quantity", min_value=1, step=1)
-       category = st.text_input("Category").strip()
-       price = st.number_input("Price", min_value=0.0, step=0.1)
-       size = st.text_input("Size (optional)").strip()
-       st.caption("e.g., Small (for clothes) or 200ml (for shampoo/oil)")
-       brand = st.text_input("Brand Name").strip()
-       color = st.text_input("Color").strip()
-       if st.button("Add Item"):
-           item = {
-            "name": name,
-            "quantity": quantity,
-            "category": category,
-            "price": price,
-            "size": size if size else "N/A", 
-            "brand": brand,
-            "color": color
-        }
-           if "inventory" not in st.session_state:
-              st.session_state.inventory = []
-
-           st.session_state.inventory.append(item)
-           st.success(f"✅ Added {quantity} of {name} ({size if size else 'N/A'}, {color}, {brand}) to inventory.")
-
-    with tabs[1]:
-         st.header("📄 View Inventory")
-         if st.session_state.inventory:
-            df = pd.DataFrame(st.session_state.inventory)
-            st.dataframe(df)
-         else:
-             st.info("Inventory is empty.")
-
-    with tabs[2]:
-        st.header("Delete Item")
-        delete_index = st.number_input("Enter index to delete", min_value=1, step=1)
-        if st.button("Delete"):
+    if cart:
+        order_cols = st.columns(3)
+        if order_cols[0].button("Place order"):
             try:
-                removed = st.session_state.inventory.pop(delete_index - 1)
-                st.success(f"Removed {removed.get('name', 'Unknown item')}")
-
-            except IndexError:
-                st.error("Invalid index.")
-
-    with tabs[3]:
-        st.header("Order Item")
-        order_item = st.text_input("Order item name")
-        order_qty = st.number_input("Order quantity", min_value=1, step=1)
-        if st.button("Order"):
-            st.session_state.orders.append({"item": order_item, "quantity": order_qty})
-            st.success(f"Ordered {order_qty} x {order_item}")
-
-    with tabs[4]:
-        st.header("Restock")
+                order = place_order(cart)
+            except OrderError as e:
+                st.error("Order not placed: " + " ".join(e.problems))
+            else:
+                cart.clear()
+                st.session_state.order_notice = ("success", f"Order {order['order_id']} placed · Rs.{order['total']}")
+                st.rerun(scope="fragment")
+        if order_cols[1].button(f"Reserve for {int(orders.reservation_ttl // 60)} min"):
+            try:
+                reservation = orders.reserve(cart)
+            except OrderError as e:
+                st.error("Nothing reserved: " + " ".join(e.problems))
+            else:
+                cart.clear()
+                st.session_state.order_reservation = reservation.id
+                st.rerun(scope="fragment")
+        if order_cols[2].button("Clear lines"):
+            cart.clear()
+            st.rerun(scope="fragment")
+
+    reservation_id = st.session_state.get("order_reservation")
+    if reservation_id:
+        st.info(f"Reservation {reservation_id} is holding stock.")
+        hold_cols = st.columns(2)
+        if hold_cols[0].button("Confirm reserved order"):
+            st.session_state.order_reservation = None
+            try:
+                order = orders.commit(reservation_id)
+            except OrderError as e:
+                st.session_state.order_notice = ("error", " ".join(e.problems))
+            else:
+                st.session_state.order_notice = ("success", f"Order {order['order_id']} placed · Rs.{order['total']}")
+            st.rerun(scope="fragment")
+        if hold_cols[1].button("Release reservation"):
+            st.session_state.order_reservation = None
+            orders.release(reservation_id)
+            st.session_state.order_notice = ("success", f"Released {reservation_id}.")
+            st.rerun(scope="fragment")
+
+    if len(orders):
+        st.subheader("Invoice")
+        # Only the latest page of lines is rendered
+        st.text(orders.invoice(page=orders.book.page_count() - 1))
+
+@st.fragment
+def restock_tab(handle):
+    inventory = handle.store
+    st.header("Restock")
+    with st.form("restock_form", clear_on_submit=True):
         restock_item = st.text_input("Restock item name")
         restock_qty = st.number_input("Restock quantity", min_value=1, step=1)
-        if st.button("Restock"):
-            for entry in st.session_state.inventory:
-                if entry["item"] == restock_item:
-                    entry["quantity"] += restock_qty
-                    st.success(f"Restocked {restock_qty} x {restock_item}")
-                    break
+        submitted = st.form_submit_button("Restock")
+    if submitted:
+        target = handle.search.resolve(restock_item)
+        if target is not None:
+            inventory.adjust_quantity(target.id, restock_qty)
+            st.success(f"Restocked {restock_qty} x {item_label(target)}")
+        else:
+            candidates = handle.search.search(restock_item, limit=5)
+            if candidates:
+                st.warning("Which item? " + "; ".join(item_label(c) for c in candidates))
             else:
                 st.warning("Item not found in inventory.")
 
-    
-    with tabs[5]:
-        st.header("Save Inventory")
-        if "inventory" in st.session_state:
-            if st.button("Save Inventory"):
-                 save_inventory_and_download(st.session_state.inventory)
-    with tabs[6]:
-        st.header("Stop Agent")
-        if st.button("Clear Session"):
-            st.session_state.inventory = []
-            st.session_state.orders = []
-            st.success("Session cleared.")
-
-elif page == "Agent":
-    st.title("🧠 Inventory Agent Assistant")
-
-    # Store chat history
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+    st.subheader("Low Stock")
+    with st.form("threshold_form"):
+        threshold_cols = st.columns(2)
+        threshold_category = threshold_cols[0].text_input("Category threshold for").strip()
+        threshold_value = threshold_cols[1].number_input("Threshold", min_value=0, step=1, value=5)
+        submitted = st.form_submit_button("Set Threshold")
+    if submitted:
+        if threshold_category:
+            inventory.set_category_threshold(threshold_category, threshold_value)
+        else:
+            inventory.set_default_threshold(threshold_value)
+    low_items = inventory.low_stock(limit=100)
+    if low_items:
+        for item in low_items:
+            st.markdown(f"⚠️ {item.quantity} {item.color} {item.name}(s) in {item.category}")
+    else:
+        st.caption("✅ All items are sufficiently stocked.")
+
+@st.fragment
+def save_tab(handle):
+    st.header("Save Inventory")
+    with st.form("save_form"):
+        export_fmt = st.selectbox(
+            "Format",
+            ["csv", "ndjson", columnar_format()],
+            format_func=lambda f: EXPORT_FORMATS[f]["label"],
+        )
+        submitted = st.form_submit_button("Save Inventory")
+    if submitted:
+        save_inventory_and_download(handle.store, export_fmt)
+
+def end_session():
+    # Forgets this browser session only; the inventory stays as it is for the user's other sessions
+    reservation_id = st.session_state.get("order_reservation")
+    if reservation_id:
+        inventory_handle().orders.release(reservation_id)
+    for key in ("order_cart", "order_reservation", "inventory_handle", "view_page", "order_notice"):
+        st.session_state.pop(key, None)
+    st.session_state.chat_history = []
+    st.session_state.logged_in = False
+    st.session_state.current_user = None
 
+@st.fragment
+def stop_tab(handle):
+    st.header("Stop Agent")
+    if st.button("Log Out"):
+        end_session()
+        st.rerun()
+
+    st.subheader("Delete Inventory")
+    st.warning(
+        f"Deletes every item and order of **{handle.tenant}**, in every open session. "
+        "This cannot be undone."
+    )
+    with st.form("delete_inventory_form", clear_on_submit=True):
+        confirm = st.text_input("Type your username to confirm")
+        submitted = st.form_submit_button("Delete all inventory")
+    if submitted:
+        if confirm.strip() != handle.tenant:
+            st.error("Username does not match; nothing was deleted.")
+        else:
+            handle.store.clear()
+            handle.orders.clear()
+            st.session_state.order_cart = {}
+            st.session_state.order_reservation = None
+            st.success("Inventory deleted.")
+
+@st.fragment
+def agent_chat():
     st.subheader("Ask the Assistant")
-    prompt = st.text_input("Type your question here...")
+    with st.form("assistant_form", clear_on_submit=True):
+        prompt = st.text_input("Type your question here...")
+        send = st.form_submit_button("Send")
 
-    if st.button("Send"):
+    if send:
         if prompt.strip():
             try:
-                reply = ask_assistant(prompt)
+                live_reply = st.empty()
+                with live_reply.container():
+                    st.markdown("🤖 **Assistant:**")
+                    reply = st.write_stream(ask_assistant_stream(prompt))
+                # The finished reply is shown in the chat history below
+                live_reply.empty()
                 st.session_state.chat_history.append(("user", prompt))
                 st.session_state.chat_history.append(("assistant", reply))
             except Exception as e:
@@ -259,6 +524,12 @@ elif page == "Agent":
         else:
             st.warning("Please enter a prompt.")
 
+    cache_stats = response_cache.stats()
+    st.caption(f"Response cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits, {cache_stats['misses']} misses")
+    from llm_gateway import get_gateway
+    gateway_stats = get_gateway().stats()
+    st.caption(f"LLM gateway: {gateway_stats['calls']} calls, {gateway_stats['coalesced']} coalesced, {gateway_stats['retries']} retries")
+
     # Display chat history
     st.subheader("🗂️ Chat History")
     for role, message in st.session_state.chat_history:
@@ -267,3 +538,56 @@ elif page == "Agent":
         else:
             st.markdown(f"🤖 **Assistant:** {message}")
 
+@st.fragment(run_every=TENANT_SWEEP_SECONDS)
+def close_idle_inventories():
+    # Renders nothing; any open session keeps idle users' stores, indexes and ledgers from piling up
+    load_inventory_service().close_idle(TENANT_IDLE_SECONDS)
+
+# ---------- MAIN APP AFTER LOGIN ----------
+# Inventories belong to accounts; nothing is shown (or shared) before login
+if not st.session_state.logged_in:
+    st.info("Log in or create an account to manage your inventory.")
+    st.stop()
+
+close_idle_inventories()
+
+page = st.sidebar.selectbox("Choose a page:", ["Inventory", "Agent"])
+
+# Hidden diagnostics: open the app with ?diagnostics=1 to turn tracing on and show the panel
+show_diagnostics = st.query_params.get("diagnostics") == "1"
+if show_diagnostics:
+    tracer.enable()
+if os.environ.get("INVENTORY_METRICS_PORT"):
+    start_metrics_server(int(os.environ["INVENTORY_METRICS_PORT"]))
+
+if page == "Inventory":
+    st.title("📦 Inventory Management System")
+
+    # Shared with every other session of the same user
+    handle = inventory_handle()
+
+    tabs = st.tabs(["Add", "View", "Delete", "Order", "Restock", "Save", "Stop"])
+    for tab, render in zip(tabs, (add_tab, view_tab, delete_tab, order_tab, restock_tab, save_tab, stop_tab)):
+        with tab:
+            render(handle)
+
+elif page == "Agent":
+    st.title("🧠 Inventory Agent Assistant")
+    agent_chat()
+
+# ---------- DIAGNOSTICS PANEL ----------
+if show_diagnostics:
+    with st.sidebar.expander("🩺 Diagnostics", expanded=True):
+        span_rows = tracer.snapshot()
+        if span_rows:
+            import pandas as pd
+            st.dataframe(pd.DataFrame([{k: v for k, v in row.items() if k != "buckets"} for row in span_rows]))
+            series = {f"{row['span']} {row['labels']}".strip(): row["buckets"] for row in span_rows}
+            selected_series = st.selectbox("Histogram", list(series))
+            st.bar_chart(pd.Series(series[selected_series], name="count"))
+        else:
+            st.caption("No spans recorded yet.")
+        if st.button("Write metrics.prom"):
+            tracer.write_prometheus("metrics.prom")
+            st.success("Metrics written to metrics.prom")
+        st.download_button("Download metrics", tracer.export_prometheus(), file_name="metrics.prom")
@@ -0,0 +1,394 @@
+"""
+End-to-end benchmark for both agents against the scripted mock LLM, plus store and order throughput.
+
+    python benchmark.py                       # 200 turns per agent, store at 1k/100k/1M items
+    python benchmark.py --turns 50 --sizes 1000 10000 --latency 0.02 --json results.json
+    python benchmark.py --startup-only        # app.py import time against its budget
+
+Reports p50/p95/p99 latency per turn, LLM calls per task and prompt tokens per
+turn for the template GAME agent and the inventory agent, store ops/sec,
+orders/sec through the order engine and the cold-start import time of app.py.
+Exits non-zero when app.py's imports exceed the startup budget or pull in a
+module that is meant to load lazily.
+"""
+
+import argparse
+import ast
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import llm_gateway
+from inventory_orders import OrderEngine, OrderError
+from inventory_store import InventoryStore
+from llm_cache import get_default_cache
+from llm_gateway import LLMGateway, get_gateway, set_gateway
+from mock_llm import ScriptedLLM
+
+CORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory_agnet_core.py")
+APP_PATH = os.path.join(os.path.dirname(CORE_PATH), "app.py")
+TEMPLATE_MARKER = '"""Template"""'
+INVENTORY_MARKER = '"""**INVENTORY** **MANAGEMENT** **AGENT**"""'
+
+COLORS = ["red", "blue", "black", "green", "white", "navy", "grey", "pink"]
+CATEGORIES = ["clothing", "shoes", "accessories", "bags"]
+INVENTORY_TOOLS = ["add_item", "order_item", "delete_item", "restock_alert_tool"]
+
+# Median milliseconds app.py's own top-level imports may take in a fresh interpreter.
+# About 100 ms here once litellm, pandas, pyarrow and http.server were made lazy (pandas alone is ~450 ms).
+STARTUP_IMPORT_BUDGET_MS = 150
+# Modules app.py must not load at startup; each is imported where it is first needed
+DEFERRED_MODULES = ("litellm", "httpx", "pandas", "pyarrow")
+# Already loaded by the Streamlit server before app.py runs, so not part of app.py's cost
+HOST_MODULES = {"streamlit"}
+
+
+# ========== Loading the notebook sections ==========
+
+def load_section(start: str, end: Optional[str] = None, drop=()) -> Dict:
+    """
+    Execute one section of the exported notebook and return its namespace.
+
+    The file is a notebook export (shell lines, a Colab import, a blocking
+    ``agent.run()``), so it cannot be imported; each section is run on its own.
+    Line numbers are preserved so tracebacks point at the real file.
+    """
+    with open(CORE_PATH, encoding="utf-8") as f:
+        source = f.read()
+    begin = source.index(start)
+    stop = source.index(end, begin) if end else len(source)
+    lines = [("" if line.strip() in drop else line) for line in source[begin:stop].splitlines()]
+    code = "\n" * source[:begin].count("\n") + "\n".join(lines)
+    namespace = {"__name__": "inventory_agnet_core_section"}
+    exec(compile(code, CORE_PATH, "exec"), namespace)
+    return namespace
+
+
+# ========== Workload ==========
+
+def inventory_workload(turns: int, seed: int = 0) -> List[Dict]:
+    """
+    Scripted adds, orders, deletes and stock checks, in that rotation.
+
+    Each task is a user message and the tool calls the mock LLM answers it with.
+    Stock checks use "check stock", which the inventory agent's router answers
+    without the LLM.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    added = 0
+    for i in range(turns):
+        kind = i % 4
+        name = f"shirt{i // 4}"
+        color = COLORS[i % len(COLORS)]
+        category = CATEGORIES[i % len(CATEGORIES)]
+        quantity = rng.randint(1, 20)
+        price = rng.randint(100, 5000)
+        if kind == 0:
+            added = quantity
+            text = f"Please put {quantity} {color} {name} into {category} at {price}"
+            calls = [{"name": "add_item", "arguments": {
+                "name": name, "color": color, "category": category, "quantity": quantity, "price": price}}]
+        elif kind == 1:
+            # Sell part of what the previous task added
+            color = COLORS[(i - 1) % len(COLORS)]
+            quantity = rng.randint(1, added)
+            text = f"A customer wants {quantity} {color} {name}"
+            calls = [{"name": "order_item", "arguments": {"name": name, "color": color, "quantity": quantity}}]
+        elif kind == 2:
+            text = f"Take the {COLORS[(i - 2) % len(COLORS)]} {name} off the shelves"
+            calls = [{"name": "delete_item", "arguments": {"name": name, "color": COLORS[(i - 2) % len(COLORS)]}}]
+        else:
+            text = "check stock"
+            calls = [{"name": "restock_alert_tool", "arguments": {}}]
+        tasks.append({"text": text, "calls": calls})
+    return tasks
+
+
+# ========== Measurements ==========
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies: List[float], calls: List[int], tokens: List[int]) -> Dict:
+    return {
+        "turns": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "llm_calls_per_task": round(sum(calls) / len(calls), 3) if calls else 0.0,
+        "prompt_tokens_per_turn": round(sum(tokens) / len(tokens), 1) if tokens else 0.0,
+    }
+
+
+def run_turns(llm: ScriptedLLM, tasks: List[Dict], handle) -> Dict:
+    """Time ``handle(text)`` per task and attribute the mock's calls and prompt tokens to it."""
+    latencies, calls, tokens = [], [], []
+    for task in tasks:
+        calls_before, tokens_before = llm.calls, len(llm.prompt_tokens)
+        started = time.perf_counter()
+        handle(task["text"])
+        latencies.append(time.perf_counter() - started)
+        calls.append(llm.calls - calls_before)
+        tokens.append(sum(llm.prompt_tokens[tokens_before:]))
+    return summarize(latencies, calls, tokens)
+
+
+def bench_template_agent(llm: ScriptedLLM, tasks: List[Dict]) -> Dict:
+    template = load_section(TEMPLATE_MARKER, INVENTORY_MARKER)
+    inventory = load_section(INVENTORY_MARKER, drop={"agent.run()"})
+
+    registry = template["ActionRegistry"]()
+    for name in INVENTORY_TOOLS:
+        action = inventory["registry"].get(name)
+        registry.register(template["Action"](
+            name, action.func, action.description, action.tool_schema()["function"]["parameters"],
+            read_only=action.read_only))
+    registry.register(template["Action"](
+        "terminate", lambda message: message, "End the task with a final message.",
+        {"type": "object", "properties": {"message": {"type": "string"}}, "required": ["message"]},
+        terminal=True))
+
+    agent = template["Agent"](
+        goals=[template["Goal"](1, "Manage inventory", "Carry out the user's request with the tools, then call terminate.")],
+        agent_language=template["AgentFunctionCallingActionLanguage"](),
+        action_registry=registry,
+        generate_response=template["agenerate_response"],
+        environment=template["Environment"](),
+    )
+
+    def handle(text):
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.run(text, max_iterations=10)
+
+    return run_turns(llm, tasks, handle)
+
+
+def bench_inventory_agent(llm: ScriptedLLM, tasks: List[Dict], stream: bool = False) -> Dict:
+    inventory = load_section(INVENTORY_MARKER, drop={"agent.run()"})
+    agent = inventory["agent"]
+    agent.stream = stream
+    on_text = (lambda text: None) if stream else None
+    result = run_turns(llm, tasks, lambda text: agent.handle(text, on_text=on_text))
+    result["fast_path_ratio"] = round(agent.router.stats()["fast_path_ratio"], 3)
+    return result
+
+
+def bench_store(size: int, ops: int = 20_000, seed: int = 0) -> Dict:
+    """Build a store of ``size`` items, then time a mix of lookups, stock changes and low-stock queries."""
+    rng = random.Random(seed)
+    store = InventoryStore()
+    started = time.perf_counter()
+    for i in range(size):
+        store.add(name=f"item{i % 5000}", quantity=rng.randint(0, 50), category=CATEGORIES[i % len(CATEGORIES)],
+                  price=float(rng.randint(100, 5000)), size="M", brand="acme", color=COLORS[i % len(COLORS)])
+    build_seconds = time.perf_counter() - started
+
+    ids = [item.id for item in store]
+    started = time.perf_counter()
+    for n in range(ops):
+        kind = n % 4
+        if kind == 0:
+            store.find(f"item{rng.randrange(5000)}", rng.choice(COLORS))
+        elif kind == 1:
+            store.adjust_quantity(rng.choice(ids), rng.choice((-1, 1)))
+        elif kind == 2:
+            store.get(rng.choice(ids))
+        else:
+            store.low_stock(limit=10)
+    ops_seconds = time.perf_counter() - started
+    return {
+        "items": size,
+        "inserts_per_sec": round(size / build_seconds) if build_seconds else 0,
+        "ops_per_sec": round(ops / ops_seconds) if ops_seconds else 0,
+    }
+
+
+def bench_orders(size: int, orders: int = 20_000, lines: int = 3, seed: int = 0) -> Dict:
+    """Place ``orders`` orders of ``lines`` random lines each against a store of ``size`` items."""
+    rng = random.Random(seed)
+    store = InventoryStore()
+    for i in range(size):
+        store.add(name=f"item{i}", quantity=rng.randint(0, 50), category=CATEGORIES[i % len(CATEGORIES)],
+                  price=float(rng.randint(100, 5000)), color=COLORS[i % len(COLORS)])
+    engine = OrderEngine(store, ledger_path=os.path.join(tempfile.mkdtemp(prefix="orders-bench-"), "ledger.jsonl"))
+    ids = [item.id for item in store]
+    rejected = 0
+    started = time.perf_counter()
+    for _ in range(orders):
+        try:
+            engine.place([(rng.choice(ids), rng.randint(1, 3)) for _ in range(lines)])
+        except OrderError:
+            rejected += 1
+    seconds = time.perf_counter() - started
+    engine.close()
+    return {
+        "items": size,
+        "orders_per_sec": round(orders / seconds) if seconds else 0,
+        "rejected": rejected,
+    }
+
+
+def app_imports() -> List[str]:
+    """Modules app.py imports at the top level, i.e. what every cold start pays for."""
+    with open(APP_PATH, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return [m for m in dict.fromkeys(modules) if m.split(".")[0] not in HOST_MODULES]
+
+
+_IMPORT_PROBE = """
+import importlib, json, sys, time
+timings = {}
+for name in sys.argv[1:]:
+    started = time.perf_counter()
+    importlib.import_module(name)
+    timings[name] = (time.perf_counter() - started) * 1000
+print(json.dumps({"timings": timings, "loaded": sorted(sys.modules)}))
+"""
+
+
+def time_imports(modules: List[str]) -> Dict:
+    """Import ``modules`` in order in a fresh interpreter; each time includes whatever it pulls in first."""
+    result = subprocess.run([sys.executable, "-c", _IMPORT_PROBE, *modules], capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(APP_PATH))
+    return json.loads(result.stdout)
+
+
+def bench_startup(budget_ms: float = STARTUP_IMPORT_BUDGET_MS, repeat: int = 5) -> Dict:
+    """Median import time of app.py's top-level imports, which deferred modules they load, and what those cost."""
+    modules = app_imports()
+    time_imports(modules)  # writes the bytecode caches, as any earlier run of the app would have
+    runs = [time_imports(modules) for _ in range(repeat)]
+    totals = [sum(run["timings"].values()) for run in runs]
+    median_ms = statistics.median(totals)
+    eager = [m for m in DEFERRED_MODULES if m in runs[0]["loaded"]]
+    deferred_ms = {}
+    for module in DEFERRED_MODULES:
+        if importlib.util.find_spec(module) is None:
+            deferred_ms[module] = None  # not installed here
+        else:
+            deferred_ms[module] = round(statistics.median(
+                time_imports([module])["timings"][module] for _ in range(3)), 1)
+    per_module = {m: round(statistics.median(run["timings"][m] for run in runs), 1) for m in modules}
+    return {
+        "import_ms": round(median_ms, 1),
+        "budget_ms": budget_ms,
+        "eagerly_loaded": eager,
+        "within_budget": median_ms <= budget_ms and not eager,
+        "per_module_ms": per_module,
+        "deferred_ms": deferred_ms,
+    }
+
+
+def print_startup(r: Dict):
+    status = "ok" if r["within_budget"] else "OVER BUDGET"
+    print(f"app.py imports: {r['import_ms']} ms (budget {r['budget_ms']} ms) {status}")
+    if r["eagerly_loaded"]:
+        print(f"  loaded at startup but meant to be lazy: {', '.join(r['eagerly_loaded'])}")
+    for module, ms in sorted(r["per_module_ms"].items(), key=lambda pair: -pair[1]):
+        print(f"  {module:<24}{ms:>8} ms")
+    print("deferred until first use:")
+    for module, ms in r["deferred_ms"].items():
+        print(f"  {module:<24}{'not installed' if ms is None else f'{ms} ms':>16}")
+
+
+# ========== Main ==========
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200, help="tasks per agent")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1_000, 100_000, 1_000_000],
+                        help="store sizes for the throughput benchmark")
+    parser.add_argument("--ops", type=int, default=20_000, help="store operations per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS,
+                        help="median import time allowed for app.py's top-level imports")
+    parser.add_argument("--startup-only", action="store_true", help="only run the startup import benchmark")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    if args.startup_only:
+        results = {"startup": bench_startup(args.startup_budget_ms)}
+        print_startup(results["startup"])
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+        return results
+
+    tasks = inventory_workload(args.turns, args.seed)
+    script = {task["text"]: task["calls"] for task in tasks}
+    results = {"agents": {}, "store": [], "orders": []}
+
+    # Whatever gateway the process had (usually none yet); building one here would import litellm
+    previous_gateway = llm_gateway._default_gateway
+    workdir = tempfile.mkdtemp(prefix="inventory-bench-")
+    # The agents keep their inventory files in the working directory
+    cwd = os.getcwd()
+    try:
+        for label, bench in (("template_agent", bench_template_agent),
+                             ("inventory_agent", bench_inventory_agent),
+                             ("inventory_agent_streaming", lambda llm, t: bench_inventory_agent(llm, t, stream=True))):
+            # Each agent starts from an empty inventory of its own
+            os.chdir(tempfile.mkdtemp(prefix=label + "-", dir=workdir))
+            llm = ScriptedLLM(script, latency=args.latency, jitter=args.jitter, seed=args.seed)
+            set_gateway(LLMGateway(requests_per_minute=10 ** 9, pool_connections=False, completion_fn=llm.acompletion))
+            get_default_cache().clear()
+            results["agents"][label] = bench(llm, tasks)
+            results["agents"][label]["gateway"] = get_gateway().stats()
+    finally:
+        os.chdir(cwd)
+        set_gateway(previous_gateway)
+
+    for size in args.sizes:
+        results["store"].append(bench_store(size, args.ops, args.seed))
+        results["orders"].append(bench_orders(size, args.ops, seed=args.seed))
+
+    print(f"{'agent':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/task':>12}{'tokens/turn':>13}")
+    for label, r in results["agents"].items():
+        print(f"{label:<28}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['llm_calls_per_task']:>12}{r['prompt_tokens_per_turn']:>13}")
+    print()
+    print(f"{'store items':<14}{'inserts/sec':>14}{'ops/sec':>14}")
+    for r in results["store"]:
+        print(f"{r['items']:<14,}{r['inserts_per_sec']:>14,}{r['ops_per_sec']:>14,}")
+    print()
+    print(f"{'order items':<14}{'orders/sec':>14}{'rejected':>14}")
+    for r in results["orders"]:
+        print(f"{r['items']:<14,}{r['orders_per_sec']:>14,}{r['rejected']:>14,}")
+
+    results["startup"] = bench_startup(args.startup_budget_ms)
+    print()
+    print_startup(results["startup"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    results = main()
+    sys.exit(0 if results and results["startup"]["within_budget"] else 1)
@@ -0,0 +1,200 @@
+"""Rule-based intent router that answers simple inventory commands without calling the LLM."""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+COLORS = {
+    "black", "white", "red", "blue", "green", "yellow", "orange", "purple", "pink",
+    "brown", "grey", "gray", "navy", "beige", "maroon", "silver", "gold", "olive",
+    "teal", "cyan", "magenta", "cream", "khaki", "multicolor",
+}
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "dozen": 12,
+}
+
+# Words that mean the rest of a delete command is not just an item name
+# ("delete the red shirt from the list", "remove all my red shirts")
+DELETE_FILLER = {
+    "from", "list", "inventory", "stock", "store", "catalog", "my", "our", "all", "every",
+    "everything", "please", "in", "on", "to", "it", "them", "that", "this", "these", "those",
+}
+
+# Trailing "slot" phrases, e.g. "size M", "at 500", "brand nike", "in clothing"
+SLOT_PATTERNS = {
+    "size": re.compile(r"\b(?:size|sz)\s+([\w/.-]+)", re.I),
+    "price": re.compile(r"(?:\bat|\bfor|@|\bprice)\s*(?:rs\.?|pkr|\$)?\s*(\d+(?:\.\d+)?)(?:\s*(?:rs|each|/-))?", re.I),
+    "brand": re.compile(r"\b(?:brand|by|from)\s+([\w&'-]+)", re.I),
+    "category": re.compile(r"\b(?:in|category|under)\s+([\w-]+)(?:\s+category)?", re.I),
+}
+
+
+@dataclass
+class IntentMatch:
+    action: str
+    args: Dict = field(default_factory=dict)
+    confidence: float = 1.0
+
+
+def singular(word: str) -> str:
+    """Naive English singular, good enough for catalog nouns (shirts, dresses, watches)."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def parse_quantity(token: str) -> Optional[int]:
+    if token.isdigit():
+        return int(token)
+    return NUMBER_WORDS.get(token.lower())
+
+
+def extract_slots(text: str) -> Tuple[Dict[str, str], str]:
+    """Pull the slot phrases out of ``text``; returns the slots and what is left."""
+    slots = {}
+    for slot, pattern in SLOT_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            slots[slot] = match.group(1).lower()
+            text = text[:match.start()] + " " + text[match.end():]
+    return slots, text
+
+
+def parse_item_phrase(words: List[str]) -> Dict[str, str]:
+    """'red cotton shirts' -> color red, name 'cotton shirt'."""
+    words = [w.lower() for w in words if w.lower() not in {"of", "the", "piece", "pieces", "pcs"}]
+    color = next((w for w in words if w in COLORS), None)
+    name_words = [w for w in words if w != color]
+    if name_words:
+        name_words[-1] = singular(name_words[-1])
+    return {"color": color, "name": " ".join(name_words)}
+
+
+class IntentRouter:
+    """
+    Maps common phrasings straight onto registered actions.
+
+    Each rule returns an IntentMatch with a confidence; matches below
+    ``min_confidence`` (e.g. an add without a price) are left to the LLM.
+    ``stats()`` reports how many requests the fast path handled.
+
+    ``exists(name, color)``, when given, lets destructive rules check the
+    parsed item against the store before claiming the request.
+    """
+
+    def __init__(self, registry, min_confidence: float = 0.9,
+                 exists: Optional[Callable[[str, Optional[str]], bool]] = None):
+        self.registry = registry
+        self.min_confidence = min_confidence
+        self.exists = exists
+        self._lock = threading.Lock()
+        self.handled = 0
+        self.fallbacks = 0
+        self.by_action: Dict[str, int] = {}
+        self.rules: List[Callable[[str], Optional[IntentMatch]]] = [
+            self.match_simple_commands,
+            self.match_add_or_order,
+            self.match_delete,
+        ]
+
+    def _get_action(self, name: str):
+        # Works with both the template registry (get_action) and the inventory one (get)
+        getter = getattr(self.registry, "get_action", None) or self.registry.get
+        return getter(name)
+
+    # ---------- rules ----------
+
+    def match_simple_commands(self, text: str) -> Optional[IntentMatch]:
+        lowered = text.strip().lower().rstrip("?!.")
+        if re.fullmatch(r"(restock|check (the )?stock|low stock|what'?s low( on stock)?|what is low( on stock)?|stock alerts?)", lowered):
+            return IntentMatch("restock_alert_tool")
+        if re.fullmatch(r"(save|save (the )?inventory)", lowered):
+            return IntentMatch("save_inventory")
+        if re.fullmatch(r"(stop|quit|exit|bye|stop (the )?agent)", lowered):
+            return IntentMatch("stop_agent")
+        return None
+
+    def match_add_or_order(self, text: str) -> Optional[IntentMatch]:
+        match = re.match(r"\s*(add|order|buy)\s+(\w+)\s+(.*)$", text, re.I)
+        if not match:
+            return None
+        verb, quantity_token, rest = match.groups()
+        quantity = parse_quantity(quantity_token)
+        if quantity is None:
+            return None
+
+        slots, rest = extract_slots(rest)
+        item = parse_item_phrase(re.findall(r"[\w'-]+", rest))
+        args = {
+            "name": item["name"],
+            "color": item["color"],
+            "quantity": quantity,
+            "category": slots.get("category"),
+            "price": float(slots["price"]) if "price" in slots else None,
+            "brand": slots.get("brand"),
+            "size": slots.get("size"),
+        }
+
+        if verb.lower() == "add":
+            action = "add_item"
+            required = ["name", "color", "quantity", "category", "price"]
+        else:
+            action = "order_item"
+            # Orders sell existing stock, so the item reference and a quantity are enough
+            required = ["name", "color", "quantity"]
+            if args["price"] is not None:
+                args["price"] = int(args["price"])
+
+        missing = [k for k in required if not args.get(k)]
+        confidence = 1.0 - 0.25 * len(missing)
+        return IntentMatch(action, {k: v for k, v in args.items() if v is not None}, confidence)
+
+    def match_delete(self, text: str) -> Optional[IntentMatch]:
+        match = re.match(r"\s*(delete|remove)\s+(?:all\s+)?(?:the\s+)?(.*)$", text, re.I)
+        if not match:
+            return None
+        item = parse_item_phrase(re.findall(r"[\w'-]+", match.group(2)))
+        confidence = 1.0 if item["name"] and item["color"] else 0.5
+        # Quantities and filler left in the name mean the phrase was more than an item
+        # ("remove 3 red shirts"), so let the LLM read it rather than delete the wrong thing
+        if any(w.isdigit() or w in NUMBER_WORDS or w in DELETE_FILLER for w in item["name"].split()):
+            confidence = 0.5
+        elif confidence == 1.0 and self.exists is not None and not self.exists(item["name"], item["color"]):
+            confidence = 0.5
+        return IntentMatch("delete_item", item, confidence)
+
+    # ---------- routing ----------
+
+    def route(self, text: str) -> Optional[IntentMatch]:
+        """Best confident match for ``text`` whose action is registered, or None to use the LLM."""
+        best = None
+        for rule in self.rules:
+            match = rule(text)
+            if match and (best is None or match.confidence > best.confidence):
+                best = match
+
+        with self._lock:
+            if best is None or best.confidence < self.min_confidence or self._get_action(best.action) is None:
+                self.fallbacks += 1
+                return None
+            self.handled += 1
+            self.by_action[best.action] = self.by_action.get(best.action, 0) + 1
+        return best
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.handled + self.fallbacks
+            return {
+                "requests": total,
+                "fast_path": self.handled,
+                "llm_fallback": self.fallbacks,
+                "fast_path_ratio": self.handled / total if total else 0.0,
+                "by_action": dict(self.by_action),
+            }
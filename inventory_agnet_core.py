@@ -23,7 +23,7 @@ import json
 import os
 from typing import List,Dict
 
-from litellm import completion
+from agent_runtime import complete
 from google.colab import userdata  # For Google Colab secrets
 
 # Load Groq API key from Google Colab secrets
@@ -35,7 +35,8 @@ MODEL = "groq/llama-3.1-8b-instant"
 
 # Function to generate response using Groq
 def generate_response(messages: List[Dict]) -> str:
-    response = completion(
+    # Sent through the shared gateway: pooled connections, rate limiting and retries
+    response = complete(
         model=MODEL,
         messages=messages,
         max_tokens=1024,
@@ -45,10 +46,14 @@ def generate_response(messages: List[Dict]) -> str:
 
 """Template"""
 
+import asyncio
+import hashlib
 import json
 import time
 import traceback
-from litellm import completion
+from agent_runtime import AsyncAgent, complete, generate_response_async
+from llm_cache import get_default_cache
+from tracing import span
 from dataclasses import dataclass, field
 from typing import List, Callable, Dict, Any,Optional
 
@@ -59,43 +64,63 @@ class Prompt:
     metadata: dict = field(default_factory=dict)  # Fixing mutable default issue
 
 
+def response_model(tools: List[Dict]) -> str:
+    """Model generate_response calls: plain chat and tool calling go to different ones"""
+    return "gemini/gemini-1.5-flash" if tools else "gemini/gemini-1.5-flash-1.5-flash"
+
+
 def generate_response(prompt: Prompt) -> str:
     """Call LLM to get response"""
 
     messages = prompt.messages
     tools = prompt.tools
+    model = response_model(tools)
 
-    result = None
+    # Identical prompts (same model, messages and tools) are answered from the cache
+    cache = get_default_cache()
+    cache_key = cache.make_key(model, messages, tools)
+    result = cache.get(cache_key)
+    if result is not None:
+        return result
 
     if not tools:
-        response = completion(
-            model="gemini/gemini-1.5-flash-1.5-flash",
+        response = complete(
+            model=model,
             messages=messages,
             max_tokens=1024
         )
         result = response.choices[0].message.content
     else:
-        response = completion(
-            model="gemini/gemini-1.5-flash",
+        response = complete(
+            model=model,
             messages=messages,
             tools=tools,
             max_tokens=1024
         )
 
-        if response.choices[0].message.tool_calls:
-            tool = response.choices[0].message.tool_calls[0]
-            result = {
-                "tool": tool.function.name,
-                "args": json.loads(tool.function.arguments),
-            }
+        tool_calls = response.choices[0].message.tool_calls
+        if tool_calls:
+            calls = [
+                {
+                    "tool": tool.function.name,
+                    "args": json.loads(tool.function.arguments),
+                } for tool in tool_calls
+            ]
+            # A single call keeps the original shape; several come back together in one turn
+            result = calls[0] if len(calls) == 1 else {"tool_calls": calls}
             result = json.dumps(result)
         else:
             result = response.choices[0].message.content
 
-
+    cache.set(cache_key, result)
     return result
 
 
+async def agenerate_response(messages: List[Dict], tools: List[Dict] = None) -> str:
+    """generate_response for Agent, awaited on the shared loop instead of blocking a thread"""
+    return await generate_response_async(Prompt(messages=messages, tools=tools or []), model=response_model(tools))
+
+
 @dataclass(frozen=True)
 class Goal:
     priority: int
@@ -109,12 +134,15 @@ class Action:
                  function: Callable,
                  description: str,
                  parameters: Dict,
-                 terminal: bool = False):
+                 terminal: bool = False,
+                 read_only: bool = False):
         self.name = name
         self.function = function
         self.description = description
         self.terminal = terminal
         self.parameters = parameters
+        # Read-only actions may run alongside each other; everything else runs in call order
+        self.read_only = read_only
 
     def execute(self, **args) -> Any:
         """Execute the action's function"""
@@ -133,25 +161,78 @@ class Action:
 class ActionRegistry:
     def __init__(self):
         self.actions = {}
+        self.version = 0
+        self._action_list = None
 
     def register(self, action: Action):
         self.actions[action.name] = action
+        self.version += 1
+        self._action_list = None
 
     def get_action(self, name: str) -> Optional[Action]:
         return self.actions.get(name, None)
 
     def get_actions(self) -> List[Action]:
         """Get all registered actions"""
-        return list(self.actions.values())
+        # The same list object is returned until the registry changes, so callers can cache on it
+        if self._action_list is None:
+            self._action_list = list(self.actions.values())
+        return self._action_list
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return max(1, len(text) // 4)
+
+
+def memory_content(item: dict) -> str:
+    content = item.get("content", None)
+    if not content:
+        content = json.dumps(item)
+    return content
+
+
+def summarize_memories(items: List[Dict]) -> str:
+    """Default rolling summary: one clipped line per evicted item."""
+    return "\n".join(f"{item['type']}: {memory_content(item)[:200]}" for item in items)
 
 
 class Memory:
-    def __init__(self):
+    def __init__(self,
+                 max_tokens: int = 4000,
+                 window: int = 20,
+                 summary_tokens: int = 500,
+                 summarizer: Callable[[List[Dict]], str] = summarize_memories):
         self.items = []  # Basic conversation histor
+        self.token_counts = []  # Estimated tokens per item, parallel to items
+        self.total_tokens = 0
+        self.max_tokens = max_tokens
+        self.window = window
+        self.summary = ""  # Rolling summary of items that fell out of the window
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        # Items dropped from the front so far; cached formatting drops as many instead of rebuilding
+        self.evicted = 0
 
     def add_memory(self, memory: dict):
         """Add memory to working memory"""
+        tokens = estimate_tokens(memory_content(memory))
         self.items.append(memory)
+        self.token_counts.append(tokens)
+        self.total_tokens += tokens
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        """Fold the oldest items into the summary until the window and token budget fit."""
+        evicted = []
+        while len(self.items) > 1 and (len(self.items) > self.window or self.total_tokens > self.max_tokens):
+            evicted.append(self.items.pop(0))
+            self.total_tokens -= self.token_counts.pop(0)
+        if evicted:
+            summary = "\n".join(filter(None, [self.summary, self.summarizer(evicted)]))
+            # Keep the most recent part of the summary within its own budget
+            self.summary = summary[-self.summary_tokens * 4:]
+            self.evicted += len(evicted)
 
     def get_memories(self, limit: int = None) -> List[Dict]:
         """Get formatted conversation history for prompt"""
@@ -159,18 +240,22 @@ class Memory:
 
     def copy_without_system_memories(self):
         """Return a copy of the memory without system memories"""
-        filtered_items = [m for m in self.items if m["type"] != "system"]
-        memory = Memory()
-        memory.items = filtered_items
+        memory = Memory(self.max_tokens, self.window, self.summary_tokens, self.summarizer)
+        memory.summary = self.summary
+        for m in self.items:
+            if m["type"] != "system":
+                memory.add_memory(m)
         return memory
 
 
 class Environment:
     def execute_action(self, action: Action, args: dict) -> dict:
         """Execute an action and return the result."""
+        started = time.perf_counter()
         try:
-            result = action.execute(**args)
-            return self.format_result(result)
+            with span("tool.execute", tool=action.name):
+                result = action.execute(**args)
+            return self.format_result(result, time.perf_counter() - started)
         except Exception as e:
             return {
                 "tool_executed": False,
@@ -178,13 +263,17 @@ class Environment:
                 "traceback": traceback.format_exc()
             }
 
-    def format_result(self, result: Any) -> dict:
+    def format_result(self, result: Any, duration: float = None) -> dict:
         """Format the result with metadata."""
-        return {
+        formatted = {
             "tool_executed": True,
             "result": result,
             "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
         }
+        if duration is not None:
+            # Measured with a monotonic clock, unlike the timestamp
+            formatted["duration_ms"] = round(duration * 1000, 3)
+        return formatted
 
 
 class AgentLanguage:
@@ -202,12 +291,20 @@ class AgentLanguage:
     def parse_response(self, response: str) -> dict:
         raise NotImplementedError("Subclasses must implement this method")
 
+    def parse_invocations(self, response: str) -> List[dict]:
+        return [self.parse_response(response)]
+
 
 
 class AgentFunctionCallingActionLanguage(AgentLanguage):
 
-    def __init__(self):
+    def __init__(self, prompt_caching: bool = False):
         super().__init__()
+        # Mark the stable system prompt for provider-side prompt caching (e.g. Anthropic via litellm)
+        self.prompt_caching = prompt_caching
+        self._goals_cache = None  # (goals tuple, formatted messages)
+        self._tools_cache = None  # (actions list, tool schemas)
+        self._prefix_cache = None  # (goals messages, tools, prefix hash)
 
     def format_goals(self, goals: List[Goal]) -> List:
         # Map all goals to a single string that concatenates their description
@@ -218,31 +315,42 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
             {"role": "system", "content": goal_instructions}
         ]
 
-    def format_memory(self, memory: Memory) -> List:
-        """Generate response from language model"""
+    def format_memory_item(self, item: dict) -> dict:
         # Map all environment results to a role:user messages
         # Map all assistant messages to a role:assistant messages
         # Map all user messages to a role:user messages
-        items = memory.get_memories()
-        mapped_items = []
-        for item in items:
+        content = memory_content(item)
 
-            content = item.get("content", None)
-            if not content:
-                content = json.dumps(item, indent=4)
+        if item["type"] == "assistant":
+            return {"role": "assistant", "content": content}
+        elif item["type"] == "environment":
+            return {"role": "assistant", "content": content}
+        else:
+            return {"role": "user", "content": content}
 
-            if item["type"] == "assistant":
-                mapped_items.append({"role": "assistant", "content": content})
-            elif item["type"] == "environment":
-                mapped_items.append({"role": "assistant", "content": content})
-            else:
-                mapped_items.append({"role": "user", "content": content})
+    def format_memory(self, memory: Memory) -> List:
+        """Generate response from language model"""
+        # Formatted messages are cached on the memory with the eviction count they
+        # start at; items folded into the summary since are dropped from the front
+        # of the cache and only items added since the last call are formatted
+        cache = getattr(memory, "_formatted", None)
+        evicted = getattr(memory, "evicted", 0)
+        if cache is None or not 0 <= evicted - cache[0] <= len(cache[1]):
+            cache = [evicted, []]
+            memory._formatted = cache
+        elif evicted != cache[0]:
+            del cache[1][:evicted - cache[0]]
+            cache[0] = evicted
+        mapped_items = cache[1]
 
-        return mapped_items
-        for item in reversed(memory.get_memories()):
-          if item["type"] == "environment":
-            print("\n🎯 Final Answer:", json.loads(item["content"]).get("result", "N/A"))
-            break
+        items = memory.get_memories()
+        for item in items[len(mapped_items):]:
+            mapped_items.append(self.format_memory_item(item))
+
+        summary = getattr(memory, "summary", "")
+        if summary:
+            return [{"role": "user", "content": f"Summary of the earlier conversation:\n{summary}"}] + mapped_items
+        return list(mapped_items)
 
     def format_actions(self, actions: List[Action]) -> [List,List]:
         """Generate response from language model"""
@@ -261,19 +369,52 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
 
         return tools
 
+    def cached_goals(self, goals: List[Goal]) -> List:
+        key = tuple(goals)
+        if self._goals_cache is None or self._goals_cache[0] != key:
+            messages = self.format_goals(goals)
+            if self.prompt_caching:
+                messages = [
+                    {
+                        "role": m["role"],
+                        "content": [{"type": "text", "text": m["content"], "cache_control": {"type": "ephemeral"}}],
+                    } for m in messages
+                ]
+            self._goals_cache = (key, messages)
+        return self._goals_cache[1]
+
+    def cached_actions(self, actions: List[Action]) -> List:
+        # ActionRegistry hands out the same list until it changes, so identity is enough here
+        if self._tools_cache is None or self._tools_cache[0] is not actions:
+            self._tools_cache = (actions, self.format_actions(actions))
+        return self._tools_cache[1]
+
+    def prompt_prefix(self, goals: List[Goal], actions: List[Action]) -> dict:
+        """
+        The stable part of every prompt: system messages, tool schemas and a hash of both.
+        Providers with prompt caching can reuse it across turns and sessions.
+        """
+        goal_messages = self.cached_goals(goals)
+        tools = self.cached_actions(actions)
+        if self._prefix_cache is None or self._prefix_cache[0] is not goal_messages or self._prefix_cache[1] is not tools:
+            digest = hashlib.sha256(json.dumps([goal_messages, tools], sort_keys=True).encode("utf-8")).hexdigest()
+            self._prefix_cache = (goal_messages, tools, digest)
+        return {"messages": goal_messages, "tools": tools, "hash": self._prefix_cache[2]}
+
     def construct_prompt(self,
                          actions: List[Action],
                          environment: Environment,
                          goals: List[Goal],
                          memory: Memory) -> Prompt:
 
-        prompt = []
-        prompt += self.format_goals(goals)
-        prompt += self.format_memory(memory)
+        with span("prompt.construct"):
+            prefix = self.prompt_prefix(goals, actions)
 
-        tools = self.format_actions(actions)
+            prompt = []
+            prompt += prefix["messages"]
+            prompt += self.format_memory(memory)
 
-        return Prompt(messages=prompt, tools=tools)
+        return Prompt(messages=prompt, tools=prefix["tools"], metadata={"prefix_hash": prefix["hash"]})
 
     def adapt_prompt_after_parsing_error(self,
                                          prompt: Prompt,
@@ -284,6 +425,11 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
 
         return prompt
 
+    def parse_invocations(self, response: str) -> List[dict]:
+        """Every tool call in a response, in the order the model made them."""
+        parsed = self.parse_response(response)
+        return parsed["tool_calls"] if "tool_calls" in parsed else [parsed]
+
     def parse_response(self, response: str) -> dict:
         """Parse LLM response into structured format."""
         try:
@@ -327,6 +473,13 @@ class Agent:
         action = self.actions.get_action(invocation["tool"])
         return action, invocation
 
+    def get_actions(self, response) -> List[tuple]:
+        """All (action, invocation) pairs the model asked for in one turn."""
+        return [
+            (self.actions.get_action(invocation["tool"]), invocation)
+            for invocation in self.agent_language.parse_invocations(response)
+        ]
+
     def should_terminate(self, response: str) -> bool:
         action_def, _ = self.get_action(response)
         return action_def.terminal
@@ -334,13 +487,14 @@ class Agent:
     def set_current_task(self, memory: Memory, task: str):
         memory.add_memory({"type": "user", "content": task})
 
-    def update_memory(self, memory: Memory, response: str, result: dict):
+    def update_memory(self, memory: Memory, response: str, result):
         """
         Update memory with the agent's decision and the environment's response.
+        ``result`` may be a list when the model made several tool calls in one turn.
         """
-        new_memories = [
-            {"type": "assistant", "content": response},
-            {"type": "environment", "content": json.dumps(result)}
+        results = result if isinstance(result, list) else [result]
+        new_memories = [{"type": "assistant", "content": response}] + [
+            {"type": "environment", "content": json.dumps(r)} for r in results
         ]
         for m in new_memories:
             memory.add_memory(m)
@@ -349,37 +503,35 @@ class Agent:
         response = self.generate_response(full_prompt.messages, full_prompt.tools)
         return response
 
-    def run(self, user_input: str, memory=None, max_iterations: int = 50) -> Memory:
-        memory = memory or Memory()
-        self.set_current_task(memory, user_input)
-        final_answer = None
-
-        for _ in range(max_iterations):
-            prompt = self.construct_prompt(self.goals, memory, self.actions)
-
-            # Generate LLM response
-            response = self.prompt_llm_for_action(prompt)
-
-            # Skip empty response
-            if not response.strip():
-                break
-
-            # Get action + arguments
-            action, invocation = self.get_action(response)
+    async def aprompt_llm_for_action(self, full_prompt: Prompt) -> str:
+        if asyncio.iscoroutinefunction(self.generate_response):
+            return await self.generate_response(full_prompt.messages, full_prompt.tools)
+        # A blocking generate_response gets a worker thread, so the shared loop keeps serving other sessions
+        return await asyncio.to_thread(self.prompt_llm_for_action, full_prompt)
 
-            # Execute tool
-            result = self.environment.execute_action(action, invocation["args"])
-
-            # Extract final answer if it's a real result (not system/control message)
-            if result["tool_executed"] and "result" in result:
-                final_answer = result["result"]
-
-            # Update memory
-            self.update_memory(memory, response, result)
+    def run(self, user_input: str, memory=None, max_iterations: int = 50,
+            timeout: Optional[float] = None) -> Memory:
+        memory = memory or Memory()
+        seen = memory.evicted + len(memory.items)
+
+        # The loop itself is an AsyncAgent on the shared event loop: each model call is
+        # awaited with a timeout and tools run on worker threads, so only the caller waits
+        AsyncAgent(
+            goals=self.goals,
+            agent_language=self.agent_language,
+            action_registry=self.actions,
+            generate_response=self.aprompt_llm_for_action,
+            environment=self.environment,
+            memory_factory=Memory,
+        ).run_sync(user_input, memory, max_iterations, timeout)
 
-            # Check termination
-            if self.should_terminate(response):
-                break
+        # Extract final answer if it's a real result (not system/control message)
+        final_answer = None
+        for item in memory.get_memories()[max(seen - memory.evicted, 0):]:
+            if item["type"] == "environment":
+                result = json.loads(item["content"])
+                if result["tool_executed"] and "result" in result:
+                    final_answer = result["result"]
 
         # Only print the final result once
         if final_answer:
@@ -389,142 +541,217 @@ class Agent:
 
 """**INVENTORY** **MANAGEMENT** **AGENT**"""
 
-import json, csv
+import asyncio
+import json
 from typing import List, Dict
-from litellm import completion
-import pandas as pd
+from inventory_import import bulk_import_file
+from inventory_search import SearchIndex
+from inventory_journal import open_journal_store
+from inventory_orders import OrderEngine, OrderError
+from agent_runtime import (DEFAULT_LLM_TIMEOUT, CallScheduler, StreamAssembler, acompletion_with_timeout,
+                           astream_completion, complete, run_sync)
+from llm_cache import get_default_cache
+from intent_router import IntentRouter
+from tracing import span
 
 # ========== Inventory and File Logic ==========
 
-inventory = []
+RESTOCK_THRESHOLD = 5
+# Snapshot in inventory.json plus an append-only journal of changes since then.
+# RESTOCK_THRESHOLD applies until a default set with set_restock_threshold is saved in the journal.
+inventory = open_journal_store("inventory.json", "inventory.journal.jsonl", default_threshold=RESTOCK_THRESHOLD)
+# Resolves loose references ("blue nike sneaker") to rows; follows the store as it changes
+search_index = SearchIndex(inventory)
 
 def add_item(name, color, category, quantity, price, brand=None, size=None):
-    item = {
-        "name": name,
-        "color": color,
-        "category": category,
-        "quantity": quantity,
-        "price": price,
-        "brand": brand,
-        "size": size,
-    }
-    inventory.append(item)
+    inventory.add(
+        name=name,
+        color=color,
+        category=category,
+        quantity=quantity,
+        price=price,
+        brand=brand,
+        size=size,
+    )
     return {
         "message": f"✅ Added {quantity} {color} {name}(s) in {category} at price {price}"
     }
 
 
+def describe_item(item):
+    label = " ".join(v for v in (item.color, item.name) if v)
+    details = ", ".join(str(v) for v in (item.brand, item.size) if v and v != "N/A")
+    return f"#{item.id} {label}" + (f" ({details})" if details else "")
+
 def delete_item(name, color):
-    global inventory
-    filtered = [item for item in inventory if not (item['name'] == name and item['color'] == color)]
-    if len(filtered) == len(inventory):
-        return {"message": f"❌ No item named {color} {name} found"}
-    inventory = filtered
-    return {"message": f"🗑️ Deleted items with name {color} {name}"}
+    removed = inventory.delete_matching(name, color)
+    if removed:
+        return {"message": f"🗑️ Deleted items with name {color} {name}"}
+
+    # No exact match: accept the reference if it points at exactly one row
+    match = search_index.resolve(f"{color} {name}")
+    if match is not None:
+        inventory.delete(match.id)
+        return {"message": f"🗑️ Deleted {describe_item(match)}"}
+    candidates = search_index.search(f"{color} {name}", limit=3)
+    if candidates:
+        return {"message": f"❌ No item named {color} {name} found. Did you mean: "
+                           + "; ".join(describe_item(item) for item in candidates) + "?"}
+    return {"message": f"❌ No item named {color} {name} found"}
+
+def find_items(query: str, limit: int = 10) -> dict:
+    items = search_index.search(query, limit=limit)
+    if not items:
+        return {"message": f"🔍 Nothing matches '{query}'", "items": []}
+    lines = [f"{describe_item(item)}: {item.quantity} in stock at {item.price}" for item in items]
+    return {"message": "🔍 " + "\n".join(lines), "items": [item.to_dict() for item in items]}
 
 # ✅ Step 1: Order Item Function
-orders = []  # Place this at the top of your notebook/file where you define inventory
-
-def order_item(name: str, color: str, quantity: int, category: str, price: int, brand: str, size: str):
-    order = {
-        "name": name.lower(),
-        "color": color.lower(),
-        "quantity": quantity,
-        "category": category.lower(),
-        "price": price,
-        "brand": brand.lower(),
-        "size": size.lower()
-    }
-    inventory.append(order)
-    orders.append(order)
+# Orders take stock from the inventory and are recorded in an append-only ledger.
+# The app's default tenant uses orders.ledger.jsonl, so the CLI keeps its own file next to its journal.
+orders = OrderEngine(inventory, "inventory.orders.jsonl")
+
+def order_item(name: str, color: str, quantity: int, category: str = None, price: int = None,
+               brand: str = None, size: str = None):
+    # Exact (name, color) rows first, narrowed by brand and size when given; else a loose match
+    matches = inventory.find(name.lower(), color.lower())
+    for field, value in (("brand", brand), ("size", size)):
+        narrowed = [item for item in matches if value and str(item[field]).lower() == value.lower()]
+        matches = narrowed or matches
+    item = matches[0] if len(matches) == 1 else search_index.resolve(
+        " ".join(str(v) for v in (color, name, brand, size) if v))
+    if item is None:
+        candidates = search_index.search(" ".join(str(v) for v in (color, name, brand, size) if v), limit=3)
+        if candidates:
+            return {"message": f"❌ No single item matches {color} {name}. Did you mean: "
+                               + "; ".join(describe_item(item) for item in candidates) + "?"}
+        return {"message": f"❌ No single item matches {color} {name}; add it first or be more specific"}
+    try:
+        order = orders.place({item.id: quantity})
+    except OrderError as e:
+        return {"message": f"❌ Order not placed: {e}"}
     return {
-        "message": f"🛍️ Ordered {quantity} {color} {name}(s) from brand {brand}, size {size}, category {category}, at price {price}"
+        "message": f"🛍️ Order {order['order_id']}: {quantity} x {describe_item(item)} at {item.price} each, "
+                   f"total {order['total']}. {item.quantity} left in stock."
     }
-RESTOCK_THRESHOLD = 5
+
 def restock_alert_tool() -> dict:
-    alerts = []
-    for item in inventory:
-        if item["quantity"] < RESTOCK_THRESHOLD:
-            alerts.append(
-                f"⚠️ Low stock: {item['quantity']} {item['color']} {item['name']}(s) in {item['category']}. Consider restocking."
-            )
+    # The store keeps the set of low rows up to date on every change, so nothing is rescanned here
+    alerts = [
+        f"⚠️ Low stock: {item['quantity']} {item['color']} {item['name']}(s) in {item['category']}. Consider restocking."
+        for item in inventory.low_stock()
+    ]
     if alerts:
         return {"message": "\n".join(alerts)}
     else:
         return {"message": "✅ All items are sufficiently stocked."}
 
-def generate_invoice() -> str:
-    invoice_lines = []
-    total_amount = 0
-    for order in orders:
-        line = f"- {order['quantity']} {order['size']} {order['name']}(s) of brand {order['brand']} at Rs.{order['price']} each → Rs.{order['price'] * order['quantity']}"
-        invoice_lines.append(line)
-        total_amount += order["price"] * order["quantity"]
-
-    invoice_text = "\n".join(invoice_lines)
-    invoice_text += f"\n🧾 Total: Rs.{total_amount}"
-    return invoice_text
+def set_restock_threshold(threshold: int, category: str = None, name: str = None, color: str = None) -> dict:
+    if name:
+        items = inventory.find(name, color)
+        if not items:
+            return {"message": f"❌ No item named {color or ''} {name} found"}
+        for item in items:
+            inventory.set_item_threshold(item.id, threshold)
+        return {"message": f"🔔 Restock threshold for {color or ''} {name} set to {threshold}"}
+    if category:
+        inventory.set_category_threshold(category, threshold)
+        return {"message": f"🔔 Restock threshold for {category} set to {threshold}"}
+    inventory.set_default_threshold(threshold)
+    return {"message": f"🔔 Default restock threshold set to {threshold}"}
 
-def save_inventory():
-    with open("inventory.json", "w") as f:
-        json.dump(inventory, f, indent=4)
+def generate_invoice(page: int = None) -> str:
+    # Lines and the total are kept by the order book as orders come in
+    return orders.invoice(page)
 
-    df = pd.DataFrame(inventory)
-    df.to_csv("inventory.csv", index=False)
+# What the last save already reported, so unchanged summaries are not rebuilt
+_last_saved = {"orders": 0, "version": None}
 
-    invoice = generate_invoice()
-    print("💾 Inventory saved to inventory.json and inventory.csv")
+def save_inventory():
+    # Only the changes since the last save are appended to the journal
+    inventory.flush()
+    print("💾 Inventory changes saved to inventory.journal.jsonl")
 
-    if invoice:
+    if len(orders) != _last_saved["orders"]:
         print("📄 Invoice Summary:")
-        print(invoice)
+        print(generate_invoice())
+        _last_saved["orders"] = len(orders)
 
     # ⬇️ Call restock check
-    restock_alerts = check_restock(inventory)
-    if restock_alerts:
+    if inventory.version != _last_saved["version"]:
         print("\n📦 Restock Alerts:")
-        for alert in restock_alerts:
-            print(alert)
+        print(restock_alert_tool()["message"])
+        _last_saved["version"] = inventory.version
 
 
 
 
 
 def stop_agent():
-    summary = {}
-    for item in inventory:
-        key = f"{item['color']} {item['name']}"
-        summary[key] = summary.get(key, 0) + item["quantity"]
-    summary_str = "\n".join([f"🧾 You added {v} {k}(s)" for k, v in summary.items()])
+    inventory.flush()
+    summary = inventory.quantity_by_color_name()
+    summary_str = "\n".join([f"🧾 You added {v} {color} {name}(s)" for (color, name), v in summary.items()])
     return {"message": f"🛑 Agent stopped.\n{summary_str}"}
 
+def bulk_import(path: str) -> dict:
+    try:
+        stats = bulk_import_file(inventory, path)
+    except FileNotFoundError:
+        return {"message": f"❌ File {path} not found"}
+    return {
+        "message": f"📥 Imported {stats['rows_read']} rows from {path}: "
+                   f"{stats['added']} new items, {stats['restocked']} restocked, {stats['rejected']} rejected"
+    }
+
 # ========== Action Registry ==========
 
 class Action:
-    def __init__(self, name, func, parameters):
+    def __init__(self, name, func, parameters, description="", read_only=False):
         self.name = name
         self.func = func
         self.parameters = parameters
+        self.description = description
+        # Only read-only tools run concurrently within a turn; the rest keep the model's order
+        self.read_only = read_only
 
     def execute(self, **kwargs):
         return self.func(**kwargs)
 
+    def tool_schema(self) -> dict:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters or {"type": "object", "properties": {}},
+            }
+        }
+
 class ActionRegistry:
     def __init__(self):
         self.actions = {}
+        self._tool_schemas = None
 
     def register(self, action: Action):
         self.actions[action.name] = action
+        self._tool_schemas = None  # Rebuilt on next use
 
     def get(self, name):
         return self.actions.get(name)
 
+    def tool_schemas(self) -> list:
+        """Tool definitions for every registered action, built once per registry change."""
+        if self._tool_schemas is None:
+            self._tool_schemas = [action.tool_schema() for action in self.actions.values()]
+        return self._tool_schemas
+
 # ========== Environment ==========
 
 class Environment:
     def execute_action(self, action: Action, args: dict) -> dict:
         try:
-            result = action.execute(**args)
+            with span("tool.execute", tool=action.name):
+                result = action.execute(**args)
             return {"tool_executed": True, "result": result}
         except Exception as e:
             return {"tool_executed": False, "error": str(e)}
@@ -532,91 +759,140 @@ class Environment:
 # ========== Agent ==========
 
 class Agent:
-    def __init__(self, name, actions: ActionRegistry, environment: Environment):
+    def __init__(self, name, actions: ActionRegistry, environment: Environment,
+                 llm_timeout: float = DEFAULT_LLM_TIMEOUT, stream: bool = True):
         self.name = name
         self.actions = actions
         self.environment = environment
         self.memory = []
-
-    def generate_response(self, user_input):
-        response = completion(
+        self.llm_timeout = llm_timeout
+        # Print the model's answer as it is generated instead of after the whole completion
+        self.stream = stream
+        # Simple commands ("restock", "add 3 red shirts size M at 500 in clothing") skip the LLM
+        # Deletes are only routed when the parsed (name, color) is really in the inventory
+        self.router = IntentRouter(actions, exists=lambda name, color: inventory.group_totals(name, color)[0] > 0)
+
+    def completion_kwargs(self, user_input) -> dict:
+        return dict(
             model="groq/llama3-70b-8192",
             messages=[{"role": "user", "content": user_input}],
-            functions=[
-                {
-                    "name": "add_item",
-                    "description": "Add an item to inventory",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                             "name": {"type": "string"},
-                            "color": {"type": "string"},
-                            "quantity": {"type": "integer"},
-                            "category": {"type": "string"},
-                            "brand": {"type": "string"},
-                            "size": {"type": "string"},
-                            "price": {"type": "number"}
-                        },
-                        "required": ["name", "color", "quantity", "category", "price"]
-                    }
-                },
-                {
-                    "name": "delete_item",
-                    "description": "Delete items by name and color",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "name": {"type": "string"},
-                            "color": {"type": "string"}
-                        },
-                        "required": ["name", "color"]
-                    }
-                },
-                {
-             "name": "order_item",
-             "description": "Place an order for items including brand and size, and add to inventory and order list",
-             "parameters": {
-                 "type": "object",
-                "properties": {
-                     "name": {"type": "string", "description": "Name of the item"},
-                    "color": {"type": "string", "description": "Color of the item"},
-                     "quantity": {"type": "integer", "description": "How many items are ordered"},
-                     "category": {"type": "string", "description": "Category like clothing, electronics etc"},
-                      "price": {"type": "integer", "description": "Price of the item"},
-                      "brand": {"type": "string", "description": "Brand name"},
-                     "size": {"type": "string", "description": "Size of the item like small, medium, large"}
-                  },
-                 "required": ["name", "color", "quantity", "category", "price", "brand", "size"]
-              }
-}
-,{
-
-                    "name":"restock_alert_tool",
-                    "description": "Check inventory for low stock",
-                    "parameters": {"type": "object", "properties": {}}
-},
-                {
-                    "name": "save_inventory",
-                    "description": "Save inventory to disk",
-                    "parameters": {"type": "object", "properties": {}}
-                },
-                {
-                    "name": "stop_agent",
-                    "description": "Stop the agent and show summary",
-                    "parameters": {"type": "object", "properties": {}}
-                }
-            ],
-            function_call="auto"
+            # Tools (not legacy functions) so the model can ask for several actions in one turn.
+            # The schemas are built once from the registered actions and reused on every message.
+            tools=self.actions.tool_schemas(),
+            tool_choice="auto"
         )
-        return response
 
-    def run(self):
-     print("Inventory Agent started. Tell me what do you want to: add, order, delete, save, stop. And if you want to check stock type 'restock'\n")
-     while True:
-        user_input = input("Type")
-        response = self.generate_response(user_input)
+    def cache_key(self, kwargs: dict) -> str:
+        # The inventory version is part of the key so answers never outlive the stock they describe
+        return get_default_cache().make_key(kwargs["model"], kwargs["messages"], kwargs["tools"], inventory.version)
+
+    def generate_response(self, user_input):
+        kwargs = self.completion_kwargs(user_input)
+        return get_default_cache().get_or_compute(self.cache_key(kwargs), lambda: complete(timeout=self.llm_timeout, **kwargs))
+
+    async def agenerate_response(self, user_input):
+        # Non-blocking: many sessions can wait on the model at once on the shared loop
+        kwargs = self.completion_kwargs(user_input)
+        return await get_default_cache().aget_or_compute(
+            self.cache_key(kwargs),
+            lambda: acompletion_with_timeout(timeout=self.llm_timeout, **kwargs),
+        )
+
+    def format_reply(self, name, result):
+        if result["tool_executed"]:
+            # ✅ Safe printing to avoid NoneType crash
+            if isinstance(result["result"], dict) and "message" in result["result"]:
+                return result["result"]["message"]
+            elif result["result"] is not None:
+                return result["result"]
+            return None
+        return f"Tool failed: {result['error']}"
+
+    async def aexecute_call(self, name, args):
+        action = self.actions.get(name)
+        if action is None:
+            return "Unknown tool"
+        # Each call runs Environment.execute_action on the default thread pool
+        result = await asyncio.to_thread(self.environment.execute_action, action, args)
+        return self.format_reply(name, result)
+
+    def is_read_only(self, name, args=None):
+        action = self.actions.get(name)
+        return bool(action and action.read_only)
+
+    def scheduler(self) -> CallScheduler:
+        return CallScheduler(self.aexecute_call, self.is_read_only)
+
+    async def run_tool_calls(self, tool_calls):
+        """Run every tool call from one turn in order (reads may overlap), stop_agent last."""
+        calls = [(call.function.name, json.loads(call.function.arguments or "{}")) for call in tool_calls]
+        scheduler = self.scheduler()
+        for call in calls:
+            if call[0] != "stop_agent":
+                scheduler.start(*call)
+        replies = await scheduler.results()
+        stop = any(c[0] == "stop_agent" for c in calls)
+        if stop:
+            replies.append(await self.aexecute_call(*next(c for c in calls if c[0] == "stop_agent")))
+        return [r for r in replies if r is not None], stop
+
+    async def astream_tool_calls(self, user_input, on_text):
+        """
+        Streamed turn: text goes to ``on_text`` as it arrives, and each tool call
+        starts as soon as its arguments are complete (and any earlier write has
+        finished), while the rest still streams.
+        """
+        assembler = StreamAssembler()
+        scheduler = self.scheduler()
+        stop_calls = []
+
+        def start(call):
+            if call["tool"] == "stop_agent":
+                stop_calls.append(call)
+            else:
+                scheduler.start(call["tool"], call["args"])
+
+        kwargs = self.completion_kwargs(user_input)
+        async for chunk in astream_completion(timeout=self.llm_timeout, **kwargs):
+            text, completed = assembler.feed(chunk)
+            if text:
+                on_text(text)
+            for call in completed:
+                start(call)
+        for call in assembler.finish():
+            start(call)
+
+        replies = await scheduler.results()
+        for call in stop_calls:
+            replies.append(await self.aexecute_call(call["tool"], call["args"]))
+        return [r for r in replies if r is not None], bool(stop_calls)
+
+    async def ahandle(self, user_input, on_text=None):
+        """
+        Answer one user message. Returns the reply text (or None) and whether to stop.
+
+        With ``on_text`` and streaming enabled, the model's text is passed to it
+        incrementally and only the tool results are returned.
+        """
+        match = self.router.route(user_input)
+        if match is not None:
+            action = self.actions.get(match.action)
+            result = await asyncio.to_thread(self.environment.execute_action, action, match.args)
+            return self.format_reply(match.action, result), result["tool_executed"] and match.action == "stop_agent"
 
-        # If tool call
+        if self.stream and on_text is not None:
+            replies, stop = await self.astream_tool_calls(user_input, on_text)
+            return ("\n".join(str(r) for r in replies) if replies else None), stop
+
+        response = await self.agenerate_response(user_input)
+        message = response.choices[0].message
+
+        # One or more tool calls in a single round-trip
+        if getattr(message, "tool_calls", None):
+            replies, stop = await self.run_tool_calls(message.tool_calls)
+            return ("\n".join(str(r) for r in replies) if replies else None), stop
+
+        # Legacy single function call
         if response.choices[0].finish_reason == "function_call":
             call = response.choices[0].message.function_call
             name = call.name
@@ -624,32 +900,157 @@ class Agent:
 
             action = self.actions.get(name)
             if action:
-                result = self.environment.execute_action(action, args)
-                if result["tool_executed"]:
-                    # ✅ Safe printing to avoid NoneType crash
-                    if isinstance(result["result"], dict) and "message" in result["result"]:
-                        print("🤖", result["result"]["message"])
-                    elif result["result"] is not None:
-                        print("🤖", result["result"])
-                    if name == "stop_agent":
-                        break
-                else:
-                    print("🤖 Tool failed:", result["error"])
+                result = await asyncio.to_thread(self.environment.execute_action, action, args)
+                return self.format_reply(name, result), result["tool_executed"] and name == "stop_agent"
             else:
-                print("🤖 Unknown tool")
+                return "Unknown tool", False
         else:
-            print("🤖", response.choices[0].message.content)
+            return response.choices[0].message.content, False
+
+    def handle(self, user_input, on_text=None):
+        return run_sync(self.ahandle(user_input, on_text))
+
+    def run(self):
+     print("Inventory Agent started. Tell me what do you want to: add, order, delete, save, stop. And if you want to check stock type 'restock'\n")
+     while True:
+        user_input = input("Type")
+        streamed = []
+
+        def print_token(text):
+            # Called from the runtime loop for every streamed chunk
+            if not streamed:
+                print("🤖 ", end="", flush=True)
+            streamed.append(text)
+            print(text, end="", flush=True)
+
+        try:
+            reply, stop = self.handle(user_input, on_text=print_token)
+        except asyncio.TimeoutError:
+            print("🤖 The model took too long to answer, please try again.")
+            continue
+        finally:
+            if streamed:
+                print()
+        if reply is not None:
+            print("🤖", reply)
+        if stop:
+            stats = self.router.stats()
+            print(f"⚡ {stats['fast_path']} of {stats['requests']} requests answered without the LLM")
+            break
 
 
 # ========== Registering Actions ==========
 
 registry = ActionRegistry()
-registry.register(Action("add_item", add_item, None))
-registry.register(Action("delete_item", delete_item, None))
-registry.register(Action("save_inventory", save_inventory, None))
-registry.register(Action("stop_agent", stop_agent, None))
-registry.register(Action("order_item", order_item,None))
-registry.register(Action("restock_alert_tool", restock_alert_tool, None))
+registry.register(Action(
+    "add_item", add_item,
+    description="Add an item to inventory",
+    parameters={
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "color": {"type": "string"},
+            "quantity": {"type": "integer"},
+            "category": {"type": "string"},
+            "brand": {"type": "string"},
+            "size": {"type": "string"},
+            "price": {"type": "number"}
+        },
+        "required": ["name", "color", "quantity", "category", "price"]
+    },
+))
+registry.register(Action(
+    "delete_item", delete_item,
+    description="Delete items by name and color",
+    parameters={
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "color": {"type": "string"}
+        },
+        "required": ["name", "color"]
+    },
+))
+registry.register(Action(
+    "save_inventory", save_inventory,
+    description="Save inventory to disk",
+    parameters={
+        "type": "object",
+        "properties": {}
+    },
+))
+registry.register(Action(
+    "stop_agent", stop_agent,
+    description="Stop the agent and show summary",
+    parameters={
+        "type": "object",
+        "properties": {}
+    },
+))
+registry.register(Action(
+    "order_item", order_item,
+    description="Sell items from stock: takes the quantity from the matching inventory item and records the order",
+    parameters={
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "description": "Name of the item"},
+            "color": {"type": "string", "description": "Color of the item"},
+            "quantity": {"type": "integer", "description": "How many items are ordered"},
+            "category": {"type": "string", "description": "Category like clothing, electronics etc"},
+            "price": {"type": "integer", "description": "Price of the item"},
+            "brand": {"type": "string", "description": "Brand name"},
+            "size": {"type": "string", "description": "Size of the item like small, medium, large"}
+        },
+        "required": ["name", "color", "quantity"]
+    },
+))
+registry.register(Action(
+    "restock_alert_tool", restock_alert_tool,
+    description="Check inventory for low stock",
+    parameters={
+        "type": "object",
+        "properties": {}
+    },
+    read_only=True,
+))
+registry.register(Action(
+    "bulk_import", bulk_import,
+    description="Import many items at once from a CSV, JSON or JSON-lines file",
+    parameters={
+        "type": "object",
+        "properties": {
+            "path": {"type": "string", "description": "Path of the file to import"}
+        },
+        "required": ["path"]
+    },
+))
+registry.register(Action(
+    "set_restock_threshold", set_restock_threshold,
+    description="Set the low-stock threshold for one item, a whole category, or the default",
+    parameters={
+        "type": "object",
+        "properties": {
+            "threshold": {"type": "integer", "description": "Alert when quantity drops below this"},
+            "category": {"type": "string", "description": "Apply to a whole category"},
+            "name": {"type": "string", "description": "Apply to one item"},
+            "color": {"type": "string", "description": "Color of the item when name is given"}
+        },
+        "required": ["threshold"]
+    },
+))
+registry.register(Action(
+    "find_items", find_items,
+    description="Look up items by a loose description (name, brand, color, category or size); tolerates typos and plurals",
+    parameters={
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "e.g. 'blue nike sneaker size 42'"},
+            "limit": {"type": "integer", "description": "Maximum number of items to return"}
+        },
+        "required": ["query"]
+    },
+    read_only=True,
+))
 
 
 
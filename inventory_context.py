@@ -0,0 +1,118 @@
+"""Question-specific inventory context for the assistant, fitted to a token budget."""
+
+from typing import Dict, List, Optional, Tuple
+
+from inventory_search import SearchIndex, tokenize
+from inventory_store import InventoryItem, InventoryStore
+
+DEFAULT_TOKEN_BUDGET = 600
+DEFAULT_TOP_K = 15
+LOW_STOCK_ROWS = 10
+# ~4 characters per token, the same estimate the agent memory and the mock LLM use
+CHARS_PER_TOKEN = 4
+
+# Question words that would only add noise to the search (tokenized like the index does)
+STOPWORDS = set(tokenize(
+    "a all an and any are at do does for from have how i in is it left many me much of on or our "
+    "show tell the there this to us we what which with you"
+))
+LOW_STOCK_WORDS = set(tokenize("low restock reorder running out short threshold"))
+ROW_HEADER = "id|name|color|brand|size|category|qty|price"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def format_row(item: InventoryItem) -> str:
+    return "|".join(str(v if v is not None else "") for v in (
+        item.id, item.name, item.color, item.brand, item.size, item.category, item.quantity, item.price))
+
+
+class ContextBuilder:
+    """
+    Builds the inventory facts a question needs, in at most ``token_budget`` tokens.
+
+    Every figure comes from something the store or the search index already
+    maintains: the overview from the running category totals, group totals from
+    the per-(color, name) counters, matching rows from the search index and
+    low-stock rows from the low-stock set. Building the context therefore
+    costs the same for ten items as for a million, and so does the prompt.
+
+    Sections are added most useful first (overview, totals for the groups the
+    question names, matching rows, low stock) and rows stop at the budget, with
+    a note saying how many were left out.
+    """
+
+    def __init__(self, store: InventoryStore, search: SearchIndex,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, top_k: int = DEFAULT_TOP_K):
+        self.store = store
+        self.search = search
+        self.token_budget = token_budget
+        self.top_k = top_k
+
+    def overview(self) -> str:
+        totals = self.store.category_totals()
+        units = sum(t["units"] for t in totals.values())
+        value = sum(t["value"] for t in totals.values())
+        return (f"{len(self.store)} items, {units} units, stock value Rs.{value:.0f} across "
+                f"{len(totals)} categories; {self.store.low_stock_count()} items below their restock threshold.")
+
+    def group_lines(self, matches: List[InventoryItem], words: List[str]) -> List[str]:
+        lines = []
+        groups: Dict[Tuple[str, Optional[str]], None] = {}
+        for item in matches:
+            groups[(item.name, item.color)] = None
+        for name, color in groups:
+            rows, units = self.store.group_totals(name, color)
+            label = " ".join(v for v in (color, name) if v)
+            lines.append(f"{label}: {units} units in {rows} items")
+
+        totals = self.store.category_totals()
+        wanted = set(words)
+        for category, t in totals.items():
+            if wanted.intersection(tokenize(category)):
+                lines.append(f"category {category}: {t['units']} units in {t['items']} items, "
+                             f"value Rs.{t['value']:.0f}")
+        return lines
+
+    def build(self, question: str) -> str:
+        """Context text for ``question``; empty when the inventory is empty."""
+        if not self.store:
+            return ""
+        words = [w for w in tokenize(question) if w not in STOPWORDS]
+        matches = self.search.search(" ".join(words), self.top_k) if words else []
+
+        budget = self.token_budget
+        lines: List[str] = []
+
+        def fits(line: str) -> bool:
+            nonlocal budget
+            cost = estimate_tokens(line) + 1  # the newline
+            if cost > budget:
+                return False
+            budget -= cost
+            lines.append(line)
+            return True
+
+        fits("Inventory: " + self.overview())
+
+        groups = self.group_lines(matches, words)
+        if groups and fits("Totals:"):
+            for line in groups:
+                if not fits("- " + line):
+                    break
+
+        for title, rows in (("Matching items", matches),
+                            ("Low stock", self.store.low_stock(limit=LOW_STOCK_ROWS)
+                             if LOW_STOCK_WORDS.intersection(words) else [])):
+            if not rows or not fits(f"{title} ({ROW_HEADER}):"):
+                continue
+            shown = 0
+            for item in rows:
+                if not fits(format_row(item)):
+                    break
+                shown += 1
+            if shown < len(rows):
+                fits(f"(+{len(rows) - shown} more not shown)")
+        return "\n".join(lines)
@@ -0,0 +1,242 @@
+"""SQLite persistence backend for InventoryStore."""
+
+import csv
+import json
+import operator
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from inventory_store import FIELDS, InventoryBackend, InventoryItem, InventoryStore
+from tracing import span
+
+DEFAULT_DB_PATH = "inventory.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    category TEXT,
+    price REAL,
+    size TEXT,
+    brand TEXT,
+    color TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_name ON items(name);
+CREATE INDEX IF NOT EXISTS idx_items_color ON items(color);
+CREATE INDEX IF NOT EXISTS idx_items_category ON items(category);
+CREATE INDEX IF NOT EXISTS idx_items_brand ON items(brand);
+CREATE INDEX IF NOT EXISTS idx_items_quantity ON items(quantity);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses the compiled form
+UPSERT_SQL = (
+    "INSERT INTO items (id, name, quantity, category, price, size, brand, color) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET name=excluded.name, quantity=excluded.quantity, "
+    "category=excluded.category, price=excluded.price, size=excluded.size, "
+    "brand=excluded.brand, color=excluded.color"
+)
+DELETE_SQL = "DELETE FROM items WHERE id = ?"
+SELECT_ALL_SQL = "SELECT id, name, quantity, category, price, size, brand, color FROM items ORDER BY id"
+row_tuple = operator.attrgetter(*FIELDS)
+
+
+class SqliteBackend(InventoryBackend):
+    """
+    Local SQLite database in WAL mode.
+
+    Changes are buffered and written as one transaction once ``batch_size``
+    changes are pending or when ``flush`` is called.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending_upserts: Dict[int, tuple] = {}
+        self._pending_deletes: Dict[int, None] = {}
+        # Streamlit runs each script rerun on its own thread
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(SELECT_ALL_SQL).fetchall()
+        for row in rows:
+            yield dict(zip(FIELDS, row))
+
+    def upsert(self, item: InventoryItem):
+        with self._lock:
+            self._pending_deletes.pop(item.id, None)
+            self._pending_upserts[item.id] = tuple(getattr(item, f) for f in FIELDS)
+            full = len(self._pending_upserts) + len(self._pending_deletes) >= self.batch_size
+        if full:
+            self.flush()
+
+    def delete(self, item_id: int):
+        with self._lock:
+            self._pending_upserts.pop(item_id, None)
+            self._pending_deletes[item_id] = None
+            full = len(self._pending_upserts) + len(self._pending_deletes) >= self.batch_size
+        if full:
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._pending_upserts.clear()
+            self._pending_deletes.clear()
+            self._conn.execute("DELETE FROM items")
+
+    def upsert_many(self, items: List[InventoryItem]):
+        # Straight to one executemany; buffered changes are written first so order is kept
+        with span("store.flush", backend="sqlite"):
+            self.write_rows([row_tuple(item) for item in items])
+
+    def flush(self):
+        with self._lock:
+            if not self._pending_upserts and not self._pending_deletes:
+                return
+            upserts = list(self._pending_upserts.values())
+            deletes = [(i,) for i in self._pending_deletes]
+            self._pending_upserts.clear()
+            self._pending_deletes.clear()
+            with span("store.flush", backend="sqlite"):
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(UPSERT_SQL, upserts)
+                    self._conn.executemany(DELETE_SQL, deletes)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    @contextmanager
+    def batch(self, batch_size: int = 50_000):
+        """Temporarily raise the batch size, e.g. for a bulk import on a write-through store."""
+        previous = self.batch_size
+        self.batch_size = max(previous, batch_size)
+        try:
+            yield
+        finally:
+            self.batch_size = previous
+            self.flush()
+
+    def write_rows(self, rows: List[tuple]):
+        """Upsert already-normalized row tuples in a single transaction."""
+        self.flush()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(UPSERT_SQL, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load_thresholds(self) -> Dict[str, Any]:
+        saved = self.get_meta("thresholds")
+        return json.loads(saved) if saved else {}
+
+    def save_thresholds(self, thresholds: Dict[str, Any]):
+        self.set_meta("thresholds", json.dumps(thresholds))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value),
+            )
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM items LIMIT 1").fetchone() is None
+
+
+# ========== Legacy inventory.json / inventory.csv import ==========
+
+def read_legacy_records(json_path: str = "inventory.json", csv_path: str = "inventory.csv") -> List[Dict[str, Any]]:
+    """Read rows from the old full-dump files, preferring JSON over CSV."""
+    if os.path.exists(json_path):
+        with open(json_path, "r") as f:
+            return json.load(f)
+    if os.path.exists(csv_path):
+        with open(csv_path, "r", newline="") as f:
+            return list(csv.DictReader(f))
+    return []
+
+
+def _normalize_record(record: Dict[str, Any], item_id: int) -> tuple:
+    def text(value):
+        # CSV gives "" and pandas gives NaN for missing cells
+        if value is None or value == "" or value != value:
+            return None
+        return str(value)
+
+    return (
+        item_id,
+        text(record.get("name")) or "",
+        int(float(record.get("quantity") or 0)),
+        text(record.get("category")),
+        float(record.get("price") or 0),
+        text(record.get("size")),
+        text(record.get("brand")),
+        text(record.get("color")),
+    )
+
+
+def import_legacy(backend: SqliteBackend, json_path: str = "inventory.json",
+                  csv_path: str = "inventory.csv") -> int:
+    """
+    One-time import of the old inventory files into the database.
+
+    Rows keep their ``id`` when present. Returns the number of rows imported,
+    or 0 if the import already ran.
+    """
+    if backend.get_meta("legacy_imported"):
+        return 0
+
+    records = read_legacy_records(json_path, csv_path)
+    explicit_ids = [int(r["id"]) for r in records if r.get("id") not in (None, "")]
+    next_id = max(explicit_ids, default=0) + 1
+    rows = []
+    for record in records:
+        raw_id = record.get("id")
+        if raw_id not in (None, ""):
+            item_id = int(raw_id)
+        else:
+            item_id = next_id
+            next_id += 1
+        rows.append(_normalize_record(record, item_id))
+
+    backend.write_rows(rows)
+    backend.set_meta("legacy_imported", "1")
+    return len(rows)
+
+
+def open_store(path: str = DEFAULT_DB_PATH, json_path: str = "inventory.json",
+               csv_path: str = "inventory.csv", batch_size: int = 500) -> InventoryStore:
+    """Open the SQLite-backed store, pulling in the old JSON/CSV files on first use."""
+    backend = SqliteBackend(path, batch_size=batch_size)
+    if backend.is_empty():
+        import_legacy(backend, json_path, csv_path)
+    return InventoryStore(backend=backend)
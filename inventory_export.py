@@ -0,0 +1,167 @@
+"""Chunked inventory exporters: CSV, newline-delimited JSON and a compressed columnar format."""
+
+import csv
+import functools
+import importlib.util
+import io
+import json
+import tempfile
+import zlib
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from inventory_store import FIELDS, InventoryItem
+from tracing import span
+
+DEFAULT_CHUNK_SIZE = 5_000
+
+
+def _chunks(items: Iterable[InventoryItem], chunk_size: int) -> Iterator[List[InventoryItem]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_csv(items: Iterable[InventoryItem], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """CSV with a header row, one encoded chunk per ``chunk_size`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDS)
+    for chunk in _chunks(items, chunk_size):
+        writer.writerows([getattr(item, f) for f in FIELDS] for item in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        # Header only: the inventory was empty
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(items: Iterable[InventoryItem], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """One JSON object per line."""
+    for chunk in _chunks(items, chunk_size):
+        lines = "".join(json.dumps(item.to_dict()) + "\n" for item in chunk)
+        yield lines.encode("utf-8")
+
+
+def iter_csv_gzip(items: Iterable[InventoryItem], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Gzip-compressed CSV, compressed as it is produced."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for data in iter_csv(items, chunk_size):
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _DrainableSink:
+    """Write-only file object whose contents can be taken out between row groups."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_parquet(items: Iterable[InventoryItem], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Parquet file written one row group per chunk. Needs pyarrow."""
+    # Imported here rather than at module load: pyarrow is optional and slow to import
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet export") from None
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("quantity", pa.int64()),
+        ("category", pa.string()),
+        ("price", pa.float64()),
+        ("size", pa.string()),
+        ("brand", pa.string()),
+        ("color", pa.string()),
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for chunk in _chunks(items, chunk_size):
+            columns = {f: [getattr(item, f) for item in chunk] for f in FIELDS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+@functools.lru_cache(maxsize=None)
+def columnar_format() -> str:
+    """The compressed columnar format available here: Parquet with pyarrow, gzip CSV without."""
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "csv.gz"
+
+
+EXPORTERS = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+    "csv.gz": iter_csv_gzip,
+    "parquet": iter_parquet,
+}
+
+EXPORT_FORMATS: Dict[str, Dict[str, str]] = {
+    "csv": {"label": "CSV", "file_name": "inventory.csv", "mime": "text/csv"},
+    "ndjson": {"label": "JSON (one object per line)", "file_name": "inventory.ndjson", "mime": "application/x-ndjson"},
+    "csv.gz": {"label": "Gzip CSV", "file_name": "inventory.csv.gz", "mime": "application/gzip"},
+    "parquet": {"label": "Parquet", "file_name": "inventory.parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def export_chunks(items: Iterable[InventoryItem], fmt: str,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encoded export of ``items`` in ``fmt``, produced ``chunk_size`` rows at a time."""
+    try:
+        exporter = EXPORTERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown export format: {fmt}") from None
+    return exporter(items, chunk_size)
+
+
+def export_to_file(items: Iterable[InventoryItem], fmt: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Spool an export to a temporary file and return it rewound.
+
+    Only one chunk is held in memory at a time; the caller owns the file.
+    Iterating an InventoryStore yields a snapshot of its rows, so sessions
+    editing the store meanwhile do not disturb the export.
+    """
+    spool = tempfile.TemporaryFile()
+    with span("export", format=fmt):
+        for data in export_chunks(items, fmt, chunk_size):
+            spool.write(data)
+    spool.seek(0)
+    return spool
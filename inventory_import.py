@@ -0,0 +1,157 @@
+"""Bulk import of CSV/JSON inventory files with column-wise validation and duplicate merging."""
+
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from inventory_store import InventoryStore
+
+DEFAULT_CHUNK_SIZE = 100_000
+MERGE_KEY = ["name", "color", "size", "brand"]
+TEXT_COLUMNS = ["name", "color", "category", "brand", "size"]
+
+
+def detect_format(file_name: str) -> str:
+    """'csv', 'ndjson' or 'json' from a file name."""
+    lower = file_name.lower()
+    if lower.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if lower.endswith(".json"):
+        return "json"
+    return "csv"
+
+
+def read_chunks(source, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read ``source`` (a path or file object) as DataFrames of at most ``chunk_size`` rows."""
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    elif fmt == "ndjson":
+        yield from pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False)
+    elif fmt == "json":
+        # A JSON array has to be parsed whole; slice it so the rest of the pipeline stays chunked
+        frame = pd.read_json(source, orient="records", dtype=False)
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+def normalize_text(frame: pd.DataFrame, columns) -> None:
+    """Strip and lowercase ``columns`` in place (missing ones are added empty); a missing size becomes "N/A"."""
+    for column in columns:
+        if column not in frame:
+            frame[column] = ""
+        frame[column] = frame[column].fillna("").astype(str).str.strip().str.lower()
+    if "size" in columns:
+        frame["size"] = frame["size"].mask(frame["size"].isin(["", "nan", "none", "n/a"]), "N/A")
+
+
+def normalize_frame(frame: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """
+    Clean one chunk with column operations only.
+
+    Text columns are stripped and lowercased, a missing size becomes "N/A",
+    quantity and price are coerced to numbers. Rows without a name or with a
+    non-numeric or negative quantity/price are dropped; their count is returned.
+    """
+    frame = frame.copy()
+    normalize_text(frame, TEXT_COLUMNS)
+
+    if "quantity" not in frame:
+        frame["quantity"] = None
+    if "price" not in frame:
+        frame["price"] = 0
+    quantity = pd.to_numeric(frame["quantity"], errors="coerce")
+    price = pd.to_numeric(frame["price"], errors="coerce")
+    frame["quantity"] = quantity
+    frame["price"] = price
+
+    valid = (frame["name"] != "") & quantity.notna() & (quantity >= 0) & price.notna() & (price >= 0)
+    frame = frame.loc[valid, TEXT_COLUMNS + ["quantity", "price"]]
+    frame["quantity"] = frame["quantity"].astype("int64")
+    frame["price"] = frame["price"].astype("float64")
+    return frame, int((~valid).sum())
+
+
+def merge_duplicates(frame: pd.DataFrame) -> pd.DataFrame:
+    """Collapse rows sharing (name, color, size, brand): quantities add up, the last price wins."""
+    return frame.groupby(MERGE_KEY, sort=False, as_index=False).agg(
+        quantity=("quantity", "sum"),
+        price=("price", "last"),
+        category=("category", "first"),
+    )
+
+
+def bulk_import(store: InventoryStore, source, file_name: Optional[str] = None,
+                fmt: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Load a large inventory file into ``store``.
+
+    Each chunk is validated and de-duplicated as a whole, so memory is bounded by
+    the chunk size plus the number of distinct items. Items already in the store
+    with the same (name, color, size, brand) have their quantity increased.
+    """
+    if fmt is None:
+        fmt = detect_format(file_name or (source if isinstance(source, str) else ""))
+
+    rows_read = 0
+    rejected = 0
+    merged_chunks = []
+    for chunk in read_chunks(source, fmt, chunk_size):
+        rows_read += len(chunk)
+        clean, bad = normalize_frame(chunk)
+        rejected += bad
+        merged_chunks.append(merge_duplicates(clean))
+
+    if not merged_chunks:
+        return {"rows_read": 0, "rejected": 0, "added": 0, "restocked": 0}
+    merged = merge_duplicates(pd.concat(merged_chunks, ignore_index=True))
+
+    # Held for the whole write so rows matched below cannot change before they are updated
+    with store.transaction():
+        joined = match_existing(store, merged)
+        found = joined["id"].notna()
+        restock = joined[found]
+        new = joined[~found]
+        store.update_many(
+            (int(item_id), {"quantity": int(current) + int(quantity), "price": float(price)})
+            for item_id, current, quantity, price in zip(
+                *(restock[c].tolist() for c in ("id", "current_quantity", "quantity", "price")))
+        )
+        # Plain Python lists: walking pandas rows one by one would cost more than the insert
+        store.add_many(
+            {"name": name, "quantity": int(quantity), "category": category,
+             "price": float(price), "size": size, "brand": brand, "color": color}
+            for name, quantity, category, price, size, brand, color in zip(
+                *(new[c].tolist() for c in ("name", "quantity", "category", "price", "size", "brand", "color")))
+        )
+
+    return {"rows_read": rows_read, "rejected": rejected, "added": len(new), "restocked": len(restock)}
+
+
+def match_existing(store: InventoryStore, merged: pd.DataFrame) -> pd.DataFrame:
+    """
+    ``merged`` with the ``id`` and ``current_quantity`` of the store row sharing its
+    (name, color, size, brand), or NaN where the item is new.
+
+    One frame join instead of a store lookup per imported row; when the store
+    holds several rows with the same key the first one is restocked. Store rows
+    may come from the Add tab or the agent with capitals, spaces or no brand and
+    size, so their key columns are normalized the same way as the import first.
+    """
+    names = set(merged["name"])
+    existing = pd.DataFrame(
+        [(item.id, item.quantity, item.name, item.color, item.size, item.brand)
+         for item in store if str(item.name).strip().lower() in names],
+        columns=["id", "current_quantity"] + MERGE_KEY,
+    )
+    normalize_text(existing, MERGE_KEY)
+    return merged.merge(existing.drop_duplicates(MERGE_KEY), on=MERGE_KEY, how="left")
+
+
+def bulk_import_file(store: InventoryStore, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """Same as bulk_import for a path on disk."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return bulk_import(store, path, file_name=path, chunk_size=chunk_size)
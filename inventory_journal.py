@@ -0,0 +1,163 @@
+"""Append-only JSONL change journal with periodic snapshot compaction."""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List
+
+from inventory_store import FIELDS, InventoryBackend, InventoryItem, InventoryStore
+from tracing import span
+
+DEFAULT_SNAPSHOT_PATH = "inventory.json"
+DEFAULT_JOURNAL_PATH = "inventory.journal.jsonl"
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Entries of a JSON-lines log, repairing a torn last line.
+
+    A crash mid-append can leave a partial line at the end; everything before
+    it is intact. The file is cut back to the last whole entry once reading
+    stops there, because the next append would otherwise land after the
+    fragment and be skipped on every later replay.
+    """
+    good = 0
+    missing_newline = False
+    with open(path, "rb") as f:
+        for raw in f:
+            if raw.strip():
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break
+                yield entry
+                missing_newline = not raw.endswith(b"\n")
+            good += len(raw)
+        torn = f.tell() != good
+    if torn or missing_newline:
+        with open(path, "r+b") as f:
+            f.truncate(good)
+            if missing_newline:
+                f.seek(good)
+                f.write(b"\n")
+
+
+class JournalBackend(InventoryBackend):
+    """
+    Persist changes as one JSON line each instead of rewriting the whole inventory.
+
+    The snapshot keeps the old inventory.json layout (a list of row dicts), so
+    files written before the journal existed load unchanged. Once the journal
+    holds ``compact_every`` entries it is folded into a fresh snapshot.
+    Restock thresholds are journal entries too; the latest one wins and is
+    carried over into the fresh journal on compaction, since the snapshot
+    only holds rows.
+    """
+
+    def __init__(self, snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+                 journal_path: str = DEFAULT_JOURNAL_PATH,
+                 compact_every: int = 10_000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._thresholds: Dict[str, Any] = {}
+        self._journal_entries = self._count_journal_entries()
+
+    def _count_journal_entries(self) -> int:
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, "r") as f:
+            return sum(1 for line in f if line.strip())
+
+    def _replay(self) -> Dict[int, Dict[str, Any]]:
+        rows: Dict[int, Dict[str, Any]] = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                for i, record in enumerate(json.load(f), start=1):
+                    # Legacy dumps have no id column; number them in file order
+                    record.setdefault("id", i)
+                    rows[record["id"]] = {f: record.get(f) for f in FIELDS}
+        if os.path.exists(self.journal_path):
+            for entry in read_jsonl(self.journal_path):
+                op = entry["op"]
+                if op == "upsert":
+                    rows[entry["row"]["id"]] = entry["row"]
+                elif op == "delete":
+                    rows.pop(entry["id"], None)
+                elif op == "clear":
+                    rows.clear()
+                elif op == "thresholds":
+                    self._thresholds = entry["thresholds"]
+        return rows
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._replay()
+        return iter(rows.values())
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._pending.append(json.dumps(entry))
+
+    def upsert(self, item: InventoryItem):
+        self._append({"op": "upsert", "row": item.to_dict()})
+
+    def delete(self, item_id: int):
+        self._append({"op": "delete", "id": item_id})
+
+    def clear(self):
+        self._append({"op": "clear"})
+
+    def load_thresholds(self) -> Dict[str, Any]:
+        # Filled in by the replay in load(), which the store runs first
+        with self._lock:
+            return dict(self._thresholds)
+
+    def save_thresholds(self, thresholds: Dict[str, Any]):
+        with self._lock:
+            self._thresholds = thresholds
+            self._pending.append(json.dumps({"op": "thresholds", "thresholds": thresholds}))
+
+    def flush(self):
+        """Append buffered changes to the journal, compacting when it has grown large."""
+        with self._lock:
+            if self._pending:
+                with span("store.flush", backend="journal"), open(self.journal_path, "a") as f:
+                    f.write("\n".join(self._pending) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_entries += len(self._pending)
+                self._pending.clear()
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and start an empty journal."""
+        self.flush()
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        with span("store.compact", backend="journal"):
+            rows = list(self._replay().values())
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(rows, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            # Snapshot first, then drop the journal: a crash in between only replays already-applied entries
+            os.replace(tmp_path, self.snapshot_path)
+            with open(self.journal_path, "w") as f:
+                if self._thresholds:
+                    f.write(json.dumps({"op": "thresholds", "thresholds": self._thresholds}) + "\n")
+            self._journal_entries = 1 if self._thresholds else 0
+
+
+def open_journal_store(snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+                       journal_path: str = DEFAULT_JOURNAL_PATH,
+                       compact_every: int = 10_000, default_threshold: int = 5) -> InventoryStore:
+    """Load the snapshot plus journal tail into a store that journals its changes."""
+    return InventoryStore(backend=JournalBackend(snapshot_path, journal_path, compact_every),
+                          default_threshold=default_threshold)
@@ -0,0 +1,349 @@
+"""Order book with running totals, and an order engine with stock reservations and an append-only ledger."""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from inventory_journal import read_jsonl
+from inventory_store import InventoryStore
+from tracing import span
+
+INVOICE_PAGE_SIZE = 50
+DEFAULT_LEDGER_PATH = "orders.ledger.jsonl"
+# Seconds a reservation holds stock before it lapses
+RESERVATION_TTL = 900.0
+
+
+class OrderBook:
+    """
+    Orders in the order they were placed.
+
+    Each order's invoice line and its contribution to the total are computed once,
+    when the order is added, so invoices and totals never re-walk the book.
+    """
+
+    def __init__(self):
+        self._orders: List[Dict[str, Any]] = []
+        self._lines: List[str] = []
+        self.total_amount = 0
+        self.total_units = 0
+
+    @staticmethod
+    def format_line(order: Dict[str, Any]) -> str:
+        return (
+            f"- {order['quantity']} {order['size']} {order['name']}(s) of brand {order['brand']} "
+            f"at Rs.{order['price']} each → Rs.{(order['price'] or 0) * order['quantity']}"
+        )
+
+    def append(self, order: Dict[str, Any]):
+        # Items added without a price count as 0, as in OrderEngine's order total
+        self._orders.append(order)
+        self._lines.append(self.format_line(order))
+        self.total_amount += (order["price"] or 0) * order["quantity"]
+        self.total_units += order["quantity"]
+
+    def clear(self):
+        self.__init__()
+
+    def page_count(self, page_size: int = INVOICE_PAGE_SIZE) -> int:
+        return max((len(self._lines) + page_size - 1) // page_size, 1)
+
+    def invoice(self, page: Optional[int] = None, page_size: int = INVOICE_PAGE_SIZE) -> str:
+        """
+        Invoice text with the running total.
+
+        With ``page`` (0-based) only that slice of lines is rendered, so large
+        order books can be shown a page at a time.
+        """
+        if page is None:
+            lines = self._lines
+        else:
+            lines = self._lines[page * page_size:(page + 1) * page_size]
+        invoice_text = "\n".join(lines)
+        if page is not None and self.page_count(page_size) > 1:
+            invoice_text += f"\n(page {page + 1} of {self.page_count(page_size)})"
+        invoice_text += f"\n🧾 Total: Rs.{self.total_amount}"
+        return invoice_text
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._orders)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+
+class OrderError(ValueError):
+    """An order or reservation that cannot be applied; ``problems`` has one message per bad line."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+class Reservation:
+    __slots__ = ("id", "lines", "expires_at")
+
+    def __init__(self, id: str, lines: Dict[int, int], expires_at: float):
+        self.id = id
+        self.lines = lines
+        self.expires_at = expires_at
+
+    def __repr__(self) -> str:
+        return f"Reservation({self.id!r}, {self.lines}, expires_at={self.expires_at:.0f})"
+
+
+OrderLines = Union[Dict[int, int], Iterable[Tuple[int, int]]]
+
+
+class OrderLedger:
+    """
+    Append-only JSON-lines record of order events.
+
+    Lines are written and handed to the OS as each event happens, so a crashed
+    process loses nothing; ``sync()`` (called on close) also forces them to
+    disk. A torn last line is ignored on replay, as in the inventory journal.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return
+        # Cuts a torn last line off, so appends made from here on replay after a restart
+        yield from read_jsonl(self.path)
+
+    def append(self, event: Dict[str, Any]):
+        if self._file is None:
+            return
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def sync(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+class OrderEngine:
+    """
+    Multi-line orders applied all-or-nothing against the store.
+
+    Every line is checked first (the item exists, the quantity is positive and
+    enough stock is available) while the store is held in a transaction, and
+    stock is only taken once all of them pass, so an order never half-applies.
+    Each line touches one row by id; nothing scans the inventory.
+
+    ``reserve`` holds stock for a while without taking it: held units stop
+    counting as available to other orders until the reservation is committed,
+    released or expires. Expired holds are dropped lazily, cheapest first,
+    on the next engine call. Holds live in memory only; the ledger records
+    every reservation, commit, release and expiry, and committed orders are
+    replayed from it into the order book on start.
+    """
+
+    def __init__(self, store: InventoryStore, ledger_path: Optional[str] = DEFAULT_LEDGER_PATH,
+                 reservation_ttl: float = RESERVATION_TTL):
+        self.store = store
+        self.reservation_ttl = reservation_ttl
+        self.book = OrderBook()
+        self.ledger = OrderLedger(ledger_path)
+        self._orders: List[Dict[str, Any]] = []
+        self._reservations: Dict[str, Reservation] = {}
+        self._held: Dict[int, int] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._ids = itertools.count(1)
+        self._replay()
+
+    def _replay(self):
+        last_id = 0
+        for event in self.ledger.replay():
+            if event["event"] == "commit":
+                self._record(event["order"])
+            elif event["event"] == "clear":
+                self._orders.clear()
+                self.book.clear()
+            last_id = max(last_id, event.get("seq", 0))
+        self._ids = itertools.count(last_id + 1)
+
+    def _record(self, order: Dict[str, Any]):
+        self._orders.append(order)
+        for line in order["lines"]:
+            self.book.append(line)
+
+    def _log(self, event: str, **fields) -> int:
+        seq = next(self._ids)
+        self.ledger.append({"event": event, "seq": seq, "at": time.time(), **fields})
+        return seq
+
+    # ---------- holds ----------
+
+    @staticmethod
+    def _normalize(lines: OrderLines) -> Dict[int, int]:
+        merged: Dict[int, int] = {}
+        for item_id, quantity in (lines.items() if isinstance(lines, dict) else lines):
+            merged[int(item_id)] = merged.get(int(item_id), 0) + int(quantity)
+        return merged
+
+    def _expire(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, reservation_id = heapq.heappop(self._expiry)
+            reservation = self._reservations.get(reservation_id)
+            if reservation is not None and reservation.expires_at <= now:
+                self._drop(reservation)
+                self._log("expire", reservation=reservation_id)
+
+    def _drop(self, reservation: Reservation):
+        del self._reservations[reservation.id]
+        for item_id, quantity in reservation.lines.items():
+            left = self._held[item_id] - quantity
+            if left:
+                self._held[item_id] = left
+            else:
+                del self._held[item_id]
+
+    def _check(self, lines: Dict[int, int], own: Optional[Reservation] = None) -> List[str]:
+        if not lines:
+            return ["The order has no lines."]
+        problems = []
+        for item_id, quantity in lines.items():
+            item = self.store.get(item_id)
+            if item is None:
+                problems.append(f"Item #{item_id} does not exist.")
+                continue
+            if quantity <= 0:
+                problems.append(f"Quantity for #{item_id} {item.name} must be positive.")
+                continue
+            available = item.quantity - self._held.get(item_id, 0)
+            if own is not None:
+                available += own.lines.get(item_id, 0)
+            if quantity > available:
+                problems.append(f"Only {max(available, 0)} of #{item_id} {item.color or ''} {item.name} "
+                                f"available, {quantity} requested.")
+        return problems
+
+    def available(self, item_id: int) -> int:
+        """Stock of a row minus the units held by open reservations."""
+        with self.store.transaction():
+            self._expire(time.time())
+            item = self.store.get(item_id)
+            return 0 if item is None else item.quantity - self._held.get(item_id, 0)
+
+    def reserve(self, lines: OrderLines, ttl: Optional[float] = None) -> Reservation:
+        """Hold stock for every line, or raise OrderError and hold nothing."""
+        lines = self._normalize(lines)
+        with self.store.transaction():
+            now = time.time()
+            self._expire(now)
+            problems = self._check(lines)
+            if problems:
+                raise OrderError(problems)
+            seq = next(self._ids)
+            reservation_id = f"R{seq}"
+            reservation = Reservation(reservation_id, lines, now + (self.reservation_ttl if ttl is None else ttl))
+            self._reservations[reservation_id] = reservation
+            for item_id, quantity in lines.items():
+                self._held[item_id] = self._held.get(item_id, 0) + quantity
+            heapq.heappush(self._expiry, (reservation.expires_at, reservation_id))
+            self.ledger.append({"event": "reserve", "seq": seq, "at": now, "reservation": reservation_id,
+                                "expires_at": reservation.expires_at,
+                                "lines": [[item_id, quantity] for item_id, quantity in lines.items()]})
+            return reservation
+
+    def release(self, reservation_id: str) -> bool:
+        """Give held stock back. False if the reservation already ended."""
+        with self.store.transaction():
+            self._expire(time.time())
+            reservation = self._reservations.get(reservation_id)
+            if reservation is None:
+                return False
+            self._drop(reservation)
+            self._log("release", reservation=reservation_id)
+            return True
+
+    # ---------- orders ----------
+
+    def _apply(self, lines: Dict[int, int], reservation: Optional[Reservation]) -> Dict[str, Any]:
+        problems = self._check(lines, own=reservation)
+        if problems:
+            raise OrderError(problems)
+        if reservation is not None:
+            self._drop(reservation)
+
+        order_lines = []
+        for item_id, quantity in lines.items():
+            item = self.store.adjust_quantity(item_id, -quantity)
+            order_lines.append({
+                "item_id": item_id, "name": item.name, "color": item.color, "size": item.size,
+                "brand": item.brand, "category": item.category, "price": item.price, "quantity": quantity,
+            })
+        seq = next(self._ids)
+        order = {
+            "order_id": f"O{seq}",
+            "created_at": time.time(),
+            "reservation": reservation.id if reservation is not None else None,
+            "lines": order_lines,
+            "total": sum((line["price"] or 0) * line["quantity"] for line in order_lines),
+        }
+        self.ledger.append({"event": "commit", "seq": seq, "at": order["created_at"], "order": order})
+        self._record(order)
+        return order
+
+    def commit(self, reservation_id: str) -> Dict[str, Any]:
+        """Turn a reservation into an order, taking the held stock."""
+        with span("orders.commit"), self.store.transaction():
+            self._expire(time.time())
+            reservation = self._reservations.get(reservation_id)
+            if reservation is None:
+                raise OrderError([f"Reservation {reservation_id} has expired or was already used."])
+            return self._apply(reservation.lines, reservation)
+
+    def place(self, lines: OrderLines) -> Dict[str, Any]:
+        """Validate and apply an order in one step; raises OrderError if any line fails."""
+        lines = self._normalize(lines)
+        with span("orders.place"), self.store.transaction():
+            self._expire(time.time())
+            return self._apply(lines, None)
+
+    def invoice(self, page: Optional[int] = None, page_size: int = INVOICE_PAGE_SIZE) -> str:
+        return self.book.invoice(page, page_size)
+
+    def reservations(self) -> List[Reservation]:
+        with self.store.transaction():
+            self._expire(time.time())
+            return list(self._reservations.values())
+
+    def clear(self):
+        """Forget the session's orders and holds; the ledger keeps them, after a clear marker."""
+        with self.store.transaction():
+            self._reservations.clear()
+            self._held.clear()
+            self._expiry.clear()
+            self._orders.clear()
+            self.book.clear()
+            self._log("clear")
+
+    def close(self):
+        self.ledger.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._orders))
+
+    def __len__(self) -> int:
+        return len(self._orders)
@@ -0,0 +1,286 @@
+"""Token and trigram search index resolving free-text item references to inventory rows."""
+
+import heapq
+import re
+import threading
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+
+from intent_router import singular
+from inventory_store import InventoryItem, InventoryStore
+
+TEXT_FIELDS = ("name", "brand", "color", "category", "size")
+MIN_SIMILARITY = 0.5
+# Most known tokens a misspelt word is compared against
+MAX_EXPANSION_CANDIDATES = 1000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> List[str]:
+    """'Blue Nike Sneakers' -> ['blue', 'nike', 'sneaker']."""
+    if text is None:
+        return []
+    return [singular(token) for token in _TOKEN_RE.findall(str(text).lower())]
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TokenIndex:
+    """Postings and trigram maps. A full build fills a fresh one off to the side, then swaps it in."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, None]] = {}
+        self.trigrams: Dict[str, Dict[str, None]] = {}
+        self.item_tokens: Dict[int, Tuple[str, ...]] = {}
+        self.expansions: Dict[str, Dict[str, float]] = {}
+
+    def _add_token(self, token: str):
+        self.postings[token] = {}
+        for gram in trigrams(token):
+            self.trigrams.setdefault(gram, {})[token] = None
+        self.expansions.clear()
+
+    def _remove_token(self, token: str):
+        del self.postings[token]
+        for gram in trigrams(token):
+            bucket = self.trigrams.get(gram)
+            if bucket is not None:
+                bucket.pop(token, None)
+                if not bucket:
+                    del self.trigrams[gram]
+        self.expansions.clear()
+
+    def unindex(self, item_id: int):
+        for token in self.item_tokens.pop(item_id, ()):
+            postings = self.postings[token]
+            postings.pop(item_id, None)
+            if not postings:
+                self._remove_token(token)
+
+    def index(self, item: InventoryItem):
+        tokens = tuple(sorted({t for field in TEXT_FIELDS for t in tokenize(getattr(item, field))}))
+        if self.item_tokens.get(item.id) == tokens:
+            return  # e.g. a restock: quantity changed, text did not
+        self.unindex(item.id)
+        for token in tokens:
+            if token not in self.postings:
+                self._add_token(token)
+            self.postings[token][item.id] = None
+        self.item_tokens[item.id] = tokens
+
+    def apply(self, store: InventoryStore, item_ids: List[int]):
+        # Rows are read as they are now, so applying the same ids twice is harmless
+        for item_id in item_ids:
+            item = store.get(item_id)
+            if item is None:
+                self.unindex(item_id)
+            else:
+                self.index(item)
+
+
+class SearchIndex:
+    """
+    Inverted index over name, brand, color, category and size.
+
+    Tokens map to the ids of the rows containing them; a second index maps
+    trigrams to tokens, so a misspelt or partial word is expanded to the known
+    tokens it resembles before any rows are touched.
+
+    The index subscribes to the store and re-indexes each changed row as it is
+    written, so searches never wait for a catch-up and no number of changes
+    forces a rebuild. The initial build runs on a background thread (from a
+    store snapshot, without holding up writers); changes made meanwhile are
+    queued and applied before the new index is swapped in. Searches issued
+    before then wait for it.
+    """
+
+    def __init__(self, store: InventoryStore, background: bool = True):
+        self.store = store
+        self._lock = threading.RLock()
+        self._tokens = _TokenIndex()
+        # Changes seen while the initial build runs; None once it is in place
+        self._pending: Optional[List[Optional[List[int]]]] = []
+        self._ready = threading.Event()
+        store.subscribe(self._on_change)
+        if background:
+            threading.Thread(target=self._build, name="search-index-build", daemon=True).start()
+        else:
+            self._build()
+
+    # ---------- maintenance ----------
+
+    def _on_change(self, item_ids: Optional[List[int]]):
+        # Runs on the writer's thread with the store locked; never calls back into locked store methods
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(item_ids)
+            elif item_ids is None:
+                self._tokens = _TokenIndex()
+            else:
+                self._tokens.apply(self.store, item_ids)
+
+    def _build(self):
+        try:
+            # Tokenizing happens outside the index lock, so writers are not held up meanwhile
+            _, items = self.store.snapshot()
+            fresh = _TokenIndex()
+            for item in items:
+                fresh.index(item)
+            with self._lock:
+                for item_ids in self._pending:
+                    if item_ids is None:
+                        fresh = _TokenIndex()  # a clear: everything still in the store came after it
+                    else:
+                        fresh.apply(self.store, item_ids)
+                self._tokens = fresh
+                self._pending = None
+        finally:
+            self._ready.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initial build is in place; False if ``timeout`` ran out first."""
+        return self._ready.wait(timeout)
+
+    def close(self):
+        self.store.unsubscribe(self._on_change)
+
+    # ---------- lookup ----------
+
+    def expand(self, token: str) -> Dict[str, float]:
+        """Known tokens resembling ``token``, with a similarity in (0, 1]."""
+        tokens = self._tokens
+        if token in tokens.postings:
+            return {token: 1.0}
+        cached = tokens.expansions.get(token)
+        if cached is not None:
+            return cached
+
+        # Candidates come from the word's rarest trigrams first and stop at
+        # MAX_EXPANSION_CANDIDATES. A close match shares most of the word's
+        # trigrams, rare ones included, so it is found without walking the
+        # buckets of common trigrams ("  s", "er ") that hold a large part of
+        # the vocabulary.
+        grams = trigrams(token)
+        buckets = sorted((tokens.trigrams.get(gram, {}) for gram in grams), key=len)
+        candidates: Dict[str, None] = {}
+        for bucket in buckets:
+            candidates.update(dict.fromkeys(islice(bucket, MAX_EXPANSION_CANDIDATES - len(candidates))))
+            if len(candidates) >= MAX_EXPANSION_CANDIDATES:
+                break
+
+        expansion = {}
+        for candidate in candidates:
+            # Dice coefficient over trigram sets; a candidate the word is a prefix of scores high
+            candidate_grams = trigrams(candidate)
+            similarity = 2 * len(grams & candidate_grams) / (len(grams) + len(candidate_grams))
+            if len(token) >= 3 and candidate.startswith(token):
+                similarity = max(similarity, 0.9)
+            if similarity >= MIN_SIMILARITY:
+                expansion[candidate] = similarity
+        tokens.expansions[token] = expansion
+        return expansion
+
+    def _matches(self, expansion: Dict[str, float]) -> List[Tuple[Dict[int, None], float]]:
+        postings = self._tokens.postings
+        return [(postings[token], weight) for token, weight in expansion.items()]
+
+    @staticmethod
+    def _best_weight(item_id: int, matches) -> float:
+        return max((weight for postings, weight in matches if item_id in postings), default=0.0)
+
+    def search_scored(self, text: str, limit: int = 10) -> List[Tuple[float, bool, InventoryItem]]:
+        """
+        (score, matched every word, row) for the best ``limit`` rows.
+
+        Words are intersected rarest first. A word no remaining row shares is
+        skipped, so a partly wrong reference still finds the rows that match the
+        rest, with ``matched every word`` False.
+        """
+        self._ready.wait()
+        words = list(dict.fromkeys(tokenize(text)))
+        if not words:
+            return []
+
+        with self._lock:
+            per_word = [self._matches(self.expand(word)) for word in words]
+            per_word = [m for m in per_word if m]
+            if not per_word:
+                return []
+            # Start from the rarest word so the intersection walks the fewest ids
+            per_word.sort(key=lambda matches: sum(len(p) for p, _ in matches))
+
+            exact = [matches[0][0] for matches in per_word if len(matches) == 1 and matches[0][1] == 1.0]
+            if len(per_word) > 1 and len(exact) == len(per_word) == len(words):
+                # Every word is a known token: walk the rarest one and stop once there are enough
+                # rows that have all the others too. Every such row scores the same.
+                first, rest = exact[0], exact[1:]
+                hits = islice((i for i in first if all(i in postings for postings in rest)), limit)
+                scores = dict.fromkeys(hits, float(len(words)))
+                if scores:
+                    return [(score, True, self.store.get(item_id)) for item_id, score in scores.items()
+                            if self.store.get(item_id) is not None]
+
+            if len(per_word) == 1:
+                # One word: rows come out best weight first, so stop as soon as there are enough
+                scores: Dict[int, float] = {}
+                for postings, weight in sorted(per_word[0], key=lambda m: -m[1]):
+                    for item_id in islice(postings, limit):
+                        scores.setdefault(item_id, weight)
+                    if len(scores) >= limit:
+                        break
+                matched_all = len(words) == 1
+            else:
+                scores = {}
+                for postings, weight in per_word[0]:
+                    for item_id in postings:
+                        if weight > scores.get(item_id, 0.0):
+                            scores[item_id] = weight
+                matched_all = len(per_word) == len(words)
+                for matches in per_word[1:]:
+                    if len(matches) == 1:
+                        # One candidate token: a set intersection does the walk in C
+                        postings, weight = matches[0]
+                        kept = {item_id: scores[item_id] + weight for item_id in scores.keys() & postings.keys()}
+                    else:
+                        kept = {}
+                        for item_id, score in scores.items():
+                            weight = self._best_weight(item_id, matches)
+                            if weight:
+                                kept[item_id] = score + weight
+                    if kept:
+                        scores = kept
+                    else:
+                        # No row has this word as well; rank by the words that do co-occur
+                        matched_all = False
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda pair: (pair[1], -pair[0]))
+        return [(score, matched_all, self.store.get(item_id)) for item_id, score in best
+                if self.store.get(item_id) is not None]
+
+    def search(self, text: str, limit: int = 10) -> List[InventoryItem]:
+        return [item for _, _, item in self.search_scored(text, limit)]
+
+    def resolve(self, text: str) -> Optional[InventoryItem]:
+        """
+        The row ``text`` refers to, if exactly one row matches every word best; otherwise None.
+
+        Callers delete, sell and restock the row they get back, so every word
+        must be one of its tokens or the start of one. A typo match ("skirt"
+        for "shirt") is left to ``search``, for the caller to offer instead.
+        """
+        results = self.search_scored(text, limit=2)
+        if not results or not results[0][1]:
+            return None
+        if len(results) > 1 and results[1][0] >= results[0][0]:
+            return None
+        item = results[0][2]
+        with self._lock:
+            tokens = self._tokens.item_tokens.get(item.id, ())
+        for word in dict.fromkeys(tokenize(text)):
+            if not any(token == word or (len(word) >= 3 and token.startswith(word)) for token in tokens):
+                return None
+        return item
@@ -0,0 +1,175 @@
+"""Process-wide inventories, one per user, shared by every Streamlit session."""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from inventory_db import DEFAULT_DB_PATH, SqliteBackend, open_store
+from inventory_orders import DEFAULT_LEDGER_PATH, OrderEngine
+from inventory_search import SearchIndex
+from inventory_store import InventoryStore
+
+if TYPE_CHECKING:
+    from inventory_view import InventoryView
+
+DEFAULT_TENANT_DIR = "inventories"
+# Username that owns the pre-account inventory.db (and its legacy JSON/CSV import)
+LEGACY_OWNER_ENV = "INVENTORY_LEGACY_OWNER"
+
+
+class _Tenant:
+    __slots__ = ("store", "_view", "search", "orders", "last_used")
+
+    def __init__(self, store: InventoryStore, ledger_path: str):
+        self.store = store
+        self._view: Optional["InventoryView"] = None
+        self.search = SearchIndex(store)
+        self.orders = OrderEngine(store, ledger_path)
+        self.last_used = time.monotonic()
+
+    @property
+    def view(self) -> "InventoryView":
+        # Built on first use: only the View tab needs the DataFrame, and with it pandas
+        if self._view is None:
+            from inventory_view import InventoryView
+            self._view = InventoryView(self.store)
+        return self._view
+
+    def close(self):
+        self.search.close()
+        self.orders.close()
+        self.store.close()
+
+
+class InventoryService:
+    """
+    Opens each tenant's store once and hands the same objects to every session.
+
+    Mutations are serialized by the store's own lock, so sessions of different
+    users never contend and sessions of the same user always see the same stock.
+    The shared InventoryView means the DataFrame exists once per tenant, not once
+    per browser tab. Every tenant gets ``<tenant_dir>/<name>.db`` and
+    ``<tenant_dir>/<name>.orders.jsonl``, except ``legacy_owner``: that account
+    keeps the inventory.db (and its legacy import) and orders.ledger.jsonl written
+    before there were accounts. Without one configured, nobody gets that data, so
+    no username can claim it by signing up first.
+    """
+
+    def __init__(self, tenant_dir: str = DEFAULT_TENANT_DIR, default_db_path: str = DEFAULT_DB_PATH,
+                 batch_size: int = 1, legacy_owner: Optional[str] = None):
+        self.tenant_dir = tenant_dir
+        self.default_db_path = default_db_path
+        self.legacy_owner = legacy_owner
+        # Interactive edits are few and must survive a restart, so write each one through
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._tenants: Dict[str, _Tenant] = {}
+
+    def db_path(self, tenant: str) -> str:
+        if tenant == self.legacy_owner:
+            return self.default_db_path
+        # Readable file name plus a hash, so distinct usernames never share a file
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", tenant)[:40]
+        digest = hashlib.sha1(tenant.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.tenant_dir, f"{slug}-{digest}.db")
+
+    def ledger_path(self, tenant: str) -> str:
+        if tenant == self.legacy_owner:
+            return DEFAULT_LEDGER_PATH
+        return os.path.splitext(self.db_path(tenant))[0] + ".orders.jsonl"
+
+    def _open(self, tenant: str) -> InventoryStore:
+        if tenant == self.legacy_owner:
+            return open_store(self.default_db_path, batch_size=self.batch_size)
+        os.makedirs(self.tenant_dir, exist_ok=True)
+        return InventoryStore(backend=SqliteBackend(self.db_path(tenant), batch_size=self.batch_size))
+
+    def _get(self, tenant: str) -> _Tenant:
+        entry = self._tenants.get(tenant)
+        if entry is None:
+            with self._lock:
+                entry = self._tenants.get(tenant)
+                if entry is None:
+                    entry = self._tenants[tenant] = _Tenant(self._open(tenant), self.ledger_path(tenant))
+        entry.last_used = time.monotonic()
+        return entry
+
+    def store(self, tenant: str) -> InventoryStore:
+        return self._get(tenant).store
+
+    def view(self, tenant: str) -> "InventoryView":
+        return self._get(tenant).view
+
+    def search(self, tenant: str) -> SearchIndex:
+        return self._get(tenant).search
+
+    def orders(self, tenant: str) -> OrderEngine:
+        return self._get(tenant).orders
+
+    def handle(self, tenant: str) -> "InventoryHandle":
+        if not tenant:
+            raise ValueError("Inventories belong to accounts; log in first")
+        return InventoryHandle(self, tenant)
+
+    def close_idle(self, max_idle: float = 3600.0) -> int:
+        """Flush and close tenants unused for ``max_idle`` seconds; they reopen on next use."""
+        cutoff = time.monotonic() - max_idle
+        with self._lock:
+            idle = [name for name, entry in self._tenants.items() if entry.last_used < cutoff]
+            closed = [self._tenants.pop(name) for name in idle]
+        for entry in closed:
+            entry.close()
+        return len(closed)
+
+    def close(self):
+        with self._lock:
+            entries, self._tenants = list(self._tenants.values()), {}
+        for entry in entries:
+            entry.close()
+
+
+class InventoryHandle:
+    """
+    What a session keeps: the service and a tenant name.
+
+    Every attribute is looked up through the service, so a handle stays valid
+    after its tenant is closed for being idle and costs nothing per tab.
+    """
+
+    __slots__ = ("service", "tenant")
+
+    def __init__(self, service: InventoryService, tenant: str):
+        self.service = service
+        self.tenant = tenant
+
+    @property
+    def store(self) -> InventoryStore:
+        return self.service.store(self.tenant)
+
+    @property
+    def view(self) -> "InventoryView":
+        return self.service.view(self.tenant)
+
+    @property
+    def search(self) -> SearchIndex:
+        return self.service.search(self.tenant)
+
+    @property
+    def orders(self) -> OrderEngine:
+        return self.service.orders(self.tenant)
+
+
+_default_service: Optional[InventoryService] = None
+_default_lock = threading.Lock()
+
+
+def get_inventory_service() -> InventoryService:
+    """Process-wide inventory service."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = InventoryService(legacy_owner=os.environ.get(LEGACY_OWNER_ENV) or None)
+        return _default_service
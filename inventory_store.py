@@ -0,0 +1,586 @@
+"""Shared, indexed inventory store used by the Streamlit app and the agent tools."""
+
+import functools
+import gc
+import heapq
+import threading
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+FIELDS = ("id", "name", "quantity", "category", "price", "size", "brand", "color")
+
+
+def _locked(method):
+    """Run a store method while holding the store's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def _gc_paused():
+    """Hold off the cyclic GC while building many long-lived objects that hold no cycles."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class InventoryItem:
+    """One inventory row. Slotted so large catalogs stay compact in memory."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, id: int, name: str, quantity: int, category: str, price: float,
+                 size: Optional[str] = None, brand: Optional[str] = None, color: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.quantity = quantity
+        self.category = category
+        self.price = price
+        self.size = size
+        self.brand = brand
+        self.color = color
+
+    def __getitem__(self, key: str) -> Any:
+        # Lets existing dict-style code (item["name"]) keep working
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in FIELDS}
+
+    def __repr__(self) -> str:
+        return f"InventoryItem({self.to_dict()!r})"
+
+
+class InventoryBackend:
+    """Persistence hook for InventoryStore. Subclasses decide how and when rows reach disk."""
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def upsert(self, item: InventoryItem):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def delete(self, item_id: int):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def clear(self):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def load_thresholds(self) -> Dict[str, Any]:
+        """Thresholds saved by ``save_thresholds``; empty if none were ever saved."""
+        return {}
+
+    def save_thresholds(self, thresholds: Dict[str, Any]):
+        """Persist the store's restock thresholds (see InventoryStore.thresholds). Optional."""
+        pass
+
+    def upsert_many(self, items: List[InventoryItem]):
+        """Persist many rows at once. Backends with a bulk write path override this."""
+        for item in items:
+            self.upsert(item)
+
+    def flush(self):
+        """Write any buffered changes. Backends that write through can leave this as is."""
+        pass
+
+    def close(self):
+        self.flush()
+
+    @contextmanager
+    def batch(self):
+        """Group many changes into as few writes as possible; flushes on exit."""
+        try:
+            yield
+        finally:
+            self.flush()
+
+
+class InventoryStore:
+    """
+    Inventory rows keyed by id with hash indexes on name, (name, color) and category.
+
+    Lookup, update and delete are O(1); the secondary indexes use dicts as
+    ordered sets so removing an id from them is O(1) as well.
+
+    An optional ``backend`` receives every change and is used to reload rows on start.
+    ``version`` goes up by one per change and the last ``changelog_size`` changed ids
+    are kept so caches can refresh only the rows touched since they were built.
+
+    Rows below their restock threshold (per item, else per category, else
+    ``default_threshold``) are tracked as they change, so low-stock queries only
+    look at the low rows. Thresholds are saved through the backend whenever one
+    is set, and thresholds saved earlier take precedence over ``default_threshold``.
+
+    The store is shared by every session of a user, so readers take the lock
+    as well; anything that walks all rows gets a snapshot list, never a live view.
+
+    Indexes that must never fall behind (the search index) ``subscribe`` instead
+    of polling the changelog: they are called with the changed ids on every change.
+    """
+
+    def __init__(self, backend: Optional[InventoryBackend] = None, changelog_size: int = 10_000,
+                 default_threshold: int = 5):
+        self._backend = backend
+        # Mutations may come from several agent tool threads at once
+        self._lock = threading.RLock()
+        self.default_threshold = default_threshold
+        self._item_thresholds: Dict[int, int] = {}
+        self._category_thresholds: Dict[str, int] = {}
+        self._low: Dict[int, None] = {}
+        # Running totals, kept current on every change
+        self._qty_by_color_name: Dict[Tuple[str, str], List[int]] = {}  # [rows, units]
+        self._category_totals: Dict[str, Dict[str, float]] = {}
+        self._changelog: deque = deque(maxlen=changelog_size)
+        self._listeners: List[Callable[[Optional[List[int]]], None]] = []
+        self._rows: Dict[int, InventoryItem] = {}
+        self._by_name: Dict[str, Dict[int, None]] = {}
+        self._by_key: Dict[Tuple[str, str], Dict[int, None]] = {}
+        self._by_category: Dict[str, Dict[int, None]] = {}
+        self._next_id = 1
+        self.version = 0
+        if backend is not None:
+            for record in backend.load():
+                self._insert(InventoryItem(**record))
+            # After the rows: a journal only knows its thresholds once it has been replayed
+            saved = backend.load_thresholds()
+            if saved:
+                self.default_threshold = saved.get("default", default_threshold)
+                self._category_thresholds.update(saved.get("category", {}))
+                # JSON object keys are strings
+                self._item_thresholds.update({int(i): t for i, t in saved.get("item", {}).items()})
+                for item in self._rows.values():
+                    self._refresh_low(item)
+
+    # ---------- index helpers ----------
+
+    @staticmethod
+    def _index_add(index: dict, key, item_id: int):
+        index.setdefault(key, {})[item_id] = None
+
+    @staticmethod
+    def _index_remove(index: dict, key, item_id: int):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(item_id, None)
+            if not bucket:
+                del index[key]
+
+    def _link(self, item: InventoryItem):
+        self._index_add(self._by_name, item.name, item.id)
+        self._index_add(self._by_key, (item.name, item.color), item.id)
+        self._index_add(self._by_category, item.category, item.id)
+
+    def _unlink(self, item: InventoryItem):
+        self._index_remove(self._by_name, item.name, item.id)
+        self._index_remove(self._by_key, (item.name, item.color), item.id)
+        self._index_remove(self._by_category, item.category, item.id)
+
+    def _touch(self, item_id: Optional[int] = None):
+        # item_id None means "everything changed" (e.g. clear)
+        self.version += 1
+        self._changelog.append(item_id)
+        self._notify(None if item_id is None else [item_id])
+
+    def _touch_many(self, items: List[InventoryItem]):
+        ids = [item.id for item in items]
+        # Past the changelog size every polling cache rebuilds anyway, so log one "everything changed"
+        if len(ids) > self._changelog.maxlen:
+            self.version += 1
+            self._changelog.append(None)
+        else:
+            self.version += len(ids)
+            self._changelog.extend(ids)
+        self._notify(ids)
+
+    def _notify(self, item_ids: Optional[List[int]]):
+        for listener in self._listeners:
+            listener(item_ids)
+
+    def _persist_many(self, items: List[InventoryItem]):
+        if self._backend is not None and items:
+            self._backend.upsert_many(items)
+        self._touch_many(items)
+
+    def _insert(self, item: InventoryItem):
+        self._rows[item.id] = item
+        self._next_id = max(self._next_id, item.id + 1)
+        self._link(item)
+        self._count(item, 1)
+        self._refresh_low(item)
+
+    def _count(self, item: InventoryItem, sign: int):
+        """Add (sign=1) or remove (sign=-1) a row's contribution to the running totals."""
+        key = (item.color, item.name)
+        group = self._qty_by_color_name.setdefault(key, [0, 0])
+        group[0] += sign
+        group[1] += sign * item.quantity
+        if group[0] == 0:
+            del self._qty_by_color_name[key]
+
+        totals = self._category_totals.setdefault(item.category, {"items": 0, "units": 0, "value": 0.0})
+        totals["items"] += sign
+        totals["units"] += sign * item.quantity
+        totals["value"] += sign * item.quantity * (item.price or 0)
+        if totals["items"] == 0:
+            del self._category_totals[item.category]
+
+    def _refresh_low(self, item: InventoryItem):
+        if item.quantity < self.threshold_for(item):
+            self._low[item.id] = None
+        else:
+            self._low.pop(item.id, None)
+
+    # ---------- mutations ----------
+
+    @_locked
+    def add(self, name: str, quantity: int, category: str, price: float,
+            size: Optional[str] = None, brand: Optional[str] = None,
+            color: Optional[str] = None, id: Optional[int] = None) -> InventoryItem:
+        """Insert a new row and return it."""
+        if id is None:
+            id = self._next_id
+        elif id in self._rows:
+            raise KeyError(f"Item id {id} already exists")
+
+        item = InventoryItem(id, name, quantity, category, price, size, brand, color)
+        self._insert(item)
+        if self._backend is not None:
+            self._backend.upsert(item)
+        self._touch(item.id)
+        return item
+
+    @_locked
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[InventoryItem]:
+        """
+        Insert many new rows (field dicts without ids) and return them.
+
+        The backend receives them in one ``upsert_many`` call instead of one
+        write per row, which is what makes large imports fast.
+        """
+        items = []
+        # _insert inlined with the indexes bound to locals; per-row method calls
+        # cost more than the inserts themselves at a million rows
+        rows, by_name, by_key, by_category = self._rows, self._by_name, self._by_key, self._by_category
+        groups, category_totals, low = self._qty_by_color_name, self._category_totals, self._low
+        category_thresholds, default_threshold = self._category_thresholds, self.default_threshold
+        next_id = self._next_id
+        try:
+            with _gc_paused():
+                for record in records:
+                    item = InventoryItem(next_id, **record)
+                    rows[next_id] = item
+                    name, color, category, quantity = item.name, item.color, item.category, item.quantity
+                    by_name.setdefault(name, {})[next_id] = None
+                    by_key.setdefault((name, color), {})[next_id] = None
+                    by_category.setdefault(category, {})[next_id] = None
+                    group = groups.get((color, name))
+                    if group is None:
+                        groups[(color, name)] = [1, quantity]
+                    else:
+                        group[0] += 1
+                        group[1] += quantity
+                    totals = category_totals.get(category)
+                    if totals is None:
+                        totals = category_totals[category] = {"items": 0, "units": 0, "value": 0.0}
+                    totals["items"] += 1
+                    totals["units"] += quantity
+                    totals["value"] += quantity * (item.price or 0)
+                    if quantity < category_thresholds.get(category, default_threshold):
+                        low[next_id] = None
+                    items.append(item)
+                    next_id += 1
+        finally:
+            # Even when a record is bad, the rows already inserted keep their ids and reach the backend
+            self._next_id = next_id
+            self._persist_many(items)
+        return items
+
+    @_locked
+    def update_many(self, changes: Iterable[Tuple[int, Dict[str, Any]]]) -> List[InventoryItem]:
+        """Apply ``(item_id, fields)`` changes to many rows, persisted in one backend call."""
+        items = [self._apply(item_id, fields) for item_id, fields in changes]
+        self._persist_many(items)
+        return items
+
+    @_locked
+    def update(self, item_id: int, **fields) -> InventoryItem:
+        """Change fields of an existing row, re-indexing it if a key field changed."""
+        item = self._apply(item_id, fields)
+        if self._backend is not None:
+            self._backend.upsert(item)
+        self._touch(item_id)
+        return item
+
+    def _apply(self, item_id: int, fields: Dict[str, Any]) -> InventoryItem:
+        item = self._rows[item_id]
+        unknown = set(fields) - set(FIELDS[1:])
+        if unknown:
+            raise KeyError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        reindex = any(f in fields for f in ("name", "color", "category"))
+        if reindex:
+            self._unlink(item)
+        self._count(item, -1)
+        for f, value in fields.items():
+            setattr(item, f, value)
+        self._count(item, 1)
+        if reindex:
+            self._link(item)
+        self._refresh_low(item)
+        return item
+
+    @_locked
+    def adjust_quantity(self, item_id: int, delta: int) -> InventoryItem:
+        """Add ``delta`` (may be negative) to the quantity of a row."""
+        item = self._rows[item_id]
+        return self.update(item_id, quantity=item.quantity + delta)
+
+    @_locked
+    def delete(self, item_id: int) -> Optional[InventoryItem]:
+        """Remove a row by id. Returns the removed row or None if it did not exist."""
+        item = self._rows.pop(item_id, None)
+        if item is not None:
+            self._unlink(item)
+            self._count(item, -1)
+            self._low.pop(item_id, None)
+            if self._item_thresholds.pop(item_id, None) is not None:
+                self._save_thresholds()
+            if self._backend is not None:
+                self._backend.delete(item_id)
+            self._touch(item_id)
+        return item
+
+    @_locked
+    def delete_matching(self, name: str, color: str) -> List[InventoryItem]:
+        """Remove every row with the given name and color."""
+        return [self.delete(i) for i in list(self._by_key.get((name, color), ()))]
+
+    @_locked
+    def clear(self):
+        """Drop every row. The version keeps counting so caches notice the change."""
+        self._rows.clear()
+        self._by_name.clear()
+        self._by_key.clear()
+        self._by_category.clear()
+        self._low.clear()
+        if self._item_thresholds:
+            self._item_thresholds.clear()
+            self._save_thresholds()
+        self._qty_by_color_name.clear()
+        self._category_totals.clear()
+        if self._backend is not None:
+            self._backend.clear()
+        self._touch()
+
+    def flush(self):
+        """Push buffered changes to the backend, if there is one."""
+        if self._backend is not None:
+            self._backend.flush()
+
+    @_locked
+    def close(self):
+        """Flush and release the backend."""
+        if self._backend is not None:
+            self._backend.close()
+
+    @contextmanager
+    def batch(self):
+        """Let the backend group the changes made inside the block (e.g. during a bulk import)."""
+        if self._backend is None:
+            yield
+        else:
+            with self._backend.batch():
+                yield
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the store lock (and a backend batch) for the whole block.
+
+        Other writers wait until the block ends, so a caller can check several
+        rows and then change them without anything moving in between.
+        """
+        with self._lock, self.batch():
+            yield self
+
+    # ---------- change listeners ----------
+
+    @_locked
+    def subscribe(self, listener: Callable[[Optional[List[int]]], None]):
+        """
+        Call ``listener(item_ids)`` after every change with the ids added,
+        updated or deleted, or with None after ``clear``.
+
+        Listeners run on the writer's thread while the store lock is held, so
+        they must be quick and must not wait on anything that needs the store.
+        """
+        self._listeners.append(listener)
+
+    @_locked
+    def unsubscribe(self, listener: Callable[[Optional[List[int]]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # ---------- restock thresholds ----------
+
+    @_locked
+    def thresholds(self) -> Dict[str, Any]:
+        """Every restock threshold, in the JSON-friendly form backends save."""
+        return {
+            "default": self.default_threshold,
+            "category": dict(self._category_thresholds),
+            "item": {str(i): t for i, t in self._item_thresholds.items()},
+        }
+
+    def _save_thresholds(self):
+        if self._backend is not None:
+            self._backend.save_thresholds(self.thresholds())
+
+    def threshold_for(self, item: InventoryItem) -> int:
+        threshold = self._item_thresholds.get(item.id)
+        if threshold is None:
+            threshold = self._category_thresholds.get(item.category, self.default_threshold)
+        return threshold
+
+    @_locked
+    def set_item_threshold(self, item_id: int, threshold: Optional[int]):
+        """Restock threshold for one row; None falls back to its category/default."""
+        item = self._rows[item_id]
+        if threshold is None:
+            self._item_thresholds.pop(item_id, None)
+        else:
+            self._item_thresholds[item_id] = threshold
+        self._refresh_low(item)
+        self._save_thresholds()
+
+    @_locked
+    def set_category_threshold(self, category: str, threshold: Optional[int]):
+        """Restock threshold for every row in a category that has no threshold of its own."""
+        if threshold is None:
+            self._category_thresholds.pop(category, None)
+        else:
+            self._category_thresholds[category] = threshold
+        for item_id in self._by_category.get(category, ()):
+            self._refresh_low(self._rows[item_id])
+        self._save_thresholds()
+
+    @_locked
+    def set_default_threshold(self, threshold: int):
+        self.default_threshold = threshold
+        for item in self._rows.values():
+            self._refresh_low(item)
+        self._save_thresholds()
+
+    @_locked
+    def low_stock(self, limit: Optional[int] = None) -> List[InventoryItem]:
+        """Rows below their threshold, lowest quantity first (at most ``limit`` of them)."""
+        low = (self._rows[i] for i in self._low)
+        if limit is None:
+            return sorted(low, key=lambda item: item.quantity)
+        return heapq.nsmallest(limit, low, key=lambda item: item.quantity)
+
+    # ---------- queries ----------
+
+    @_locked
+    def changes_since(self, version: int) -> Optional[Set[int]]:
+        """
+        Ids added, updated or deleted after ``version``.
+
+        Returns None when the changelog no longer reaches back that far or a
+        clear happened in between; callers should then rebuild from scratch.
+        """
+        behind = self.version - version
+        if behind < 0 or behind > len(self._changelog):
+            return None
+        changed = set()
+        for item_id in islice(reversed(self._changelog), behind):
+            if item_id is None:
+                return None
+            changed.add(item_id)
+        return changed
+
+    @_locked
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    @_locked
+    def quantity_by_color_name(self) -> Dict[Tuple[str, str], int]:
+        """Total quantity per (color, name), maintained as rows change."""
+        return {key: units for key, (_, units) in self._qty_by_color_name.items()}
+
+    @_locked
+    def category_totals(self) -> Dict[str, Dict[str, float]]:
+        """Per category: number of rows ("items"), total quantity ("units") and stock value."""
+        return {category: dict(totals) for category, totals in self._category_totals.items()}
+
+    @_locked
+    def group_totals(self, name: str, color: Optional[str]) -> Tuple[int, int]:
+        """(rows, units) for one (color, name) group without copying every group."""
+        rows, units = self._qty_by_color_name.get((color, name), (0, 0))
+        return rows, units
+
+    def low_stock_count(self) -> int:
+        return len(self._low)
+
+    def get(self, item_id: int) -> Optional[InventoryItem]:
+        return self._rows.get(item_id)
+
+    @_locked
+    def find(self, name: str, color: Optional[str] = None) -> List[InventoryItem]:
+        """Rows matching a name, optionally narrowed to one color."""
+        ids = self._by_name.get(name, ()) if color is None else self._by_key.get((name, color), ())
+        return [self._rows[i] for i in ids]
+
+    @_locked
+    def by_category(self, category: str) -> List[InventoryItem]:
+        return [self._rows[i] for i in self._by_category.get(category, ())]
+
+    @_locked
+    def at(self, position: int) -> Optional[InventoryItem]:
+        """Row at a 0-based position in insertion order (used by the index-based Delete tab)."""
+        if position < 0:
+            return None
+        return next(islice(self._rows.values(), position, None), None)
+
+    @_locked
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [item.to_dict() for item in self._rows.values()]
+
+    @_locked
+    def snapshot(self) -> Tuple[int, List[InventoryItem]]:
+        """
+        (version, rows) taken together under the lock.
+
+        Caches that rebuild from scratch use this so the rows they index and the
+        version they record always match, whatever other sessions are writing.
+        """
+        return self.version, list(self._rows.values())
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._rows
+
+    def __iter__(self) -> Iterator[InventoryItem]:
+        # A snapshot: other sessions may add or delete rows while the caller iterates
+        with self._lock:
+            return iter(list(self._rows.values()))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __bool__(self) -> bool:
+        return bool(self._rows)
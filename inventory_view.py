@@ -0,0 +1,114 @@
+"""Cached DataFrame view of an InventoryStore for the Streamlit View tab."""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from inventory_store import FIELDS, InventoryStore
+from tracing import span
+
+# Past this many changed rows a full rebuild is cheaper than patching the frame
+REBUILD_FRACTION = 0.25
+
+
+class InventoryView:
+    """
+    Keeps a DataFrame in sync with a store, indexed by item id.
+
+    The frame is only touched when ``store.version`` moves, and then only for the
+    ids the store reports as changed since the cached version.
+    """
+
+    def __init__(self, store: InventoryStore):
+        self.store = store
+        self._frame: Optional[pd.DataFrame] = None
+        self._version: Optional[int] = None
+        self._options: Dict[str, List[str]] = {}
+        # One view may be shared by several sessions; _patch edits the frame in place
+        self._lock = threading.RLock()
+
+    def _rebuild(self) -> int:
+        version, items = self.store.snapshot()
+        frame = pd.DataFrame([item.to_dict() for item in items], columns=list(FIELDS))
+        self._frame = frame.set_index("id", drop=False)
+        return version
+
+    def _patch(self, changed_ids):
+        frame = self._frame
+        # Each row is read once; another session may delete it at any moment
+        current = {i: self.store.get(i) for i in changed_ids}
+        gone = [i for i, item in current.items() if item is None and i in frame.index]
+        if gone:
+            frame = frame.drop(index=gone)
+
+        rows = [item.to_dict() for item in current.values() if item is not None]
+        if rows:
+            patch = pd.DataFrame(rows, columns=list(FIELDS)).set_index("id", drop=False)
+            existing = patch.index.intersection(frame.index)
+            if len(existing):
+                frame.loc[existing, :] = patch.loc[existing, :]
+            new = patch.index.difference(frame.index)
+            if len(new):
+                frame = pd.concat([frame, patch.loc[new]])
+        self._frame = frame
+
+    def frame(self) -> pd.DataFrame:
+        """The full inventory frame, refreshed only as far as the store has changed."""
+        with self._lock:
+            if self._frame is not None and self._version == self.store.version:
+                return self._frame
+
+            # Read the version before the changes: anything written meanwhile is patched
+            # now and again on the next refresh, which is harmless, rather than missed
+            version = self.store.version
+            changed = None if self._frame is None else self.store.changes_since(self._version)
+            if changed is None or len(changed) > REBUILD_FRACTION * max(len(self.store), 1):
+                with span("view.frame", mode="rebuild"):
+                    version = self._rebuild()
+            elif changed:
+                with span("view.frame", mode="patch"):
+                    self._patch(changed)
+            self._version = version
+            self._options.clear()
+            return self._frame
+
+    def options(self, column: str) -> List[str]:
+        """Distinct non-empty values of a column, for filter dropdowns."""
+        with self._lock:
+            frame = self.frame()
+            if column not in self._options:
+                values = frame[column].dropna().unique().tolist()
+                self._options[column] = sorted(str(v) for v in values if v != "")
+            return self._options[column]
+
+    def query(self, category: Optional[str] = None, brand: Optional[str] = None,
+              color: Optional[str] = None, sort_by: Optional[str] = None,
+              ascending: bool = True, page: int = 0,
+              page_size: int = 50, ids: Optional[Sequence[int]] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Filter, sort and slice the inventory on the server.
+
+        Returns the requested page and the number of rows matching the filters,
+        so the browser only ever receives ``page_size`` rows. ``ids`` (e.g. search
+        results) restricts the rows to those items, kept in the given order
+        unless ``sort_by`` is set.
+        """
+        with self._lock:
+            frame = self.frame()
+            if ids is not None:
+                frame = frame.loc[[i for i in ids if i in frame.index]]
+            mask = None
+            for column, value in (("category", category), ("brand", brand), ("color", color)):
+                if value:
+                    column_mask = frame[column] == value
+                    mask = column_mask if mask is None else mask & column_mask
+            if mask is not None:
+                frame = frame[mask]
+
+            total = len(frame)
+            if sort_by:
+                frame = frame.sort_values(sort_by, ascending=ascending, kind="stable")
+
+            start = max(page, 0) * page_size
+            return frame.iloc[start:start + page_size].reset_index(drop=True), total
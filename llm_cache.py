@@ -0,0 +1,146 @@
+"""Response cache for LLM calls: in-memory LRU with an optional SQLite tier and TTL expiry."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_TTL = 300.0
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """
+    Cache keyed on a hash of (model, messages, tools, inventory version).
+
+    The memory tier holds at most ``maxsize`` entries and evicts the least
+    recently used. With ``disk_path`` set, JSON-serializable values are also
+    written to SQLite so they survive restarts and are shared between processes.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = DEFAULT_TTL, disk_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+            )
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], tools: Optional[List[Dict]] = None,
+                 version: Optional[int] = None) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "tools": tools or [], "version": version},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                # The disk tier stores wall-clock expiry since monotonic time does not survive restarts
+                if row is not None and row[0] > time.time():
+                    value = json.loads(row[1])
+                    self._remember(key, value, now + (row[0] - time.time()))
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return default
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._remember(key, value, time.monotonic() + ttl)
+            if self._disk is not None:
+                try:
+                    encoded = json.dumps(value)
+                except TypeError:
+                    # Provider response objects stay in memory only
+                    return
+                self._disk.execute(
+                    "INSERT INTO responses (key, expires_at, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET expires_at=excluded.expires_at, value=excluded.value",
+                    (key, time.time() + ttl, encoded),
+                )
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM responses")
+
+    def purge_expired(self):
+        """Drop expired rows from the disk tier (memory entries expire lazily on read)."""
+        if self._disk is not None:
+            with self._lock:
+                self._disk.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache(disk_path: Optional[str] = None) -> ResponseCache:
+    """Process-wide cache shared by the app and the agents. ``disk_path`` only applies on first call."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(disk_path=disk_path)
+        return _default_cache
@@ -0,0 +1,228 @@
+"""Process-wide gateway for LLM calls: pooled connections, rate limiting, coalescing and retries."""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from tracing import span
+
+# Set per deployment to the provider's limit; LLM_BURST is how many calls may go out back to back
+DEFAULT_REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 30))
+DEFAULT_BURST = float(os.environ["LLM_BURST"]) if os.environ.get("LLM_BURST") else None
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 4
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            delay = (1 - self.tokens) / self.rate
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, timeouts, dropped connections and 5xx responses are worth another try."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in {"RateLimitError", "APIConnectionError", "Timeout",
+                                    "ServiceUnavailableError", "InternalServerError"}
+
+
+class LLMGateway:
+    """
+    Single entry point for every LLM call in the process.
+
+    All calls run on the agent runtime loop and share one keep-alive HTTP
+    client, so sessions reuse connections instead of opening new ones. Calls
+    pass through a token bucket and a concurrency cap; identical requests
+    already in flight are coalesced onto one call; retryable failures are
+    retried with full-jitter exponential backoff.
+
+    The rate and burst default to the ``LLM_REQUESTS_PER_MINUTE`` and
+    ``LLM_BURST`` environment variables (30 per minute, bursts of a quarter of
+    that). ``api_base`` (or the ``LLM_API_BASE`` environment variable) points every
+    call at another endpoint, e.g. a local stub server. ``completion_fn``
+    replaces ``litellm.acompletion`` itself, e.g. with an in-process fake.
+    """
+
+    def __init__(self,
+                 requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 burst: Optional[float] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = 0.5,
+                 backoff_cap: float = 20.0,
+                 api_base: Optional[str] = None,
+                 pool_connections: bool = True,
+                 completion_fn: Optional[Callable[..., Awaitable[Any]]] = None):
+        if burst is None:
+            # A quarter minute's worth: a short flurry of calls goes out at once instead of one per interval
+            burst = DEFAULT_BURST if DEFAULT_BURST is not None else max(requests_per_minute / 4.0, 1.0)
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.api_base = api_base or os.environ.get("LLM_API_BASE")
+        if completion_fn is None:
+            # litellm takes seconds to import, so it loads with the first real gateway, not with this module
+            import litellm
+            completion_fn = litellm.acompletion
+        self.completion_fn = completion_fn
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+        if pool_connections:
+            self._install_pooled_clients()
+
+    def _install_pooled_clients(self):
+        # litellm reuses these sessions for every provider call instead of creating one per request
+        import httpx
+        import litellm
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency * 2,
+            max_keepalive_connections=self.max_concurrency,
+            keepalive_expiry=60.0,
+        )
+        litellm.aclient_session = httpx.AsyncClient(limits=limits, timeout=None)
+        litellm.client_session = httpx.Client(limits=limits, timeout=None)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it belongs to the runtime loop that first uses it
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _prepare(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if self.api_base and "api_base" not in kwargs:
+            kwargs = dict(kwargs, api_base=self.api_base)
+        return kwargs
+
+    @staticmethod
+    def request_key(kwargs: Dict[str, Any]) -> str:
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def _call(self, kwargs: Dict[str, Any]):
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                async with self.semaphore:
+                    self.calls += 1
+                    with span("llm.completion", model=kwargs.get("model")):
+                        return await self.completion_fn(**kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt))
+
+    async def acomplete(self, **kwargs):
+        """``litellm.acompletion`` through the gateway. Identical concurrent requests share one call."""
+        kwargs = self._prepare(kwargs)
+        key = self.request_key(kwargs)
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._call(kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one caller timing out does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def astream(self, **kwargs) -> AsyncIterator:
+        """
+        Streaming call through the gateway.
+
+        The connection setup is rate limited and retried like ``acomplete``; the
+        concurrency slot is held until the stream is fully consumed. Streams are
+        never coalesced.
+        """
+        kwargs = self._prepare(dict(kwargs, stream=True))
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            await self.semaphore.acquire()
+            try:
+                self.calls += 1
+                with span("llm.stream_start", model=kwargs.get("model")):
+                    stream = await self.completion_fn(**kwargs)
+            except Exception as e:
+                self.semaphore.release()
+                if attempt == self.max_retries or not is_retryable(e):
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            try:
+                with span("llm.stream", model=kwargs.get("model")):
+                    async for chunk in stream:
+                        yield chunk
+            finally:
+                self.semaphore.release()
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failures": self.failures,
+            "in_flight": len(self._in_flight),
+            "rate_limit_wait_s": round(self.bucket.waited, 3),
+        }
+
+
+_default_gateway: Optional[LLMGateway] = None
+_default_lock = threading.Lock()
+
+
+def get_gateway(**options) -> LLMGateway:
+    """Process-wide gateway shared by the app and the agents. ``options`` only apply on first call."""
+    global _default_gateway
+    with _default_lock:
+        if _default_gateway is None:
+            _default_gateway = LLMGateway(**options)
+        return _default_gateway
+
+
+def set_gateway(gateway: Optional[LLMGateway]):
+    """Replace the process-wide gateway, e.g. with one pointed at a stub server."""
+    global _default_gateway
+    with _default_lock:
+        _default_gateway = gateway
@@ -0,0 +1,225 @@
+"""Deterministic fake LLM for benchmarks: scripted tool calls, configurable latency, OpenAI-style HTTP stub."""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Payload(dict):
+    """dict with attribute access, so fake responses read like litellm's ModelResponse."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def wrap(value):
+    if isinstance(value, dict):
+        return Payload({k: wrap(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [wrap(v) for v in value]
+    return value
+
+
+def estimate_prompt_tokens(messages: List[Dict], tools: Optional[List[Dict]] = None) -> int:
+    """~4 characters per token over the serialized request, the same estimate the agent memory uses."""
+    return max(1, len(json.dumps(messages, default=str)) // 4 + len(json.dumps(tools or [])) // 4)
+
+
+class ScriptedLLM:
+    """
+    Answers chat completions from a script instead of a model.
+
+    ``script`` maps a user message to the tool calls to make for it, each a dict
+    with ``name`` and ``arguments``. When the last message is not a scripted
+    user message (e.g. a tool result fed back by the template agent), the
+    ``final_tool`` is called if it was offered, otherwise plain text is returned.
+    Latency is ``latency`` plus up to ``jitter`` seconds from a seeded RNG.
+    """
+
+    def __init__(self, script: Optional[Dict[str, List[Dict]]] = None, latency: float = 0.05,
+                 jitter: float = 0.0, seed: int = 0, final_tool: str = "terminate"):
+        self.script = dict(script or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.final_tool = final_tool
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens: List[int] = []
+
+    def add(self, text: str, tool_calls: List[Dict]):
+        self.script[text] = tool_calls
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _tool_call(self, name: str, arguments: Dict) -> Dict:
+        return {
+            "id": f"call_{next(self._ids)}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+
+    def respond(self, messages: List[Dict], tools: Optional[List[Dict]] = None, model: str = "mock") -> Dict:
+        """OpenAI-format completion for ``messages``."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens.append(estimate_prompt_tokens(messages, tools))
+
+        last = messages[-1] if messages else {}
+        content = last.get("content")
+        tool_names = {t["function"]["name"] for t in tools or []}
+        scripted = self.script.get(content) if last.get("role") == "user" and isinstance(content, str) else None
+
+        if scripted:
+            calls = [self._tool_call(c["name"], c.get("arguments", {})) for c in scripted]
+        elif self.final_tool in tool_names:
+            calls = [self._tool_call(self.final_tool, {"message": "Done."})]
+        else:
+            calls = []
+
+        message = {"role": "assistant", "content": None if calls else "Done.", "tool_calls": calls or None,
+                   "function_call": None}
+        return {
+            "id": f"chatcmpl-{next(self._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if calls else "stop"}],
+            "usage": {"prompt_tokens": self.prompt_tokens[-1], "completion_tokens": 1,
+                      "total_tokens": self.prompt_tokens[-1] + 1},
+        }
+
+    @staticmethod
+    def stream_chunks(response: Dict) -> Iterator[Dict]:
+        """Split a completion into streaming chunks; tool-call arguments arrive in two pieces."""
+        message = response["choices"][0]["message"]
+
+        def chunk(delta, finish_reason=None):
+            return {"id": response["id"], "object": "chat.completion.chunk", "model": response["model"],
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        for word in (message["content"] or "").split(" "):
+            if word:
+                yield chunk({"content": word + " ", "tool_calls": None})
+        for index, call in enumerate(message["tool_calls"] or []):
+            arguments = call["function"]["arguments"]
+            half = len(arguments) // 2
+            yield chunk({"content": None, "tool_calls": [
+                {"index": index, "id": call["id"], "type": "function",
+                 "function": {"name": call["function"]["name"], "arguments": arguments[:half]}}]})
+            yield chunk({"content": None, "tool_calls": [
+                {"index": index, "id": None, "type": None, "function": {"name": None, "arguments": arguments[half:]}}]})
+        yield chunk({"content": None, "tool_calls": None}, response["choices"][0]["finish_reason"])
+
+    async def acompletion(self, model: str = "mock", messages: Optional[List[Dict]] = None,
+                          tools: Optional[List[Dict]] = None, stream: bool = False, **kwargs):
+        """Drop-in for ``litellm.acompletion``, e.g. ``LLMGateway(completion_fn=llm.acompletion)``."""
+        response = self.respond(messages or [], tools, model)
+        await asyncio.sleep(self.delay())
+        if not stream:
+            return wrap(response)
+
+        async def chunks():
+            for chunk in self.stream_chunks(response):
+                await asyncio.sleep(0)
+                yield wrap(chunk)
+        return chunks()
+
+
+class MockLLMServer:
+    """
+    OpenAI-compatible ``/chat/completions`` endpoint backed by a ScriptedLLM.
+
+    Point the gateway at it with ``LLMGateway(api_base=server.url)`` (or
+    ``LLM_API_BASE``) and an OpenAI-compatible model such as ``openai/mock``.
+    """
+
+    def __init__(self, llm: ScriptedLLM, host: str = "127.0.0.1", port: int = 0):
+        self.llm = llm
+        handler = self._make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _make_handler(self):
+        llm = self.llm
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is exercised
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, b'{"error": "not found"}')
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                response = llm.respond(request.get("messages", []), request.get("tools"), request.get("model", "mock"))
+                time.sleep(llm.delay())
+                if not request.get("stream"):
+                    self._send(200, json.dumps(response).encode("utf-8"))
+                    return
+                events = [f"data: {json.dumps(chunk)}\n\n" for chunk in llm.stream_chunks(response)]
+                events.append("data: [DONE]\n\n")
+                self._send(200, "".join(events).encode("utf-8"), "text/event-stream")
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a scripted OpenAI-compatible LLM stub.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--script", help="JSON file mapping user messages to lists of tool calls")
+    args = parser.parse_args()
+
+    script: Dict[str, Any] = {}
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    server = MockLLMServer(ScriptedLLM(script, latency=args.latency), port=args.port)
+    print(f"Mock LLM listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
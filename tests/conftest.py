@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore  # noqa: E402
+
+
+@pytest.fixture
+def store():
+    store = InventoryStore()
+    store.add(name="shirt", quantity=10, category="clothing", price=500.0, size="M", brand="nike", color="red")
+    store.add(name="shirt", quantity=2, category="clothing", price=450.0, size="L", brand="zara", color="blue")
+    store.add(name="sneaker", quantity=4, category="footwear", price=3000.0, size="42", brand="nike", color="white")
+    store.add(name="shampoo", quantity=30, category="care", price=250.0, size="200ml", brand="dove", color=None)
+    return store
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from agent_runtime import AsyncAgent, CallScheduler, call_waves, run_sync
+
+
+def test_consecutive_reads_share_a_wave_and_writes_run_alone():
+    calls = ["read", "read", "write", "read", "write", "write", "read", "read"]
+    assert call_waves(calls, lambda call: call == "read") == [[0, 1], [2], [3], [4], [5], [6, 7]]
+
+
+def test_scheduler_overlaps_reads_and_keeps_writes_in_call_order():
+    log = []
+
+    async def execute(name, delay):
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+
+    async def run():
+        scheduler = CallScheduler(execute, lambda name, delay: name.startswith("read"))
+        for call in [("read1", 0.05), ("read2", 0.01), ("write1", 0.01), ("read3", 0.0), ("write2", 0.0)]:
+            scheduler.start(*call)
+        return await scheduler.results()
+
+    assert run_sync(run()) == ["read1", "read2", "write1", "read3", "write2"]
+    # Both reads start before either ends; each write starts only after everything before it ended
+    assert log[:2] == [("start", "read1"), ("start", "read2")]
+    assert log.index(("start", "write1")) > log.index(("end", "read1"))
+    assert log.index(("start", "read3")) > log.index(("end", "write1"))
+    assert log.index(("start", "write2")) > log.index(("end", "read3"))
+
+
+class Action:
+    def __init__(self, name, func, terminal=False):
+        self.name, self.func, self.terminal, self.read_only = name, func, terminal, False
+
+
+class Registry:
+    def __init__(self, *actions):
+        self.actions = {action.name: action for action in actions}
+
+    def get_actions(self):
+        return list(self.actions.values())
+
+    def get_action(self, name):
+        return self.actions.get(name)
+
+
+class Language:
+    def construct_prompt(self, actions, environment, goals, memory):
+        return list(memory)
+
+    def parse_invocations(self, response):
+        return [json.loads(response)]
+
+
+class Environment:
+    def execute_action(self, action, args):
+        return {"tool_executed": True, "result": action.func(**args)}
+
+
+class Memory(list):
+    def add_memory(self, item):
+        self.append(item)
+
+
+def make_agent(generate_response, llm_timeout=1.0):
+    registry = Registry(Action("shout", lambda text: text.upper()),
+                        Action("terminate", lambda message: message, terminal=True))
+    return AsyncAgent([], Language(), registry, generate_response, Environment(), Memory, llm_timeout=llm_timeout)
+
+
+def test_async_agent_runs_tools_until_a_terminal_one():
+    replies = iter([{"tool": "shout", "args": {"text": "hi"}}, {"tool": "terminate", "args": {"message": "done"}}])
+
+    async def generate_response(prompt):
+        return json.dumps(next(replies))
+
+    memory = make_agent(generate_response).run_sync("say hi")
+    results = [json.loads(item["content"])["result"] for item in memory if item["type"] == "environment"]
+    assert results == ["HI", "done"]
+
+
+def test_slow_model_calls_are_cancelled_after_the_timeout():
+    cancelled = []
+
+    async def generate_response(prompt):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        make_agent(generate_response, llm_timeout=0.05).run_sync("say hi")
+    assert cancelled == [True]
@@ -0,0 +1,51 @@
+import pytest
+
+from intent_router import IntentRouter
+
+
+class Registry:
+    def __init__(self, *names):
+        self.names = set(names)
+
+    def get(self, name):
+        return name if name in self.names else None
+
+
+@pytest.fixture
+def router():
+    stocked = {("shirt", "red")}
+    return IntentRouter(Registry("add_item", "order_item", "delete_item", "restock_alert_tool"),
+                        exists=lambda name, color: (name, color) in stocked)
+
+
+def test_complete_add_is_routed(router):
+    match = router.route("add 3 red shirts size M at 500 in clothing")
+    assert match.action == "add_item"
+    assert match.args == {"name": "shirt", "color": "red", "quantity": 3, "category": "clothing",
+                          "price": 500.0, "size": "m"}
+
+
+def test_add_without_price_goes_to_the_llm(router):
+    assert router.route("add 3 red shirts in clothing") is None
+    assert router.stats()["llm_fallback"] == 1
+
+
+def test_simple_commands_are_routed(router):
+    assert router.route("check stock").action == "restock_alert_tool"
+    # Registered nowhere, so the LLM gets it
+    assert router.route("save inventory") is None
+
+
+def test_delete_of_a_stocked_item_is_routed(router):
+    match = router.route("delete red shirts")
+    assert (match.action, match.args) == ("delete_item", {"name": "shirt", "color": "red"})
+
+
+@pytest.mark.parametrize("text", [
+    "remove 3 red shirts",
+    "delete the red shirt from the list",
+    "delete a red shirt",
+    "delete blue shirts",  # not in the store
+])
+def test_ambiguous_or_unknown_deletes_go_to_the_llm(router, text):
+    assert router.route(text) is None
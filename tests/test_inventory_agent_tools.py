@@ -0,0 +1,40 @@
+import pytest
+
+import benchmark
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    # The section opens its journal and ledger in the working directory
+    monkeypatch.chdir(tmp_path)
+    namespace = benchmark.load_section(benchmark.INVENTORY_MARKER, drop={"agent.run()"})
+    inventory = namespace["inventory"]
+    inventory.add(name="shirt", quantity=10, category="clothing", price=500.0, brand="nike", color="blue")
+    inventory.add(name="sneaker", quantity=4, category="footwear", price=3000.0, brand="nike", color="white")
+    yield namespace
+    namespace["search_index"].close()
+    namespace["orders"].close()
+    inventory.close()
+
+
+def test_near_miss_names_never_delete_or_sell(tools):
+    inventory = tools["inventory"]
+    before = inventory.to_records()
+
+    message = tools["delete_item"]("skirt", "blue")["message"]
+    assert "Did you mean" in message and "blue shirt" in message
+    message = tools["order_item"]("skirt", "blue", 2)["message"]
+    assert "Did you mean" in message and "blue shirt" in message
+    assert "Did you mean" in tools["delete_item"]("snekaer", "white")["message"]
+
+    assert inventory.to_records() == before
+    assert list(tools["orders"]) == []
+
+
+def test_exact_names_still_delete_and_sell(tools):
+    inventory = tools["inventory"]
+    tools["order_item"]("shirt", "blue", 2)
+    assert inventory.find("shirt", "blue")[0].quantity == 8
+
+    tools["delete_item"]("sneakers", "white")
+    assert inventory.find("sneaker") == []
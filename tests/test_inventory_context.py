@@ -0,0 +1,29 @@
+from inventory_context import ContextBuilder, estimate_tokens
+from inventory_search import SearchIndex
+
+
+def test_context_names_the_groups_the_question_mentions(store):
+    context = ContextBuilder(store, SearchIndex(store)).build("how many red shirts in clothing?")
+
+    assert context.startswith("Inventory: 4 items, 46 units")
+    assert "red shirt: 10 units in 1 items" in context
+    assert "category clothing: 12 units in 2 items" in context
+
+
+def test_context_stays_within_the_token_budget(store):
+    for i in range(200):
+        store.add(name="shirt", quantity=1, category="clothing", price=1.0, brand=f"brand{i}", color="red")
+    builder = ContextBuilder(store, SearchIndex(store), token_budget=200, top_k=100)
+
+    context = builder.build("red shirt")
+    assert sum(estimate_tokens(line) + 1 for line in context.splitlines()) <= 200
+    # The group total still counts every row, even though only some rows fit
+    assert "red shirt: 210 units in 201 items" in context
+    assert 0 < context.count("|shirt|red|") < 100
+
+
+def test_empty_inventory_gives_no_context():
+    from inventory_store import InventoryStore
+
+    store = InventoryStore()
+    assert ContextBuilder(store, SearchIndex(store)).build("anything low?") == ""
@@ -0,0 +1,56 @@
+import io
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from inventory_import import bulk_import  # noqa: E402
+from inventory_store import InventoryStore  # noqa: E402
+
+
+CSV = """name,quantity,category,price,size,brand,color
+Shirt,2,clothing,550,,Nike,Red
+shirt ,1,clothing,600,,nike,red
+Hat,4,hats,200,M,Zara,Blue
+,3,clothing,100,,,
+scarf,-1,clothing,100,,,
+"""
+
+
+def test_rows_are_cleaned_merged_and_matched_to_existing_items():
+    store = InventoryStore()
+    shirt = store.add(name="shirt", quantity=1, category="clothing", price=500.0,
+                      size="N/A", brand="nike", color="red")
+
+    stats = bulk_import(store, io.StringIO(CSV), file_name="items.csv")
+
+    assert stats == {"rows_read": 5, "rejected": 2, "added": 1, "restocked": 1}
+    # Both shirt rows folded into the existing item; the last price wins
+    assert (shirt.quantity, shirt.price) == (4, 600.0)
+    hat = store.find("hat", "blue")[0]
+    assert (hat.quantity, hat.size, hat.brand) == (4, "m", "zara")
+
+
+def test_import_reaches_the_search_index_and_totals():
+    from inventory_search import SearchIndex
+
+    store = InventoryStore()
+    index = SearchIndex(store)
+    bulk_import(store, io.StringIO(CSV), file_name="items.csv")
+
+    assert index.resolve("blue zara hat").name == "hat"
+    assert store.category_totals()["clothing"]["units"] == 3
+
+
+def test_items_added_by_hand_are_restocked_not_duplicated():
+    store = InventoryStore()
+    # As the Add tab and the agent store them: capitals, no brand, no size
+    shirt = store.add(name="Shirt", quantity=1, category="clothing", price=500.0, color="Red ")
+    hat = store.add(name="hat", quantity=2, category="hats", price=200.0, size="M", brand="Zara", color="blue")
+
+    csv = "name,quantity,price,color,size,brand\nshirt,3,550,red,,\nHat,1,210,Blue,m,zara\n"
+    stats = bulk_import(store, io.StringIO(csv), file_name="items.csv")
+
+    assert stats["added"] == 0 and stats["restocked"] == 2
+    assert len(store) == 2
+    assert (shirt.quantity, hat.quantity) == (4, 3)
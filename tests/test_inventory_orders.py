@@ -0,0 +1,71 @@
+import pytest
+
+from inventory_orders import OrderEngine, OrderError
+
+
+@pytest.fixture
+def engine(store, tmp_path):
+    engine = OrderEngine(store, str(tmp_path / "orders.jsonl"))
+    yield engine
+    engine.close()
+
+
+def test_orders_apply_all_lines_or_none(store, engine):
+    shirt, sneaker = store.find("shirt", "red")[0], store.find("sneaker")[0]
+    with pytest.raises(OrderError) as error:
+        engine.place({shirt.id: 2, sneaker.id: 99})
+    assert "sneaker" in " ".join(error.value.problems)
+    assert shirt.quantity == 10
+
+    order = engine.place({shirt.id: 2, sneaker.id: 1})
+    assert (shirt.quantity, sneaker.quantity) == (8, 3)
+    assert order["total"] == 2 * 500.0 + 3000.0
+
+
+def test_reservations_hold_stock_until_committed_or_released(store, engine):
+    shirt = store.find("shirt", "red")[0]
+    held = engine.reserve({shirt.id: 6})
+    assert engine.available(shirt.id) == 4
+    with pytest.raises(OrderError):
+        engine.place({shirt.id: 5})
+
+    assert engine.release(held.id)
+    assert engine.available(shirt.id) == 10
+
+    held = engine.reserve({shirt.id: 6})
+    engine.commit(held.id)
+    assert shirt.quantity == 4
+    with pytest.raises(OrderError):
+        engine.commit(held.id)
+
+
+def test_expired_reservations_give_stock_back(store, engine):
+    shirt = store.find("shirt", "red")[0]
+    engine.reserve({shirt.id: 10}, ttl=-1)
+    assert engine.available(shirt.id) == 10
+
+
+def test_committed_orders_replay_from_the_ledger_after_a_torn_write(store, tmp_path):
+    path = str(tmp_path / "orders.jsonl")
+    shirt = store.find("shirt", "red")[0]
+    engine = OrderEngine(store, path)
+    engine.place({shirt.id: 1})
+    engine.close()
+    with open(path, "a") as f:
+        f.write('{"event": "com')
+
+    engine = OrderEngine(store, path)
+    engine.place({shirt.id: 1})
+    engine.close()
+
+    engine = OrderEngine(store, path)
+    assert [order["order_id"] for order in engine] == ["O1", "O2"]
+    engine.close()
+
+
+def test_items_without_a_price_are_sold_at_zero(store, engine):
+    belt = store.add(name="belt", quantity=3, category="accessories", price=None)
+    order = engine.place({belt.id: 2})
+
+    assert (order["total"], belt.quantity) == (0, 1)
+    assert "belt" in engine.invoice()
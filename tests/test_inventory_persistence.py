@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from inventory_db import SqliteBackend
+from inventory_journal import open_journal_store, read_jsonl
+from inventory_store import InventoryStore
+
+
+def test_sqlite_store_reloads_saved_rows(tmp_path):
+    path = str(tmp_path / "inventory.db")
+    store = InventoryStore(backend=SqliteBackend(path, batch_size=2))
+    shirt = store.add(name="shirt", quantity=3, category="clothing", price=500.0, color="red")
+    hat = store.add(name="hat", quantity=1, category="hats", price=200.0)
+    store.update(shirt.id, quantity=5)
+    store.delete(hat.id)
+    store.flush()
+
+    reloaded = InventoryStore(backend=SqliteBackend(path))
+    assert [(item.name, item.color, item.quantity) for item in reloaded] == [("shirt", "red", 5)]
+
+
+def test_journal_store_replays_the_journal_over_the_snapshot(tmp_path):
+    snapshot, journal = str(tmp_path / "inventory.json"), str(tmp_path / "inventory.journal.jsonl")
+    store = open_journal_store(snapshot, journal, compact_every=3)
+    for name in ("shirt", "hat", "cap", "belt"):
+        store.add(name=name, quantity=1, category="clothing", price=1.0)
+    store.delete(store.find("hat")[0].id)
+    store.flush()
+
+    assert [item.name for item in open_journal_store(snapshot, journal)] == ["shirt", "cap", "belt"]
+
+
+def test_read_jsonl_cuts_a_torn_last_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b'{"n": 1}\n{"n": 2}\n{"n": 3')
+
+    assert list(read_jsonl(str(path))) == [{"n": 1}, {"n": 2}]
+    assert path.read_bytes() == b'{"n": 1}\n{"n": 2}\n'
+
+    with open(path, "a") as f:
+        f.write(json.dumps({"n": 4}) + "\n")
+    assert list(read_jsonl(str(path))) == [{"n": 1}, {"n": 2}, {"n": 4}]
+
+
+def test_read_jsonl_completes_a_last_line_without_newline(tmp_path):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b'{"n": 1}')
+
+    assert list(read_jsonl(str(path))) == [{"n": 1}]
+    assert path.read_bytes() == b'{"n": 1}\n'
+
+
+def test_journal_store_survives_a_crash_mid_append(tmp_path):
+    snapshot, journal = str(tmp_path / "inventory.json"), str(tmp_path / "inventory.journal.jsonl")
+    store = open_journal_store(snapshot, journal)
+    store.add(name="shirt", quantity=3, category="clothing", price=1.0)
+    store.close()
+    with open(journal, "a") as f:
+        f.write('{"op": "ups')
+
+    store = open_journal_store(snapshot, journal)
+    store.add(name="hat", quantity=1, category="hats", price=1.0)
+    store.close()
+
+    assert [item.name for item in open_journal_store(snapshot, journal)] == ["shirt", "hat"]
+
+
+def sqlite_store(path):
+    return InventoryStore(backend=SqliteBackend(str(path), batch_size=1))
+
+
+def journal_store(path):
+    return open_journal_store(str(path / "inventory.json"), str(path / "journal.jsonl"), compact_every=3)
+
+
+@pytest.mark.parametrize("open_store", [sqlite_store, journal_store], ids=["sqlite", "journal"])
+def test_thresholds_are_saved_with_the_inventory(tmp_path, open_store):
+    path = tmp_path / "inventory.db" if open_store is sqlite_store else tmp_path
+    store = open_store(path)
+    shirt = store.add(name="shirt", quantity=4, category="clothing", price=1.0)
+    store.add(name="soap", quantity=8, category="care", price=1.0)
+    store.set_item_threshold(shirt.id, 2)
+    store.set_category_threshold("care", 10)
+    store.set_default_threshold(7)
+    for _ in range(4):  # enough journal entries to compact
+        store.adjust_quantity(shirt.id, 0)
+    store.close()
+
+    store = open_store(path)
+    assert store.thresholds() == {"default": 7, "category": {"care": 10}, "item": {str(shirt.id): 2}}
+    assert [item.name for item in store.low_stock()] == ["soap"]
+
+
+def test_upsert_many_writes_rows_in_one_call(tmp_path):
+    path = tmp_path / "inventory.db"
+    store = InventoryStore(backend=SqliteBackend(str(path), batch_size=1000))
+    store.add_many([{"name": f"cap {i}", "quantity": i, "category": "hats", "price": 1.0} for i in range(50)])
+    store.update_many([(1, {"quantity": 99})])
+    store.close()
+
+    reloaded = InventoryStore(backend=SqliteBackend(str(path)))
+    assert len(reloaded) == 50
+    assert reloaded.get(1).quantity == 99
@@ -0,0 +1,54 @@
+from inventory_search import SearchIndex, tokenize
+
+
+def test_tokenize_lowercases_and_singularizes():
+    assert tokenize("Blue Nike Sneakers") == ["blue", "nike", "sneaker"]
+
+
+def test_search_ranks_rows_matching_every_word_first(store):
+    index = SearchIndex(store)
+    results = index.search("red nike shirt")
+    assert (results[0].name, results[0].color) == ("shirt", "red")
+
+
+def test_misspelt_words_are_expanded(store):
+    index = SearchIndex(store)
+    assert [item.name for item in index.search("shampo")] == ["shampoo"]
+    assert index.search("snekaer")[0].name == "sneaker"
+
+
+def test_resolve_needs_one_best_match(store):
+    index = SearchIndex(store)
+    assert index.resolve("shirt") is None  # red and blue are equally good
+    assert index.resolve("blue shirt").color == "blue"
+
+
+def test_index_follows_store_writes_without_a_rebuild(store):
+    index = SearchIndex(store)
+    hat = store.add(name="hat", quantity=1, category="hats", price=1.0, color="green")
+    assert index.resolve("green hat") is hat
+
+    store.update(hat.id, color="black")
+    assert index.resolve("green hat") is None
+    assert index.resolve("black hat") is hat
+
+    store.delete(hat.id)
+    assert index.search("hat") == []
+
+    store.clear()
+    assert index.search("shirt") == []
+
+
+def test_background_build_includes_writes_made_while_it_runs(store):
+    index = SearchIndex(store)
+    belt = store.add(name="belt", quantity=1, category="accessories", price=1.0)
+    assert index.wait_ready(timeout=5)
+    assert index.resolve("belt") is belt
+    index.close()
+
+
+def test_resolve_ignores_near_misses(store):
+    index = SearchIndex(store)
+    assert index.search("blue skirt")[0].name == "shirt"
+    assert index.resolve("blue skirt") is None
+    assert index.resolve("blue shir").color == "blue"  # the start of a word is enough
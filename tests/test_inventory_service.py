@@ -0,0 +1,36 @@
+from inventory_service import InventoryService
+
+
+def make_service(tmp_path, monkeypatch, legacy_owner=None):
+    # The legacy inventory and ledger paths are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return InventoryService(tenant_dir=str(tmp_path / "inventories"),
+                            default_db_path=str(tmp_path / "inventory.db"), legacy_owner=legacy_owner)
+
+
+def test_only_the_configured_owner_gets_the_legacy_inventory(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch, legacy_owner="alice")
+    service.store("alice").add(name="shirt", quantity=1, category="clothing", price=1.0)
+
+    assert service.db_path("alice") == str(tmp_path / "inventory.db")
+    assert service.db_path("default") != service.db_path("alice")
+    assert len(service.store("default")) == 0
+    service.close()
+
+
+def test_without_an_owner_nobody_gets_the_legacy_inventory(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    assert str(tmp_path / "inventory.db") not in {service.db_path(name) for name in ("default", "alice", "")}
+    service.close()
+
+
+def test_idle_tenants_are_closed_and_reopen_with_their_rows(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    handle = service.handle("bob")
+    handle.store.add(name="hat", quantity=2, category="hats", price=1.0)
+    service.store("carol")
+
+    assert service.close_idle(max_idle=3600) == 0
+    assert service.close_idle(max_idle=0) == 2
+    assert [item.name for item in handle.store] == ["hat"]
+    service.close()
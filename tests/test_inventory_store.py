@@ -0,0 +1,98 @@
+import threading
+
+from inventory_store import InventoryStore
+
+
+def test_indexes_and_totals_follow_updates(store):
+    shirt = store.find("shirt", "red")[0]
+    store.update(shirt.id, color="blue", quantity=3)
+
+    assert store.find("shirt", "red") == []
+    assert len(store.find("shirt", "blue")) == 2
+    assert store.group_totals("shirt", "blue") == (2, 5)
+    assert store.category_totals()["clothing"]["units"] == 5
+
+
+def test_delete_removes_row_from_every_index(store):
+    sneaker = store.find("sneaker")[0]
+    assert store.delete(sneaker.id) is sneaker
+    assert store.find("sneaker") == []
+    assert "footwear" not in store.category_totals()
+    assert store.delete(sneaker.id) is None
+
+
+def test_low_stock_uses_item_then_category_then_default_threshold(store):
+    assert [item.name for item in store.low_stock()] == ["shirt", "sneaker"]
+
+    store.set_category_threshold("care", 50)
+    assert "shampoo" in [item.name for item in store.low_stock()]
+
+    sneaker = store.find("sneaker")[0]
+    store.set_item_threshold(sneaker.id, 1)
+    assert "sneaker" not in [item.name for item in store.low_stock()]
+
+
+def test_changes_since_reports_changed_ids_until_a_clear(store):
+    version = store.version
+    shirt = store.find("shirt", "red")[0]
+    store.adjust_quantity(shirt.id, 5)
+    assert store.changes_since(version) == {shirt.id}
+
+    store.clear()
+    assert store.changes_since(version) is None
+
+
+def test_add_many_and_update_many_match_single_row_writes():
+    bulk, single = InventoryStore(), InventoryStore()
+    records = [{"name": f"cap {i}", "quantity": i, "category": "hats", "price": 10.0, "color": "red"}
+               for i in range(8)]
+    bulk.add_many(records)
+    for record in records:
+        single.add(**record)
+    bulk.update_many((item_id, {"quantity": 20}) for item_id in (1, 2))
+    for item_id in (1, 2):
+        single.update(item_id, quantity=20)
+
+    assert bulk.to_records() == single.to_records()
+    assert bulk.category_totals() == single.category_totals()
+    assert [i.id for i in bulk.low_stock()] == [i.id for i in single.low_stock()]
+    assert bulk.add(name="cap", quantity=1, category="hats", price=1.0).id == 9
+
+
+def test_listeners_see_every_change(store):
+    seen = []
+    store.subscribe(seen.append)
+    item = store.add(name="belt", quantity=1, category="accessories", price=99.0)
+    store.add_many([{"name": "sock", "quantity": 1, "category": "clothing", "price": 50.0}])
+    store.delete(item.id)
+    store.clear()
+    store.unsubscribe(seen.append)
+    store.add(name="hat", quantity=1, category="hats", price=1.0)
+
+    assert seen == [[item.id], [item.id + 1], [item.id], None]
+
+
+def test_readers_are_safe_while_another_thread_writes(store):
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        while not stop.is_set():
+            item = store.add(name="tmp", quantity=1, category="tmp", price=1.0)
+            store.delete(item.id)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(2000):
+            try:
+                store.to_records()
+                store.low_stock()
+                list(store)
+            except Exception as e:  # pragma: no cover - only on a regression
+                errors.append(e)
+                break
+    finally:
+        stop.set()
+        thread.join()
+    assert errors == []
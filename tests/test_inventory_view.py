@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from inventory_view import InventoryView  # noqa: E402
+
+
+def test_frame_is_patched_with_store_changes(store):
+    view = InventoryView(store)
+    assert len(view.frame()) == 4
+
+    shirt = store.find("shirt", "red")[0]
+    store.update(shirt.id, quantity=1)
+    soap = store.add(name="soap", quantity=5, category="care", price=80.0)
+    store.delete(store.find("sneaker")[0].id)
+
+    frame = view.frame()
+    assert len(frame) == len(store) == 4
+    assert frame.loc[shirt.id, "quantity"] == 1
+    assert frame.loc[soap.id, "name"] == "soap"
+
+
+def test_query_filters_sorts_and_pages(store):
+    view = InventoryView(store)
+    page, total = view.query(category="clothing", sort_by="price", page_size=1)
+    assert total == 2
+    assert page["price"].tolist() == [450.0]
+
+    page, total = view.query(ids=[4, 1])
+    assert page["id"].tolist() == [4, 1]
+    assert view.options("brand") == ["dove", "nike", "zara"]
@@ -0,0 +1,27 @@
+import time
+
+from agent_runtime import run_sync
+from llm_gateway import LLMGateway
+
+
+async def fake_completion(**kwargs):
+    return kwargs["messages"]
+
+
+def make_gateway(**options):
+    return LLMGateway(pool_connections=False, completion_fn=fake_completion, **options)
+
+
+def test_burst_defaults_to_a_quarter_minute_of_requests():
+    assert make_gateway(requests_per_minute=30).bucket.capacity == 7.5
+    assert make_gateway(requests_per_minute=2).bucket.capacity == 1
+    assert make_gateway(requests_per_minute=30, burst=3).bucket.capacity == 3
+
+
+def test_a_burst_goes_out_without_waiting():
+    gateway = make_gateway(requests_per_minute=30)
+    started = time.monotonic()
+    for i in range(5):
+        assert run_sync(gateway.acomplete(model="m", messages=[str(i)])) == [str(i)]
+    assert time.monotonic() - started < 1
+    assert gateway.stats()["rate_limit_wait_s"] == 0
@@ -0,0 +1,27 @@
+import json
+
+from user_store import UserStore
+
+
+def test_legacy_passwords_are_hashed_then_scrubbed_from_the_json(tmp_path):
+    json_path = tmp_path / "user_data.json"
+    json_path.write_text(json.dumps({"alice": {"name": "Alice", "email": "a@x", "phone": "1", "password": "pw"}}))
+    store = UserStore(str(tmp_path / "users.db"))
+
+    assert store.import_legacy(str(json_path)) == 1
+    assert json.loads(json_path.read_text()) == {"alice": {"name": "Alice", "email": "a@x", "phone": "1"}}
+    assert store.authenticate("alice", "pw")["name"] == "Alice"
+    assert store.authenticate("alice", "wrong") is None
+    assert store.import_legacy(str(json_path)) == 0
+    store.close()
+
+
+def test_a_leftover_password_is_scrubbed_on_the_next_start(tmp_path):
+    json_path = tmp_path / "user_data.json"
+    json_path.write_text(json.dumps({"bob": {"name": "Bob", "password": "pw"}}))
+    store = UserStore(str(tmp_path / "users.db"))
+    store.import_legacy(str(tmp_path / "missing.json"))  # marks the import as done
+
+    assert store.import_legacy(str(json_path)) == 0
+    assert json.loads(json_path.read_text()) == {"bob": {"name": "Bob"}}
+    store.close()
@@ -0,0 +1,221 @@
+"""Lightweight tracing: monotonic-timer spans aggregated into histograms, exported in Prometheus text format."""
+
+import functools
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Seconds; spans range from sub-millisecond store calls to multi-second LLM calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "inventory"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max", "errors")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (the max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max
+        return self.max
+
+
+class _Span:
+    __slots__ = ("tracer", "key", "started")
+
+    def __init__(self, tracer: "Tracer", key: Tuple):
+        self.tracer = tracer
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.observe(self.key, time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects span durations per (name, labels).
+
+    Disabled by default: ``span()`` then returns one shared no-op context
+    manager, so instrumented code pays a flag check and nothing else. Enable
+    with ``enable()`` or ``INVENTORY_TRACING=1``.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple, Histogram] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name: str, **labels):
+        """``with tracer.span("tool.execute", tool="add_item"): ...``"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, (name, tuple(sorted(labels.items()))))
+
+    def traced(self, name: str) -> Callable:
+        """Decorator form of ``span`` for functions; checks ``enabled`` on every call."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, key: Tuple, seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds, error)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One row per span series, for display."""
+        with self._lock:
+            rows = []
+            for (name, labels), h in sorted(self._histograms.items()):
+                rows.append({
+                    "span": name,
+                    "labels": ", ".join(f"{k}={v}" for k, v in labels),
+                    "count": h.count,
+                    "errors": h.errors,
+                    "total_s": round(h.sum, 4),
+                    "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                    "p50_ms": round(h.quantile(0.5) * 1000, 3),
+                    "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                    "max_ms": round(h.max * 1000, 3),
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts)),
+                })
+            return rows
+
+    def export_prometheus(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        errors = f"{METRIC_PREFIX}_span_errors_total"
+        lines = [
+            f"# HELP {metric} Duration of traced spans.",
+            f"# TYPE {metric} histogram",
+        ]
+        error_lines = [
+            f"# HELP {errors} Spans that ended with an exception.",
+            f"# TYPE {errors} counter",
+        ]
+        with self._lock:
+            for (name, labels), h in sorted(self._histograms.items()):
+                label_text = ",".join([f'span="{name}"'] + [f'{k}="{v}"' for k, v in labels])
+                cumulative = 0
+                for bound, n in zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{label_text}}} {h.sum}")
+                lines.append(f"{metric}_count{{{label_text}}} {h.count}")
+                error_lines.append(f"{errors}{{{label_text}}} {h.errors}")
+        return "\n".join(lines + error_lines) + "\n"
+
+    def write_prometheus(self, path: str = "metrics.prom"):
+        """Write the metrics atomically, e.g. for node_exporter's textfile collector."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.export_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+        """Serve ``/metrics`` on a daemon thread."""
+        # http.server pulls in the email package; only processes that serve metrics pay for it
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.export_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+tracer = Tracer(enabled=os.environ.get("INVENTORY_TRACING", "") not in ("", "0", "false"))
+span = tracer.span
+traced = tracer.traced
+
+_metrics_server: Optional["ThreadingHTTPServer"] = None
+_metrics_lock = threading.Lock()
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Start the process-wide ``/metrics`` endpoint once; later calls return the same server."""
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is None:
+            _metrics_server = tracer.serve(port, host)
+        return _metrics_server
@@ -0,0 +1,254 @@
+"""SQLite user accounts with scrypt password hashes, replacing the user_data.json file."""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+DEFAULT_USERS_DB_PATH = "users.db"
+LEGACY_USERS_PATH = "user_data.json"
+
+# scrypt cost; raise SCRYPT_N (a power of two) as hardware gets faster
+SCRYPT_N = int(os.environ.get("INVENTORY_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+LOGIN_CACHE_TTL = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    password_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+PROFILE_COLUMNS = ("username", "name", "email", "phone")
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    """Salted scrypt hash encoded as ``scrypt$n$r$p$salt$hash`` so the cost travels with it."""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=2 ** 26, dklen=32)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    try:
+        scheme, n, r, p, salt, expected = encoded.split("$")
+    except ValueError:
+        return False
+    if scheme != "scrypt":
+        return False
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=base64.b64decode(salt), n=int(n), r=int(r),
+                            p=int(p), maxmem=2 ** 26, dklen=32)
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+def needs_rehash(encoded: str) -> bool:
+    """True for hashes made with a different cost than the current settings."""
+    return not encoded.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+def scrub_legacy_passwords(json_path: str = LEGACY_USERS_PATH) -> bool:
+    """Remove the plaintext passwords from user_data.json, keeping the rest. True if the file changed."""
+    if not os.path.exists(json_path):
+        return False
+    with open(json_path) as f:
+        users = json.load(f) or {}
+    if not any("password" in data for data in users.values()):
+        return False
+    scrubbed = {username: {k: v for k, v in data.items() if k != "password"} for username, data in users.items()}
+    # Written next to the original and swapped in, so a crash leaves one complete file or the other
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(scrubbed, f, indent=4)
+    os.replace(tmp_path, json_path)
+    return True
+
+
+class UserStore:
+    """
+    User accounts in SQLite, looked up by primary key.
+
+    Each write is its own transaction; SQLite's file lock (with a busy timeout)
+    serializes writers across sessions and processes, and a duplicate username
+    fails on the primary key instead of racing a read-then-write.
+
+    Password hashing runs on a small worker pool. The caller still waits for its
+    own hash (a login cannot answer before the KDF does), but the pool caps how
+    many KDFs run at once, so a burst of logins cannot take every core or
+    exhaust memory. Successful logins are cached for ``login_cache_ttl`` seconds
+    under a keyed digest of the credentials, so repeated checks skip the KDF
+    without keeping passwords in memory.
+    """
+
+    def __init__(self, path: str = DEFAULT_USERS_DB_PATH, hash_workers: int = 2,
+                 login_cache_ttl: float = LOGIN_CACHE_TTL):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._hasher = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="password-kdf")
+        self._cache_key = secrets.token_bytes(32)
+        self._login_cache: Dict[str, tuple] = {}
+        self.login_cache_ttl = login_cache_ttl
+
+    # ---------- reads ----------
+
+    def _row(self, username: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT username, name, email, phone, password_hash FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(PROFILE_COLUMNS + ("password_hash",), row))
+
+    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        """Profile fields for ``username`` (never the password hash), or None."""
+        row = self._row(username)
+        if row is None:
+            return None
+        row.pop("password_hash")
+        return row
+
+    def exists(self, username: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    # ---------- writes ----------
+
+    def create_user(self, username: str, name: str, email: str, phone: str, password: str) -> bool:
+        """Add an account. Returns False if the username is taken."""
+        password_hash = self._hasher.submit(hash_password, password).result()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO users (username, name, email, phone, password_hash, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (username, name, email, phone, password_hash, time.time()),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def set_password(self, username: str, password: str):
+        password_hash = self._hasher.submit(hash_password, password).result()
+        with self._lock:
+            self._conn.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+            self._login_cache.pop(username, None)
+
+    # ---------- login ----------
+
+    def _credential_digest(self, username: str, password: str, password_hash: str) -> bytes:
+        message = "\0".join((username, password, password_hash)).encode("utf-8")
+        return hmac.new(self._cache_key, message, hashlib.sha256).digest()
+
+    def authenticate(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """The user's profile if the password matches, otherwise None."""
+        row = self._row(username)
+        if row is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            self._hasher.submit(hash_password, password).result()
+            return None
+
+        password_hash = row.pop("password_hash")
+        digest = self._credential_digest(username, password, password_hash)
+        cached = self._login_cache.get(username)
+        if cached is not None and cached[0] > time.monotonic() and hmac.compare_digest(cached[1], digest):
+            return row
+
+        if not self._hasher.submit(verify_password, password, password_hash).result():
+            return None
+        if needs_rehash(password_hash):
+            self.set_password(username, password)
+            digest = self._credential_digest(username, password, self._row(username)["password_hash"])
+        self._login_cache[username] = (time.monotonic() + self.login_cache_ttl, digest)
+        return row
+
+    # ---------- migration ----------
+
+    def import_legacy(self, json_path: str = LEGACY_USERS_PATH) -> int:
+        """
+        One-time import of user_data.json. Plaintext passwords are hashed on the way in
+        and removed from the file once the import is committed.
+        Returns the number of accounts imported, or 0 if the import already ran.
+        """
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                # A crash between the commit and the scrub would otherwise leave the passwords behind
+                scrub_legacy_passwords(json_path)
+                return 0
+        users = {}
+        if os.path.exists(json_path):
+            with open(json_path) as f:
+                users = json.load(f) or {}
+
+        rows = [
+            (username, data.get("name", ""), data.get("email"), data.get("phone"),
+             hash_password(data["password"]), time.time())
+            for username, data in users.items() if data.get("password")
+        ]
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes cannot both import
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                    self._conn.execute("ROLLBACK")
+                    scrub_legacy_passwords(json_path)
+                    return 0
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO users (username, name, email, phone, password_hash, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', '1')")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        scrub_legacy_passwords(json_path)
+        return len(rows)
+
+    def close(self):
+        self._hasher.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[UserStore] = None
+_default_lock = threading.Lock()
+
+
+def get_user_store(path: str = DEFAULT_USERS_DB_PATH, json_path: str = LEGACY_USERS_PATH) -> UserStore:
+    """Process-wide user store shared by every session; imports user_data.json on first use."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = UserStore(path)
+            _default_store.import_legacy(json_path)
+        return _default_store